@@ -4,16 +4,27 @@ Arena AutoCache (simple) - Production-ready OnDemand-only node with robust env h
 RU: Production-готовая нода кэширования с надежной обработкой .env, потокобезопасностью, безопасной очисткой и автопатчингом
 """
 
+import asyncio
 import os
 import shutil
 import threading
 import time
 import json
 import inspect
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from queue import Queue
 
+from autocache.arena_copy_events import CopyEventPublisher
+from autocache.arena_copy_jobs import CopyJobRegistry
+from autocache.arena_copy_io import CopyOptions, copy_stream
+from autocache.arena_cache_index import CacheIndex, file_id
+from autocache.arena_blob_store import BLOB_DIR, BlobStore, new_hasher
+from autocache import arena_metrics
+from autocache.arena_event_log import EVENT_LOG, emit as _emit_event
+from autocache.arena_profiler import PROFILER
+from autocache.arena_shared_cache import EvictorElection, SharedIndex, model_lock
+
 
 @dataclass
 class CacheSettings:
@@ -30,6 +41,8 @@ class CacheSettings:
     max_concurrency: int = 2
     session_byte_budget: int = 0  # 0 = unlimited
     cooldown_ms: int = 5000
+    # RU: Параметры ноды, из которых собраны настройки - нужны для пересборки при изменении .env
+    node_args: dict = field(default_factory=dict)
 
 
 # RU: Глобальные настройки и состояние
@@ -37,6 +50,7 @@ _settings = None
 _auto_cache_enabled = False  # RU: Глобальный флаг авто-кеширования
 _autopatch_enabled = False   # RU: Глобальный флаг автопатча
 _folder_paths_patched = False
+_profile_env_enabled = None  # RU: Последнее примененное значение ARENA_PROFILE (None - еще не применялось)
 _workflow_prefetch_started = False  # RU: Флаг запуска предзагрузки workflow
 _copy_queue = Queue()
 _copy_thread_started = False
@@ -56,9 +70,9 @@ _last_copy_time = 0.0  # RU: Время последнего копирован
 _copy_frequency_limit = 1.0  # RU: Минимальный интервал между копированиями (секунды)
 
 # RU: Live sync watcher
-_env_watcher_thread = None
-_env_watcher_running = False
-_env_file_mtime = 0.0
+_env_watcher = None  # arena_env_watcher.EnvFileWatcher
+_env_snapshot: dict[str, str] = {}  # RU: Последний примененный снимок .env
+_settings_lock = threading.RLock()  # RU: Лок для атомарной подмены настроек
 
 # RU: Контроль demand-driven caching
 _required_models: set[tuple[str, str]] = set()  # (category, filename)
@@ -130,19 +144,25 @@ KNOWN_CATEGORIES = [
     "temporal_models",
 ]
 
-# RU: Статистика копирования
-_copy_status = {
-    "total_jobs": 0,
-    "completed_jobs": 0,
-    "failed_jobs": 0,
-    "current_file": "",
-    "last_update": 0,
-    # RU: Прогресс копирования для UI индикатора
-    "is_copying": False,
-    "current_file_size": 0,
-    "current_file_copied": 0,
-    "current_file_progress": 0,  # 0-100%
-}
+# RU: Реестр задач копирования (потокобезопасный, по задаче на файл)
+_copy_jobs = CopyJobRegistry()
+
+# RU: In-memory индекс файлов кеша и каталог размеров исходников на NAS
+_cache_index = None  # arena_cache_index.CacheIndex
+_cache_index_lock = threading.Lock()
+_source_sizes: dict[str, int] = {}
+
+# RU: Контентно-адресуемое хранилище (ARENA_CACHE_DEDUP): blob по sha256 + жесткие ссылки по категориям
+_blob_store = None  # arena_blob_store.BlobStore
+_blob_store_lock = threading.Lock()
+
+# RU: Push-уведомления о копировании через websocket ComfyUI (вместо polling из UI)
+_copy_events = CopyEventPublisher()
+
+# RU: Координация нескольких процессов ComfyUI на одном корне кеша (выборы evictor'а)
+_evictor = None  # arena_shared_cache.EvictorElection
+_evictor_lock = threading.Lock()
+_evictor_thread_started = False
 
 
 def _now() -> float:
@@ -185,74 +205,121 @@ def _find_comfy_root():
     return None
 
 
+# RU: Известные ключи .env файла
+_ENV_KNOWN_KEYS = {
+    "ARENA_CACHE_ROOT", "ARENA_CACHE_MIN_SIZE_MB", "ARENA_CACHE_MAX_GB",
+    "ARENA_CACHE_VERBOSE", "ARENA_CACHE_CATEGORIES", "ARENA_CACHE_CATEGORIES_MODE",
+    "ARENA_CACHE_MODE", "ARENA_AUTO_CACHE_ENABLED", "ARENA_AUTOCACHE_AUTOPATCH",
+    "ARENA_CACHE_DISCOVERY", "ARENA_CACHE_PREFETCH_STRATEGY", "ARENA_CACHE_MAX_CONCURRENCY",
+    "ARENA_CACHE_SESSION_BYTE_BUDGET", "ARENA_CACHE_COOLDOWN_MS", "ARENA_COPY_EVENT_INTERVAL_MS",
+    "ARENA_FS_EXECUTOR_WORKERS", "ARENA_FS_TIMEOUT_S", "ARENA_CACHE_INDEX_MAX_AGE_S",
+    "ARENA_CACHE_QUEUE_PREFETCH", "ARENA_EVENT_LOG", "ARENA_EVENT_LOG_PATH", "ARENA_EVENT_LOG_MAX_MB",
+    "ARENA_EVENT_LOG_BACKUPS", "ARENA_EVENT_LOG_QUEUE", "ARENA_PROFILE",
+    "ARENA_CACHE_SHARED", "ARENA_COPY_WAIT_TIMEOUT_S", "ARENA_EVICT_INTERVAL_S", "ARENA_CACHE_MISS_WAIT_S",
+    "ARENA_CACHE_DEDUP", "ARENA_COPY_PREALLOCATE", "ARENA_COPY_DROP_CACHE", "ARENA_COPY_DIRECT"
+}
+
+
+def _env_file_candidates() -> list[Path]:
+    """RU: Возможные пути .env файла: основной (comfy_root/user) и fallback ComfyUI Desktop (AppData)."""
+    candidates = []
+    comfy_root = _find_comfy_root()
+    if comfy_root:
+        candidates.append(comfy_root / "user" / "arena_autocache.env")
+        candidates.append(Path(os.environ.get("APPDATA", "")) / "ComfyUI" / "logs" / "arena_autocache.env")
+    return candidates
+
+
+def _resolve_env_file():
+    """RU: Возвращает путь к существующему .env файлу или None."""
+    for candidate in _env_file_candidates():
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def _read_env_file(env_file: Path) -> dict[str, str]:
+    """RU: Читает и валидирует .env файл целиком, НЕ трогая os.environ."""
+    snapshot: dict[str, str] = {}
+    with open(env_file, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#") or "=" not in line:
+                continue
+            key, value = line.split("=", 1)
+            key = key.strip()
+            value = value.strip()
+
+            # RU: Валидация ключей
+            if not key or not value:
+                continue
+
+            # RU: Валидация значений для числовых параметров
+            if key in ("ARENA_CACHE_MIN_SIZE_MB", "ARENA_CACHE_MAX_GB"):
+                try:
+                    float(value)
+                except ValueError:
+                    continue
+
+            # RU: Валидация булевых значений
+            if key in ("ARENA_CACHE_VERBOSE", "ARENA_AUTO_CACHE_ENABLED", "ARENA_AUTOCACHE_AUTOPATCH"):
+                if value.lower() not in ("true", "false", "1", "0", "yes", "no"):
+                    continue
+
+            # RU: Валидация режима кэширования
+            if key == "ARENA_CACHE_MODE":
+                if value.lower() not in ("ondemand", "disabled"):
+                    continue
+
+            snapshot[key] = value
+    return snapshot
+
+
 def _load_env_file():
     """RU: Загружает настройки из user/arena_autocache.env если файл существует."""
-    comfy_root = _find_comfy_root()
-    if not comfy_root:
+    global _env_snapshot
+
+    env_file = _resolve_env_file()
+    if not env_file:
         return False
 
-    # RU: Основной путь для .env файла
-    env_file = comfy_root / "user" / "arena_autocache.env"
-    
-    # RU: Fallback для ComfyUI Desktop - поиск в AppData
-    if not env_file.exists():
-        appdata_path = Path(os.environ.get("APPDATA", "")) / "ComfyUI" / "logs" / "arena_autocache.env"
-        if appdata_path.exists():
-            env_file = appdata_path
-        else:
-            return False
-    
-    if env_file.exists():
-        try:
-            loaded_count = 0
-            with open(env_file, encoding="utf-8") as f:
-                for line_num, line in enumerate(f, 1):
-                    line = line.strip()
-                    if line and not line.startswith("#") and "=" in line:
-                        key, value = line.split("=", 1)
-                        key = key.strip()
-                        value = value.strip()
-                        
-                        # RU: Валидация ключей
-                        if not key or not value:
-                            continue
-                            
-                        # RU: Валидация известных ключей
-                        known_keys = {
-                            "ARENA_CACHE_ROOT", "ARENA_CACHE_MIN_SIZE_MB", "ARENA_CACHE_MAX_GB",
-                            "ARENA_CACHE_VERBOSE", "ARENA_CACHE_CATEGORIES", "ARENA_CACHE_CATEGORIES_MODE",
-                            "ARENA_CACHE_MODE", "ARENA_AUTO_CACHE_ENABLED", "ARENA_AUTOCACHE_AUTOPATCH",
-                            "ARENA_CACHE_DISCOVERY", "ARENA_CACHE_PREFETCH_STRATEGY", "ARENA_CACHE_MAX_CONCURRENCY",
-                            "ARENA_CACHE_SESSION_BYTE_BUDGET", "ARENA_CACHE_COOLDOWN_MS"
-                        }
-                        
-                        
-                        # RU: Валидация значений для числовых параметров
-                        if key in ("ARENA_CACHE_MIN_SIZE_MB", "ARENA_CACHE_MAX_GB"):
-                            try:
-                                float(value)
-                            except ValueError:
-                                continue
-                        
-                        # RU: Валидация булевых значений
-                        if key in ("ARENA_CACHE_VERBOSE", "ARENA_AUTO_CACHE_ENABLED", "ARENA_AUTOCACHE_AUTOPATCH"):
-                            if value.lower() not in ("true", "false", "1", "0", "yes", "no"):
-                                continue
-                        
-                        # RU: Валидация режима кэширования
-                        if key == "ARENA_CACHE_MODE":
-                            if value.lower() not in ("ondemand", "disabled"):
-                                continue
-                        
-                        os.environ[key] = value
-                        loaded_count += 1
-            
-            return loaded_count > 0
-                
-        except Exception as e:
-            return False
-    
-    return False
+    try:
+        snapshot = _read_env_file(env_file)
+    except Exception:
+        return False
+
+    with _settings_lock:
+        os.environ.update(snapshot)
+        _env_snapshot = dict(snapshot)
+    return len(snapshot) > 0
+
+
+def _apply_env_snapshot(snapshot: dict[str, str]) -> None:
+    """RU: Атомарно применяет полный снимок .env: ключи, удаленные из файла, сбрасываются, _settings пересобирается целиком."""
+    global _settings, _env_snapshot
+
+    with _settings_lock:
+        removed = sorted(set(_env_snapshot) - set(snapshot))
+        changed = {k: v for k, v in snapshot.items() if _env_snapshot.get(k) != v}
+        for key in removed:
+            os.environ.pop(key, None)
+        os.environ.update(snapshot)
+        _env_snapshot = dict(snapshot)
+
+        if _settings is not None:
+            # RU: Новый объект настроек собирается полностью (с теми же параметрами ноды) и подменяется одним присваиванием
+            previous = _settings
+            rebuilt = _build_settings(reload_env=False, **previous.node_args)
+            # RU: Категории, добавленные из воркфлоу, переживают перечитывание .env
+            for category in previous.effective_categories:
+                if category not in rebuilt.effective_categories:
+                    rebuilt.effective_categories.append(category)
+            _settings = rebuilt
+
+    if changed or removed:
+        _emit_event("settings", changed=changed, removed=removed)
+    if "ARENA_PROFILE" in changed or "ARENA_PROFILE" in removed:
+        _configure_profiler()
 
 
 def _save_env_file(kv: dict[str, str], remove_keys: list[str] = None):
@@ -302,12 +369,33 @@ def _init_settings(
     min_size_mb: float = 10.0,
     max_cache_gb: float = 0.0,
     verbose: bool = False,
+    reload_env: bool = True,
 ) -> CacheSettings:
     """RU: Инициализирует настройки кэширования с резолвингом путей по умолчанию."""
     global _settings
 
+    _settings = _build_settings(cache_root, min_size_mb, max_cache_gb, verbose, reload_env)
+    return _settings
+
+
+def _build_settings(
+    cache_root: str = "",
+    min_size_mb: float = 10.0,
+    max_cache_gb: float = 0.0,
+    verbose: bool = False,
+    reload_env: bool = True,
+) -> CacheSettings:
+    """RU: Собирает объект настроек (нода > .env > default), не подменяя глобальный _settings."""
+    node_args = {
+        "cache_root": cache_root,
+        "min_size_mb": min_size_mb,
+        "max_cache_gb": max_cache_gb,
+        "verbose": verbose,
+    }
+
     # RU: Загружаем .env файл при каждой инициализации для актуальности настроек
-    _load_env_file()
+    if reload_env:
+        _load_env_file()
 
 
     # RU: Приоритет настроек: параметры ноды > .env файл > значения по умолчанию
@@ -387,7 +475,7 @@ def _init_settings(
     session_byte_budget = int(os.environ.get("ARENA_CACHE_SESSION_BYTE_BUDGET", "0"))
     cooldown_ms = int(os.environ.get("ARENA_CACHE_COOLDOWN_MS", "5000"))
     
-    _settings = CacheSettings(
+    settings = CacheSettings(
         root=root,
         min_size_mb=min_size_mb,
         max_cache_gb=max_cache_gb,
@@ -398,6 +486,7 @@ def _init_settings(
         max_concurrency=max_concurrency,
         session_byte_budget=session_byte_budget,
         cooldown_ms=cooldown_ms,
+        node_args=node_args,
     )
     
     
@@ -409,7 +498,48 @@ def _init_settings(
     _auto_cache_enabled = enabled_raw.lower() in ("true", "1", "yes")
     _autopatch_enabled = autopatch_raw.lower() in ("true", "1", "yes")
     
-    return _settings
+    _configure_event_log(root)
+    _configure_profiler()
+    
+    return settings
+
+
+def _configure_profiler() -> None:
+    """RU: Включает/выключает профилирование hot path, только когда значение ARENA_PROFILE изменилось.
+
+    Пересборка настроек (.env, запуск ноды) не должна отменять POST /arena/profile.
+    """
+    global _profile_env_enabled
+    enabled = os.environ.get("ARENA_PROFILE", "0").lower() in ("true", "1", "yes")
+    if enabled == _profile_env_enabled:
+        return
+    _profile_env_enabled = enabled
+    if enabled:
+        PROFILER.enable()
+    else:
+        PROFILER.disable()
+
+
+def _configure_event_log(cache_root: Path) -> None:
+    """RU: Включает/выключает JSONL журнал событий кеша по ARENA_EVENT_LOG (по умолчанию выключен)."""
+    if os.environ.get("ARENA_EVENT_LOG", "0").lower() not in ("true", "1", "yes"):
+        EVENT_LOG.configure(None)
+        return
+    path = os.environ.get("ARENA_EVENT_LOG_PATH", "")
+    if not path:
+        # RU: По умолчанию рядом с .env (comfy_root/user), иначе в корне кеша
+        comfy_root = _find_comfy_root()
+        base = comfy_root / "user" if comfy_root else cache_root
+        path = base / "arena_autocache_events.jsonl"
+    try:
+        EVENT_LOG.configure(
+            Path(path),
+            max_bytes=int(get_env_default("ARENA_EVENT_LOG_MAX_MB", 50.0, float) * 1024 * 1024),
+            backups=get_env_default("ARENA_EVENT_LOG_BACKUPS", 3, int),
+            queue_size=get_env_default("ARENA_EVENT_LOG_QUEUE", 10000, int),
+        )
+    except Exception as e:
+        print(f"[ArenaAutoCache] Event log disabled: {e}")
 
 
 def _apply_folder_paths_patch():
@@ -437,51 +567,68 @@ def _apply_folder_paths_patch():
             # RU: ComfyUI должен искать в оригинальных путях, а мы перехватываем в get_full_path
             return original_get_folder_paths(folder_name)
 
+        @PROFILER.profiled("get_full_path")
         def patched_get_full_path(folder_name: str, filename: str) -> str:
             """RU: Патченная функция get_full_path с кэшированием."""
-            
-            # RU: УНИВЕРСАЛЬНОЕ кеширование для ЛЮБЫХ категорий моделей
-            # RU: ComfyUI сам определяет категории через folder_paths, мы их все кешируем
-            if _settings:
+            started = time.perf_counter()
+            result = "passthrough"
+            resolved_path = None
+            try:
+                # RU: УНИВЕРСАЛЬНОЕ кеширование для ЛЮБЫХ категорий моделей
+                # RU: ComfyUI сам определяет категории через folder_paths, мы их все кешируем
+                if _settings:
                 
-                # RU: Сначала проверяем кэш (с учётом семейства, если есть)
-                cache_path_obj = _get_cache_path(folder_name, filename)
-                if cache_path_obj and cache_path_obj.exists():
-                    if _settings.verbose:
-                        print(f"[ArenaAutoCache] ✅ Cache HIT: {folder_name}/{filename} from {cache_path_obj}")
-                    return str(cache_path_obj)
-
-                # RU: Если не в кэше, получаем оригинальный путь
-                try:
-                    original_path = folder_paths.get_full_path_origin(folder_name, filename)
-                    if os.path.exists(original_path):
-                        # RU: Используем глобальные флаги (обновляются в _init_settings)
-                        global _auto_cache_enabled, _autopatch_enabled
+                    # RU: Сначала проверяем кэш (с учётом семейства, если есть)
+                    cache_path_obj = _get_cache_path(folder_name, filename)
+                    if cache_path_obj and cache_path_obj.exists():
+                        if _settings.verbose:
+                            print(f"[ArenaAutoCache] ✅ Cache HIT: {folder_name}/{filename} from {cache_path_obj}")
+                        result = "hit"
+                        resolved_path = str(cache_path_obj)
+                        return resolved_path
+
+                    # RU: Если не в кэше, получаем оригинальный путь
+                    try:
+                        original_path = folder_paths.get_full_path_origin(folder_name, filename)
+                        if os.path.exists(original_path):
+                            # RU: Используем глобальные флаги (обновляются в _init_settings)
+                            global _auto_cache_enabled, _autopatch_enabled
                         
-                        # RU: Проверяем системное сканирование
-                        is_system_scan = _is_system_scanning()
+                            # RU: Проверяем системное сканирование
+                            is_system_scan = _is_system_scanning()
                         
-                        if _auto_cache_enabled and not is_system_scan:
-                            if _autopatch_enabled:
-                                # RED режим (11) - копируем при cache miss
-                                target_cache_path = str(cache_path_obj) if cache_path_obj else str(_settings.root / folder_name / filename)
-                                _schedule_copy_task(folder_name, filename, original_path, target_cache_path)
-                                if _settings.verbose:
-                                    print(f"[ArenaAutoCache] ⏳ Cache MISS (RED mode): {folder_name}/{filename} - scheduled copy from NAS")
+                            if _auto_cache_enabled and not is_system_scan:
+                                if _autopatch_enabled:
+                                    # RED режим (11) - копируем при cache miss
+                                    target_cache_path = str(cache_path_obj) if cache_path_obj else str(_settings.root / folder_name / filename)
+                                    _schedule_copy_task(folder_name, filename, original_path, target_cache_path)
+                                    if _settings.verbose:
+                                        print(f"[ArenaAutoCache] ⏳ Cache MISS (RED mode): {folder_name}/{filename} - scheduled copy from NAS")
+                                    # RU: Короткий ETA - ждем копию и грузим с SSD, чтобы NAS читался один раз
+                                    if _wait_for_copy(folder_name, filename, target_cache_path):
+                                        result = "miss_waited"
+                                        resolved_path = target_cache_path
+                                        return target_cache_path
+                                else:
+                                    # GREEN режим (10) - НЕ копируем при cache miss
+                                    if _settings.verbose:
+                                        print(f"[ArenaAutoCache] ⏭️ Cache MISS (GREEN mode): {folder_name}/{filename} - using NAS (no copy)")
+                                result = "miss"
                             else:
-                                # GREEN режим (10) - НЕ копируем при cache miss
                                 if _settings.verbose:
-                                    print(f"[ArenaAutoCache] ⏭️ Cache MISS (GREEN mode): {folder_name}/{filename} - using NAS (no copy)")
-                        else:
-                            if _settings.verbose:
-                                print(f"[ArenaAutoCache] ⚪ Cache disabled or system scan: {folder_name}/{filename}")
-                        return original_path
-                except Exception as e:
-                    if _settings.verbose:
-                        print(f"[ArenaAutoCache] Error getting original path: {e}")
+                                    print(f"[ArenaAutoCache] ⚪ Cache disabled or system scan: {folder_name}/{filename}")
+                                # RU: Не промах кеша - сканирование списков/выключенный кеш не портят hit ratio
+                                result = "bypass"
+                            resolved_path = original_path
+                            return original_path
+                    except Exception as e:
+                        if _settings.verbose:
+                            print(f"[ArenaAutoCache] Error getting original path: {e}")
 
-            # RU: Для неэффективных категорий используем оригинальную функцию
-            return original_get_full_path(folder_name, filename)
+                # RU: Для неэффективных категорий используем оригинальную функцию
+                return original_get_full_path(folder_name, filename)
+            finally:
+                _record_resolve(folder_name, filename, result, time.perf_counter() - started, resolved_path)
 
         # RU: Применяем патчи
         folder_paths.get_folder_paths = patched_get_folder_paths
@@ -494,6 +641,49 @@ def _apply_folder_paths_patch():
         print(f"[ArenaAutoCache] Error applying folder_paths patch: {e}")
 
 
+def _record_resolve(category: str, filename: str, result: str, elapsed_s: float, path: str = None) -> None:
+    """RU: Учитывает вызов get_full_path в метриках (/arena/metrics) и журнале событий.
+
+    result: hit | miss | miss_waited (промах, загрузка с SSD после ожидания копии) |
+    bypass (кеш выключен или системное сканирование) | passthrough (категория не кешируется / файл не найден).
+    """
+    arena_metrics.RESOLVER_CALLS.inc(result)
+    arena_metrics.RESOLVER_LATENCY.observe(elapsed_s, result)
+    if result == "hit":
+        arena_metrics.CACHE_HITS.inc(category)
+    elif result in ("miss", "miss_waited"):
+        arena_metrics.CACHE_MISSES.inc(category)
+    if EVENT_LOG.enabled:
+        # RU: bypass и passthrough пишутся как "resolve"
+        event = "miss" if result == "miss_waited" else result if result in ("hit", "miss") else "resolve"
+        # RU: Размер считает поток журнала (size_path), резолвер не делает лишний stat
+        _emit_event(event, f"{category}/{filename}", latency_ms=elapsed_s * 1000.0, size_path=path, path=path,
+                    result=result)
+
+
+def _record_copy_job(job) -> None:
+    """RU: Учитывает завершенную копию в метриках (длительность, скорость, байты) и журнале событий."""
+    if job is None:
+        return  # RU: Задача уже была завершена ранее
+    arena_metrics.COPY_JOBS.inc(job.get("state", ""))
+    duration = (job.get("finished_at") or 0) - (job.get("started_at") or 0)
+    _emit_event(
+        "copy_end",
+        f"{job.get('category')}/{job.get('filename')}",
+        size=job.get("bytes_total") or None,
+        latency_ms=duration * 1000.0 if job.get("started_at") else None,
+        state=job.get("state"),
+        error=job.get("error") or None,
+        job_id=job.get("job_id"),
+    )
+    if job.get("state") != "done":
+        return
+    arena_metrics.COPY_BYTES.inc(amount=job.get("bytes_done", 0))
+    if duration > 0:
+        arena_metrics.COPY_DURATION.observe(duration)
+        arena_metrics.COPY_THROUGHPUT.observe(job.get("bytes_done", 0) / duration)
+
+
 def _is_system_scanning() -> bool:
     """RU: Детектирует что это НЕ реальная загрузка модели, а сканирование/листинг.
     
@@ -629,71 +819,103 @@ def _has_active_arena_nodes() -> bool:
 
 def _reload_settings_if_needed():
     """RU: Перезагружает настройки если .env файл изменился."""
-    global _settings
-    
     if not _settings:
         return
-        
-    # RU: Проверяем, есть ли .env файл сейчас
-    comfy_root = _find_comfy_root()
-    if not comfy_root:
+
+    # RU: Если наблюдатель запущен, снимок .env и так актуален
+    if _env_watcher is not None and _env_watcher.running:
         return
-        
-    # RU: Основной путь для .env файла
-    env_file = comfy_root / "user" / "arena_autocache.env"
-    
-    # RU: Fallback для ComfyUI Desktop - поиск в AppData
-    if not env_file.exists():
-        appdata_path = Path(os.environ.get("APPDATA", "")) / "ComfyUI" / "logs" / "arena_autocache.env"
-        if appdata_path.exists():
-            env_file = appdata_path
-    
-    # RU: Если .env файл появился или обновился, перезагружаем настройки
-    if env_file.exists():
-        print("[ArenaAutoCache] .env file detected, reloading settings...")
-        _load_env_file()
-        
-        # RU: Перезагружаем настройки с учетом .env файла
-        cache_root = os.environ.get("ARENA_CACHE_ROOT", "")
-        min_size_mb = float(os.environ.get("ARENA_CACHE_MIN_SIZE_MB", "10.0"))
-        max_cache_gb = float(os.environ.get("ARENA_CACHE_MAX_GB", "512.0"))
-        verbose = os.environ.get("ARENA_CACHE_VERBOSE", "false").lower() in ("true", "1", "yes")
-        
-        if cache_root:
-            _settings = CacheSettings(
-                root=Path(cache_root),
-                min_size_mb=min_size_mb,
-                max_cache_gb=max_cache_gb,
-                verbose=verbose,
-                effective_categories=_settings.effective_categories
-            )
-            print(f"[ArenaAutoCache] Settings reloaded from .env: {cache_root}")
 
+    # RU: Снимок применяется только если содержимое файла отличается от текущего
+    if _resolve_env_file():
+        _on_env_file_changed()
 
-def _copy_file_with_progress(source_path: str, dest_path: str, total_size: int):
-    """RU: Копирует файл с отслеживанием прогресса для UI индикатора."""
-    global _copy_status
-    
-    # RU: Размер блока для чтения (1MB)
-    chunk_size = 1024 * 1024
-    
-    with open(source_path, 'rb') as src, open(dest_path, 'wb') as dst:
-        copied = 0
-        while True:
-            chunk = src.read(chunk_size)
-            if not chunk:
+
+def _copy_file_with_progress(source_path: str, dest_path: str, total_size: int, job_id: int, hasher=None):
+    """RU: Копирует файл с отслеживанием прогресса для UI индикатора (hasher - дайджест на лету)."""
+    def _on_progress(copied: int):
+        # RU: Обновляем прогресс задачи в реестре
+        _copy_jobs.advance(job_id, copied)
+
+        # RU: Push-уведомление UI (коалесцируется до ARENA_COPY_EVENT_INTERVAL_MS) с полной записью задачи из реестра
+        _copy_events.progress(job_id, lambda: _copy_jobs.get(job_id), _copy_jobs.snapshot)
+
+    with open(source_path, 'rb') as src:
+        copy_stream(src, dest_path, total_size, _copy_options(), _on_progress, hasher)
+
+
+def _copy_options() -> CopyOptions:
+    """RU: Параметры записи .part: резерв места, сброс окон из page cache, O_DIRECT (см. arena_copy_io)."""
+    return CopyOptions(
+        preallocate=get_env_default("ARENA_COPY_PREALLOCATE", True, bool),
+        drop_cache=get_env_default("ARENA_COPY_DROP_CACHE", True, bool),
+        direct=get_env_default("ARENA_COPY_DIRECT", False, bool),
+    )
+
+
+def _enqueue_copy(category: str, filename: str, source_path: str, cache_path: str) -> bool:
+    """RU: Ставит копирование в очередь с дедупликацией и регистрацией задачи в реестре."""
+    with _scheduled_lock:
+        task_key = (category, filename)
+        if task_key in _scheduled_tasks:
+            return False
+        _scheduled_tasks.add(task_key)
+
+    try:
+        size = _source_size(source_path)
+    except OSError:
+        size = 0
+    job_id = _copy_jobs.enqueue(category, filename, source_path, cache_path, size)
+    _copy_queue.put((category, filename, source_path, cache_path, job_id))
+    return True
+
+
+def _wait_for_copy(category: str, filename: str, cache_path: str) -> bool:
+    """RU: Блокирует загрузчик на копировании, если оно успеет за ARENA_CACHE_MISS_WAIT_S (по умолчанию 0 - выключено).
+
+    Иначе загрузчик читал бы NAS параллельно с копией (двойное чтение). ETA пересчитывается
+    по ходу копии из измеренной скорости; если он перестает укладываться в остаток времени,
+    возвращаем False и загрузчик идет на NAS. True - файл уже лежит в кеше по cache_path.
+    """
+    # RU: Опционально: ожидание блокирует поток загрузчика ComfyUI, поэтому по умолчанию сразу идем на NAS
+    max_wait = get_env_default("ARENA_CACHE_MISS_WAIT_S", 0.0, float)
+    if max_wait <= 0:
+        return False
+    job_id = _copy_jobs.find(category, filename)
+    if job_id is None:
+        # RU: Копия не поставлена (фильтры планировщика) или уже завершилась
+        return os.path.exists(cache_path)
+
+    started = time.monotonic()
+    deadline = started + max_wait
+    while True:
+        remaining = deadline - time.monotonic()
+        eta = _copy_jobs.eta_for(job_id)
+        if eta is None:
+            # RU: Скорость еще не измерена (первая копия) - даем ей пару секунд показать себя
+            if time.monotonic() - started > min(2.0, max_wait):
                 break
-                
-            dst.write(chunk)
-            copied += len(chunk)
-            
-            # RU: Обновляем прогресс
-            progress = int((copied / total_size) * 100)
-            _copy_status["current_file_copied"] = copied
-            _copy_status["current_file_progress"] = progress
-            _copy_status["last_update"] = time.time()
+            step = 0.25
+        elif eta > remaining:
+            if _settings and _settings.verbose:
+                print(f"[ArenaAutoCache] Copy ETA {eta:.1f}s > {remaining:.1f}s, loading {filename} from NAS")
+            break
+        else:
+            step = min(1.0, remaining)
+        job = _copy_jobs.wait(job_id, step)
+        if job is not None:
+            served = os.path.exists(cache_path)
+            arena_metrics.MISS_WAITS.inc("cache" if served else "nas")
+            if served and _settings and _settings.verbose:
+                print(f"[ArenaAutoCache] Waited {time.monotonic() - started:.1f}s for copy, loading {filename} from cache")
+            return served
+        if time.monotonic() >= deadline:
+            break
+    arena_metrics.MISS_WAITS.inc("nas")
+    return False
 
 
+@PROFILER.profiled("schedule_copy_task")
 def _schedule_copy_task(category: str, filename: str, source_path: str, cache_path: str):
     """RU: Планирует задачу копирования с дедупликацией и фильтрацией."""
     global _last_copy_time
@@ -744,27 +966,20 @@ def _schedule_copy_task(category: str, filename: str, source_path: str, cache_pa
     # RU: Обновляем время последнего копирования
     _last_copy_time = time.time()
     
-    with _scheduled_lock:
-        task_key = (category, filename)
-        if task_key in _scheduled_tasks:
-            return
-        _scheduled_tasks.add(task_key)
+    if not _enqueue_copy(category, filename, source_path, cache_path):
+        return
 
-    _copy_queue.put((category, filename, source_path, cache_path))
     if _settings.verbose:
         print(f"[ArenaAutoCache] Scheduled cache copy: {filename}")
 
 
 def _copy_worker():
     """RU: Фоновый воркер для копирования файлов."""
-    global _copy_status
+    worker_name = threading.current_thread().name
 
     while True:
         try:
-            category, filename, source_path, cache_path = _copy_queue.get()
-
-            _copy_status["current_file"] = filename
-            _copy_status["total_jobs"] += 1
+            category, filename, source_path, cache_path, job_id = _copy_queue.get()
 
             try:
                 # RU: Проверяем размер файла
@@ -774,58 +989,92 @@ def _copy_worker():
                         print(
                             f"[ArenaAutoCache] Skipping {filename}: too small ({source_size / 1024 / 1024:.1f}MB)"
                         )
-                    _copy_queue.task_done()
-                    with _scheduled_lock:
-                        _scheduled_tasks.discard((category, filename))
+                    _record_copy_job(_copy_jobs.skip(job_id, "too small"))
                     continue
 
-                # RU: Проверяем, не существует ли уже в кэше
-                if os.path.exists(cache_path):
-                    if _settings.verbose:
-                        print(f"[ArenaAutoCache] Already cached: {filename}")
-                    _copy_queue.task_done()
-                    with _scheduled_lock:
-                        _scheduled_tasks.discard((category, filename))
+                # RU: Межпроцессная блокировка модели: копирует только один процесс, остальные ждут его
+                copy_lock, waited = _acquire_copy_lock(cache_path, filename)
+                if copy_lock is False:
+                    _record_copy_job(_copy_jobs.skip(job_id, "copy in progress in another process"))
                     continue
 
-                # RU: Создаем папку кэша
-                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
-
-                # RU: Копируем файл с отслеживанием прогресса
-                # RU: cache_path может быть строкой или Path, конвертируем в Path для работы с .with_suffix
-                from pathlib import Path
-                cache_path_obj = Path(cache_path) if isinstance(cache_path, str) else cache_path
-                temp_path = cache_path_obj.with_suffix(cache_path_obj.suffix + ".part")
-                
-                # RU: Устанавливаем флаг копирования и размер файла
-                _copy_status["is_copying"] = True
-                _copy_status["current_file_size"] = source_size
-                _copy_status["current_file_copied"] = 0
-                _copy_status["current_file_progress"] = 0
-                _copy_status["last_update"] = time.time()
-                
-                # RU: Копируем с отслеживанием прогресса
-                _copy_file_with_progress(source_path, str(temp_path), source_size)
-                os.rename(str(temp_path), str(cache_path))
-                
-                # RU: Сбрасываем флаг копирования
-                _copy_status["is_copying"] = False
-
-                _copy_status["completed_jobs"] += 1
-                if _settings.verbose:
-                    print(f"[ArenaAutoCache] Cached: {filename}")
+                try:
+                    # RU: Проверяем, не существует ли уже в кэше (в т.ч. скопирован другим процессом)
+                    if os.path.exists(cache_path):
+                        if _settings.verbose:
+                            print(f"[ArenaAutoCache] Already cached: {filename}")
+                        reason = "copied by another process" if waited else "already cached"
+                        _record_copy_job(_copy_jobs.skip(job_id, reason))
+                        continue
+
+                    # RU: Этот исходник уже лежит в хранилище под другим именем - только жесткая ссылка
+                    store = _get_blob_store()
+                    blob = store.lookup(source_path) if store is not None else None
+                    if blob is not None:
+                        store.link(blob, cache_path)
+                        _record_copy_job(_copy_jobs.skip(job_id, "linked to existing blob"))
+                        arena_metrics.DEDUP_BYTES.inc(amount=source_size)
+                        _get_cache_index().add(cache_path, source_size, file_id(os.stat(cache_path)))
+                        if _settings.verbose:
+                            print(f"[ArenaAutoCache] Linked {filename} to existing blob {blob.name[:12]}")
+                        continue
+
+                    # RU: Создаем папку кэша
+                    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+
+                    # RU: Копируем файл с отслеживанием прогресса
+                    # RU: cache_path может быть строкой или Path, конвертируем в Path для работы с .with_suffix
+                    cache_path_obj = Path(cache_path) if isinstance(cache_path, str) else cache_path
+                    temp_path = cache_path_obj.with_suffix(cache_path_obj.suffix + ".part")
+                    
+                    job = _copy_jobs.start(job_id, worker_name, source_size)
+                    _copy_events.publish("start", job, _copy_jobs.snapshot())
+                    _emit_event("copy_start", f"{category}/{filename}", size=source_size, job_id=job_id, worker=worker_name)
+                    
+                    # RU: Копируем с отслеживанием прогресса
+                    hasher = new_hasher() if store is not None else None
+                    _copy_file_with_progress(source_path, str(temp_path), source_size, job_id, hasher)
+                    fid = None
+                    if store is not None:
+                        digest = hasher.hexdigest()
+                        blob, created = store.ingest(temp_path, digest)
+                        store.link(blob, cache_path)
+                        store.remember(source_path, digest)
+                        fid = file_id(os.stat(cache_path))
+                        if not created:
+                            # RU: Другой файл NAS с тем же содержимым - копия отброшена, место не занято
+                            arena_metrics.DEDUP_BYTES.inc(amount=source_size)
+                            if _settings.verbose:
+                                print(f"[ArenaAutoCache] {filename} has the same content as blob {digest[:12]}, deduplicated")
+                    else:
+                        os.replace(str(temp_path), str(cache_path))
+                    
+                    job = _copy_jobs.finish(job_id)
+                    _record_copy_job(job)
+                    _copy_events.publish("complete", job, _copy_jobs.snapshot())
+                    _get_cache_index().add(cache_path, source_size, fid)
+                    if _settings.verbose:
+                        print(f"[ArenaAutoCache] Cached: {filename}")
+                finally:
+                    if copy_lock:
+                        copy_lock.release()
 
                 # RU: Проверяем размер кэша и очищаем при необходимости
                 _prune_cache_if_needed()
 
             except Exception as e:
-                _copy_status["failed_jobs"] += 1
+                # RU: Задача могла уже завершиться (ошибка после finish/skip) - тогда fail вернет None
+                job = _copy_jobs.fail(job_id, str(e))
+                if job is not None:
+                    _record_copy_job(job)
+                    _copy_events.publish("fail", job, _copy_jobs.snapshot())
                 if _settings.verbose:
                     print(f"[ArenaAutoCache] Error caching {filename}: {e}")
-
-            _copy_queue.task_done()
-            with _scheduled_lock:
-                _scheduled_tasks.discard((category, filename))
+            finally:
+                # RU: Всегда закрываем задачу очереди, иначе модель больше не планируется, а join() зависает
+                _copy_queue.task_done()
+                with _scheduled_lock:
+                    _scheduled_tasks.discard((category, filename))
 
         except Exception as e:
             if _settings and _settings.verbose:
@@ -836,6 +1085,103 @@ def _copy_worker():
 # RU: Функция _eager_cache_all_models удалена - режим eager опасен для дискового пространства
 
 
+def _shared_cache_enabled() -> bool:
+    """RU: Координация между процессами на общем корне кеша (ARENA_CACHE_SHARED, по умолчанию включена)."""
+    return os.environ.get("ARENA_CACHE_SHARED", "1").lower() in ("true", "1", "yes")
+
+
+def _acquire_copy_lock(cache_path: str, filename: str):
+    """RU: Берет межпроцессную блокировку модели; ждет, если ее копирует другой процесс.
+
+    Возвращает (lock, waited): lock=None - координация выключена/не поддерживается ФС,
+    lock=False - не дождались другого процесса за ARENA_COPY_WAIT_TIMEOUT_S.
+    """
+    if not _shared_cache_enabled():
+        return None, False
+    lock = model_lock(_settings.root, cache_path)
+    try:
+        if lock.acquire(timeout=0):
+            return lock, False
+        if _settings.verbose:
+            print(f"[ArenaAutoCache] Waiting for another process copying {filename}")
+        wait_s = get_env_default("ARENA_COPY_WAIT_TIMEOUT_S", 1800.0, float)
+        return (lock if lock.acquire(timeout=wait_s) else False), True
+    except OSError as e:
+        if _settings.verbose:
+            print(f"[ArenaAutoCache] Cross-process lock unavailable ({e}), copying without it")
+        return None, False
+
+
+def _get_evictor():
+    """RU: Выборы evictor'а для текущего корня кеша (пересоздаются при смене корня)."""
+    global _evictor
+    with _evictor_lock:
+        if _evictor is None or _evictor.root != _settings.root:
+            if _evictor is not None:
+                _evictor.resign()
+            _evictor = EvictorElection(_settings.root)
+        return _evictor
+
+
+def _ensure_evictor_thread():
+    """RU: Периодическая проверка лимита: evictor чистит и место, занятое копиями других процессов."""
+    global _evictor_thread_started
+    with _evictor_lock:
+        if _evictor_thread_started:
+            return
+        _evictor_thread_started = True
+
+    def _loop():
+        while True:
+            time.sleep(max(5.0, get_env_default("ARENA_EVICT_INTERVAL_S", 60.0, float)))
+            if _settings and _settings.max_cache_gb > 0:
+                _prune_cache_if_needed()
+
+    threading.Thread(target=_loop, daemon=True, name="ArenaEvictor").start()
+
+
+def _get_blob_store():
+    """RU: Хранилище blob'ов для текущего корня, если включено ARENA_CACHE_DEDUP и ФС умеет жесткие ссылки."""
+    global _blob_store
+    if not get_env_default("ARENA_CACHE_DEDUP", False, bool):
+        return None
+    with _blob_store_lock:
+        if _blob_store is None or _blob_store.root != _settings.root:
+            _blob_store = BlobStore(_settings.root)
+            if not _blob_store.supported():
+                print(f"[ArenaAutoCache] Hardlinks not supported under {_settings.root}, ARENA_CACHE_DEDUP ignored")
+        return _blob_store if _blob_store.supported() else None
+
+
+def _cache_file_groups() -> list[dict]:
+    """RU: Файлы кеша, сгруппированные по inode: {size, mtime, nlink, names, blobs}.
+
+    Имена в категориях, указывающие на один blob, дают одну группу; blob без имен - группу без names.
+    Обходятся все папки категорий под корнем (не только effective_categories: после рестарта
+    категории из воркфлоу забыты, а их имена все еще ссылаются на blob'ы).
+    """
+    groups: dict = {}
+
+    def _add(file_path: Path, st, is_blob: bool):
+        fid = file_id(st) or str(file_path)
+        group = groups.get(fid)
+        if group is None:
+            group = groups[fid] = {"size": st.st_size, "mtime": st.st_mtime, "nlink": st.st_nlink, "names": [], "blobs": []}
+        group["blobs" if is_blob else "names"].append(file_path)
+
+    # RU: Служебные папки (.arena_blobs, .arena_locks) начинаются с точки
+    for category_path in _settings.root.iterdir():
+        if not category_path.is_dir() or category_path.name.startswith("."):
+            continue
+        for file_path in category_path.rglob("*"):
+            # RU: Незавершенные копии (.part) не трогаем
+            if file_path.is_file() and file_path.suffix != ".part":
+                _add(file_path, file_path.stat(), False)
+    for blob_path, st in BlobStore(_settings.root).iter_blobs():
+        _add(blob_path, st, True)
+    return list(groups.values())
+
+
 def _prune_cache_if_needed():
     """RU: Очищает кэш при превышении лимита (LRU)."""
     try:
@@ -843,24 +1189,29 @@ def _prune_cache_if_needed():
         if _settings.max_cache_gb <= 0:
             return
 
-        # RU: Получаем размер кэша (рекурсивно)
-        total_size = 0
-        all_files = []
+        # RU: При общем кеше чистит только выбранный процесс (evictor), остальные пропускают
+        if _shared_cache_enabled():
+            _ensure_evictor_thread()
+            if not _get_evictor().is_leader():
+                return
 
-        for category in _settings.effective_categories:
-            category_path = _settings.root / category
-            if category_path.exists():
-                for file_path in category_path.rglob("*"):
-                    if file_path.is_file():
-                        size = file_path.stat().st_size
-                        total_size += size
-                        all_files.append((file_path, size, file_path.stat().st_mtime))
+        # RU: Быстрая проверка по индексу (общему через .arena_index.json): ниже лимита дерево не обходим.
+        # RU: Жесткие ссылки на один blob индекс считает один раз; blob'ы без имен (имена удалены вручную)
+        # RU: он не видит - они освобождаются при первой чистке, вызванной превышением лимита
+        max_size_bytes = _settings.max_cache_gb * 1024 * 1024 * 1024
+        index = _get_cache_index()
+        if index is not None and index.stats()["bytes"] <= max_size_bytes:
+            return
+
+        # RU: Получаем размер кэша (рекурсивно). Жесткие ссылки на один blob - одна запись:
+        # RU: место освобождается только когда удалены все имена и сам blob
+        groups = _cache_file_groups()
+        total_size = sum(group["size"] for group in groups)
 
         # RU: Проверяем лимит
-        max_size_bytes = _settings.max_cache_gb * 1024 * 1024 * 1024
         if total_size > max_size_bytes:
-            # RU: Сортируем по времени модификации (LRU)
-            all_files.sort(key=lambda x: x[2])
+            # RU: Сначала blob'ы без имен (на них никто не ссылается), затем LRU по времени модификации
+            groups.sort(key=lambda group: (bool(group["names"]), group["mtime"]))
 
             # RU: Удаляем файлы до 95% лимита
             target_size = max_size_bytes * 0.95
@@ -868,20 +1219,48 @@ def _prune_cache_if_needed():
             pruned_files = 0
             freed_bytes = 0
 
-            for file_path, size, _ in all_files:
+            for group in groups:
                 if current_size <= target_size:
                     break
+                # RU: Есть жесткие ссылки вне обойденных папок - удаление не освободит место
+                if group["nlink"] > len(group["names"]) + len(group["blobs"]):
+                    continue
 
+                # RU: Модель, которую сейчас копирует (перезаписывает) любой процесс, не вытесняем
+                file_locks = []
+                if _shared_cache_enabled():
+                    for file_path in group["names"]:
+                        file_lock = model_lock(_settings.root, file_path)
+                        if not file_lock.acquire(timeout=0):
+                            break
+                        file_locks.append(file_lock)
+                    if len(file_locks) != len(group["names"]):
+                        for file_lock in file_locks:
+                            file_lock.release()
+                        continue
+                size = group["size"]
+                label = group["names"][0] if group["names"] else group["blobs"][0]
                 try:
-                    file_path.unlink()
+                    for file_path in group["names"]:
+                        file_path.unlink()
+                        _get_cache_index().remove(file_path)
+                    for blob_path in group["blobs"]:
+                        blob_path.unlink()
                     current_size -= size
                     pruned_files += 1
                     freed_bytes += size
+                    arena_metrics.EVICTIONS.inc()
+                    arena_metrics.EVICTED_BYTES.inc(amount=size)
+                    category = label.relative_to(_settings.root).parts[0]
+                    _emit_event("evict", f"{category}/{label.name}", size=size, path=str(label), refs=len(group["names"]))
                     if _settings.verbose:
-                        print(f"[ArenaAutoCache] Pruned: {file_path.name}")
+                        print(f"[ArenaAutoCache] Pruned: {label.name}")
                 except Exception as e:
                     if _settings.verbose:
-                        print(f"[ArenaAutoCache] Error pruning {file_path.name}: {e}")
+                        print(f"[ArenaAutoCache] Error pruning {label.name}: {e}")
+                finally:
+                    for file_lock in file_locks:
+                        file_lock.release()
 
             # RU: Summary лог для prune
             if pruned_files > 0:
@@ -1066,14 +1445,19 @@ def _clear_cache_folder():
             if len(cache_path.parts) < 3:
                 return "Clear aborted: drive root or path too shallow"
 
-        # RU: Подсчитываем размер перед очисткой (рекурсивно)
+        # RU: Подсчитываем размер перед очисткой (рекурсивно, жесткие ссылки - один раз)
         total_size = 0
+        seen_ids = set()
         for category in _settings.effective_categories:
             category_path = _settings.root / category
             if category_path.exists():
                 for file_path in category_path.rglob("*"):
                     if file_path.is_file():
-                        total_size += file_path.stat().st_size
+                        st = file_path.stat()
+                        fid = file_id(st) or str(file_path)
+                        if fid not in seen_ids:
+                            seen_ids.add(fid)
+                            total_size += st.st_size
 
         # RU: Очищаем только эффективные категории (рекурсивно)
         for category in _settings.effective_categories:
@@ -1087,6 +1471,11 @@ def _clear_cache_folder():
         for category in _settings.effective_categories:
             (_settings.root / category).mkdir(exist_ok=True)
 
+        # RU: Blob'ы, на которые больше не ссылается ни одно имя (ARENA_CACHE_DEDUP)
+        BlobStore(_settings.root).collect_orphans()
+
+        _get_cache_index().rebuild()
+
         freed_mb = total_size / 1024 / 1024
         result = f"Cache cleared: {freed_mb:.1f} MB freed"
         print(f"[ArenaAutoCache] {result}")
@@ -1197,44 +1586,49 @@ def _clear_workflow_models():
         print("[ArenaAutoCache] Cleared workflow models")
 
 
+def _on_env_file_changed():
+    """RU: Callback наблюдателя: перечитывает .env целиком и применяет снимок атомарно."""
+    env_file = _resolve_env_file()
+    try:
+        snapshot = _read_env_file(env_file) if env_file else {}
+    except Exception as e:
+        # RU: Файл в процессе записи или битый - оставляем предыдущие настройки
+        print(f"[ArenaAutoCache] Failed to read .env, keeping previous settings: {e}")
+        return
+    if snapshot == _env_snapshot:
+        return
+    print("[ArenaAutoCache] .env file changed, reloading...")
+    _apply_env_snapshot(snapshot)
+
+
 def _start_env_watcher():
-    """RU: Запускает фоновый наблюдатель .env файла."""
-    global _env_watcher_thread, _env_watcher_running
-    
-    if _env_watcher_running:
+    """RU: Запускает фоновый наблюдатель .env файла (inotify на Linux, иначе polling с backoff)."""
+    global _env_watcher
+
+    if _env_watcher is not None and _env_watcher.running:
+        return
+
+    candidates = _env_file_candidates()
+    if not candidates:
+        print("[ArenaAutoCache] ComfyUI root not found, .env watcher not started")
         return
-    
-    _env_watcher_running = True
-    
-    def watcher_worker():
-        global _env_file_mtime
-        while _env_watcher_running:
-            try:
-                comfy_root = _find_comfy_root()
-                if comfy_root:
-                    env_file = comfy_root / "user" / "arena_autocache.env"
-                    if env_file.exists():
-                        current_mtime = env_file.stat().st_mtime
-                        if current_mtime != _env_file_mtime:
-                            _env_file_mtime = current_mtime
-                            print("[ArenaAutoCache] .env file changed, reloading...")
-                            _load_env_file()
-                            # RU: Здесь можно добавить уведомление фронтенда
-                time.sleep(1.0)  # RU: Проверяем каждую секунду
-            except Exception as e:
-                if _env_watcher_running:
-                    print(f"[ArenaAutoCache] Env watcher error: {e}")
-                time.sleep(1.0)
-    
-    _env_watcher_thread = threading.Thread(target=watcher_worker, daemon=True)
-    _env_watcher_thread.start()
-    print("[ArenaAutoCache] Started .env file watcher")
+
+    from autocache.arena_env_watcher import EnvFileWatcher, debounce_from_env
+
+    # RU: Путь резолвится один раз при старте, а не на каждой итерации
+    env_file = _resolve_env_file() or candidates[0]
+    _env_watcher = EnvFileWatcher(env_file, _on_env_file_changed, debounce_s=debounce_from_env())
+    _env_watcher.start()
+    print(f"[ArenaAutoCache] Started .env file watcher ({_env_watcher.backend}): {env_file}")
 
 
 def _stop_env_watcher():
     """RU: Останавливает фоновый наблюдатель .env файла."""
-    global _env_watcher_running
-    _env_watcher_running = False
+    global _env_watcher
+    if _env_watcher is None:
+        return
+    _env_watcher.stop()
+    _env_watcher = None
     print("[ArenaAutoCache] Stopped .env file watcher")
 
 
@@ -1362,22 +1756,27 @@ def _detect_model_type(category: str, filename: str) -> str:
     return 'Other'
 
 
-def _get_cache_path(category: str, filename: str) -> Path:
-    """RU: Получает путь к кешированной модели с сортировкой по типам."""
-    if not _settings:
-        return None
-    
+def _cache_path_candidates(category: str, filename: str) -> tuple[Path, Path]:
+    """RU: Чистое вычисление путей кеша без обращений к ФС: (путь с подпапкой типа, старый путь без нее)."""
     # RU: Извлекаем только имя файла без подпути для определения типа
     filename_only = os.path.basename(filename)
     
     # RU: Определяем тип модели для создания подпапки
     model_type = _detect_model_type(category, filename_only)
     
+    return _settings.root / category / model_type / filename, _settings.root / category / filename
+
+
+@PROFILER.profiled("get_cache_path")
+def _get_cache_path(category: str, filename: str) -> Path:
+    """RU: Получает путь к кешированной модели с сортировкой по типам."""
+    if not _settings:
+        return None
+    
     # RU: Создаем путь с подпапкой типа модели
-    cache_path = _settings.root / category / model_type / filename
+    cache_path, old_cache_path = _cache_path_candidates(category, filename)
     
     # RU: Проверяем обратную совместимость - если модель уже существует в старом месте
-    old_cache_path = _settings.root / category / filename
     if old_cache_path.exists() and not cache_path.exists():
         if _settings.verbose:
             print(f"[ArenaAutoCache] Found existing model in old location: {old_cache_path}")
@@ -1389,6 +1788,32 @@ def _get_cache_path(category: str, filename: str) -> Path:
     return cache_path
 
 
+def _get_cache_index():
+    """RU: Возвращает in-memory индекс кеша для текущего корня (пересоздается при смене корня)."""
+    global _cache_index
+    if not _settings:
+        return None
+    with _cache_index_lock:
+        if _cache_index is None or _cache_index.root != _settings.root:
+            max_age_s = get_env_default("ARENA_CACHE_INDEX_MAX_AGE_S", 300.0, float)
+            shared = SharedIndex(_settings.root) if _shared_cache_enabled() else None
+            _cache_index = CacheIndex(_settings.root, max_age_s=max_age_s, shared=shared)
+        return _cache_index
+
+
+def _lookup_cached(category: str, filename: str) -> tuple[Path, int]:
+    """RU: Ищет модель в индексе кеша по той же схеме путей, что и резолвер; возвращает (путь, размер) или (путь, None)."""
+    index = _get_cache_index()
+    cache_path, old_cache_path = _cache_path_candidates(category, filename)
+    size = index.size_of(cache_path)
+    if size is not None:
+        return cache_path, size
+    old_size = index.size_of(old_cache_path)
+    if old_size is not None:
+        return old_cache_path, old_size
+    return cache_path, None
+
+
 def _activate_workflow_analysis():
     """RU: Активирует анализ workflow для автоматического определения моделей."""
     try:
@@ -1472,6 +1897,403 @@ def _auto_extend_categories_from_workflow():
 # RU: Теперь модели копируются только при реальной загрузке через load_checkpoint/load_lora.
 
 
+# RU: Выделенный ограниченный пул для блокирующей ФС-работы aiohttp обработчиков
+_fs_executor = None
+_fs_executor_lock = threading.Lock()
+
+
+def _get_fs_executor():
+    """RU: Лениво создает пул потоков для ФС-операций (ARENA_FS_EXECUTOR_WORKERS, по умолчанию 4)."""
+    global _fs_executor
+    with _fs_executor_lock:
+        if _fs_executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            workers = get_env_default("ARENA_FS_EXECUTOR_WORKERS", 4, int)
+            _fs_executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="ArenaFS")
+        return _fs_executor
+
+
+async def _run_blocking_fs(func, *args):
+    """RU: Выполняет блокирующую функцию в ФС-пуле с таймаутом ARENA_FS_TIMEOUT_S (по умолчанию 30).
+
+    При таймауте бросает asyncio.TimeoutError; сама операция в потоке продолжает выполняться,
+    но event loop ComfyUI освобождается сразу.
+    """
+    loop = asyncio.get_running_loop()
+    timeout_s = get_env_default("ARENA_FS_TIMEOUT_S", 30.0, float)
+    return await asyncio.wait_for(loop.run_in_executor(_get_fs_executor(), func, *args), timeout_s)
+
+
+def _fs_timeout_response(web, what: str):
+    """RU: Единый ответ обработчика при превышении таймаута ФС-операции."""
+    print(f"[ArenaAutoCache] {what} timed out (slow NAS?)")
+    return web.json_response({"status": "error", "code": "FS_TIMEOUT", "message": f"{what} timed out"})
+
+
+def _prefetch_models(models: list[dict]) -> int:
+    """RU: Ставит модели workflow в очередь копирования (блокирующая ФС-работа, выполняется в executor)."""
+    # RU: Планируем копирование ВСЕХ моделей сразу
+    prefetched = 0
+    for model_info in models:
+        try:
+            category = model_info.get('category', 'checkpoints')
+            filename = model_info.get('filename', '')
+
+            if not filename:
+                continue
+
+            # RU: Проверяем кеш
+            cache_path_obj = _get_cache_path(category, filename)
+            if cache_path_obj and cache_path_obj.exists():
+                print(f"[ArenaAutoCache] Already cached: {filename}")
+                continue
+
+            # RU: Получаем оригинальный путь
+            try:
+                import folder_paths
+                original_path = folder_paths.get_full_path_origin(category, filename)
+                if original_path and os.path.exists(original_path):
+                    target_cache_path = str(cache_path_obj) if cache_path_obj else str(_settings.root / category / filename)
+                    if _enqueue_copy(category, filename, original_path, target_cache_path):
+                        prefetched += 1
+                        print(f"[ArenaAutoCache] Prefetch scheduled: {category}/{filename}")
+            except Exception as e:
+                print(f"[ArenaAutoCache] Prefetch error for {filename}: {e}")
+
+        except Exception as e:
+            print(f"[ArenaAutoCache] Error processing model info: {e}")
+
+    print(f"[ArenaAutoCache] Prefetch: scheduled {prefetched}/{len(models)} models for caching")
+    return prefetched
+
+
+def _autopatch_process_models(required_models: list[dict]) -> tuple[int, int, list[str]]:
+    """RU: Проверяет required_models и ставит промахи в очередь (блокирующая ФС-работа, выполняется в executor)."""
+    cache_hits = 0
+    cache_misses = 0
+    not_found = []
+
+    print(f"[ArenaAutoCache] 📥 Received {len(required_models)} models from frontend:")
+
+    # RU: Проверяем каждую модель
+    for model in required_models:
+        category = model.get("category", "unknown")
+        filename = model.get("filename", "")
+        print(f"  - {category}/{filename}")
+
+        # RU: Проверяем существование модели через folder_paths
+        try:
+            import folder_paths
+
+            # RU: Нормализуем путь (replace backslash with forward slash)
+            filename_normalized = filename.replace('\\', '/')
+
+            # RU: ВАЖНО: folder_paths ожидает только имя файла БЕЗ подпапок
+            # Frontend может отправить "SUPIR\SUPIR-v0Q_fp16.safetensors"
+            # Нужно извлечь только "SUPIR-v0Q_fp16.safetensors"
+            filename_for_lookup = os.path.basename(filename_normalized)
+
+            if hasattr(folder_paths, 'get_full_path_origin'):
+                original_path = folder_paths.get_full_path_origin(category, filename_for_lookup)
+            else:
+                original_path = folder_paths.get_full_path(category, filename_for_lookup)
+
+            if original_path and os.path.exists(original_path):
+                # RU: Вычисляем cache path (используем только имя файла для определения типа)
+                filename_only = os.path.basename(filename_normalized)
+                model_type = _detect_model_type(category, filename_only)
+                # RU: КРИТИЧНО: используем filename_only вместо filename_normalized чтобы избежать двойных подпапок
+                cache_path = _settings.root / category / model_type / filename_only
+
+                if cache_path.exists():
+                    cache_hits += 1
+                    print(f"    ✅ Cache HIT: {cache_path}")
+                else:
+                    cache_misses += 1
+                    print(f"    ⏳ Cache MISS: will be copied from {original_path}")
+            else:
+                not_found.append(f"{category}/{filename_normalized}")
+                print(f"    ⚠️ Model NOT FOUND in folder_paths")
+        except Exception as e:
+            print(f"    ❌ Error checking model: {e}")
+
+    # RU: Добавляем в required_models
+    with _required_models_lock:
+        _required_models.update((m["category"], m["filename"]) for m in required_models)
+
+    # RU: НЕМЕДЛЕННО добавляем модели в очередь копирования для prefetch
+    print(f"[ArenaAutoCache] 🚀 Adding {cache_misses} models to copy queue for prefetch...")
+    for model in required_models:
+        category = model.get("category", "unknown")
+        filename = model.get("filename", "")
+        filename_normalized = filename.replace('\\', '/')
+
+        try:
+            import folder_paths
+
+            # RU: ВАЖНО: folder_paths ожидает только имя файла БЕЗ подпапок
+            filename_for_lookup = os.path.basename(filename_normalized)
+
+            # RU: УНИВЕРСАЛЬНЫЙ ПОИСК: сначала пробуем в указанной категории, потом во всех
+            original_path = None
+            if hasattr(folder_paths, 'get_full_path_origin'):
+                original_path = folder_paths.get_full_path_origin(category, filename_for_lookup)
+            else:
+                original_path = folder_paths.get_full_path(category, filename_for_lookup)
+
+            # RU: Если не найдено - пробуем ВСЕ категории (УНИВЕРСАЛЬНЫЙ ПОИСК)
+            if not original_path or not os.path.exists(original_path):
+                all_categories = ['checkpoints', 'loras', 'vae', 'clip', 'diffusion_models', 
+                                 'gguf_models', 'unet', 'controlnet', 'upscale_models', 'embeddings',
+                                 'text_encoders', 'clip_vision', 'style_models', 'gligen']
+                for fallback_cat in all_categories:
+                    try:
+                        # RU: Проверяем что категория существует в folder_paths
+                        if not hasattr(folder_paths, 'folder_names_and_paths'):
+                            continue
+                        if fallback_cat not in folder_paths.folder_names_and_paths:
+                            continue
+
+                        if hasattr(folder_paths, 'get_full_path_origin'):
+                            test_path = folder_paths.get_full_path_origin(fallback_cat, filename_for_lookup)
+                        else:
+                            test_path = folder_paths.get_full_path(fallback_cat, filename_for_lookup)
+
+                        if test_path and os.path.exists(test_path):
+                            original_path = test_path
+                            category = fallback_cat  # Обновляем категорию
+                            print(f"    🔍 Found in fallback category: {fallback_cat}/{filename_for_lookup}")
+                            break
+                    except Exception as ex:
+                        if _settings.verbose:
+                            print(f"    🔍 Fallback search failed for {fallback_cat}: {ex}")
+
+            if original_path and os.path.exists(original_path):
+                filename_only = os.path.basename(filename_normalized)
+                model_type = _detect_model_type(category, filename_only)
+                # RU: Используем filename_only для пути кеша чтобы избежать двойных подпапок
+                cache_path = _settings.root / category / model_type / filename_only
+
+                # RU: Копируем ТОЛЬКО модели из workflow (через API), а не все подряд с NAS
+                if not cache_path.exists():
+                    if _enqueue_copy(category, filename_normalized, original_path, str(cache_path)):
+                        print(f"    📋 Queued for copy from workflow: {category}/{filename_normalized}")
+                    else:
+                        print(f"    ⏭️ Already queued: {category}/{filename_normalized}")
+                else:
+                    print(f"    ✅ Already cached: {category}/{filename_normalized}")
+        except Exception as e:
+            print(f"    ❌ Failed to queue {category}/{filename_normalized}: {e}")
+
+    print(f"[ArenaAutoCache] 📊 Statistics:")
+    print(f"  Cache hits: {cache_hits}")
+    print(f"  Cache misses: {cache_misses} (will be copied)")
+    if not_found:
+        print(f"  Not found: {len(not_found)}")
+        for nf in not_found:
+            print(f"    - {nf}")
+    return cache_hits, cache_misses, not_found
+
+
+def _source_size(source_path: str) -> int:
+    """RU: Размер исходника на NAS из каталога (stat только при первом обращении)."""
+    size = _source_sizes.get(source_path)
+    if size is None:
+        size = os.path.getsize(source_path)
+        _source_sizes[source_path] = size
+    return size
+
+
+def _resolve_models(models: list[dict]) -> dict:
+    """RU: Пакетный dry-run резолвинг: статус cached/nas/missing, размер и оценка времени копирования.
+
+    Кеш проверяется по in-memory индексу с той же схемой путей, что у резолвера (_get_cache_path),
+    NAS - по спискам файлов folder_paths (по одному на категорию).
+    """
+    throughput_bps = _copy_jobs.measured_throughput_bps()
+    try:
+        import folder_paths
+    except Exception:
+        folder_paths = None
+
+    filename_lists: dict[str, set[str]] = {}
+    resolved = []
+    summary = {"cached": 0, "nas": 0, "missing": 0, "bytes_to_copy": 0, "estimated_copy_s": None}
+
+    for model in models:
+        category = model.get("category", "")
+        filename = model.get("filename", "")
+        entry = {"category": category, "filename": filename, "status": "missing",
+                 "size_bytes": None, "cache_path": None, "source_path": None, "estimated_copy_s": None}
+
+        if _settings and category and filename:
+            cache_path, cached_size = _lookup_cached(category, filename)
+            entry["cache_path"] = str(cache_path)
+            if cached_size is not None:
+                entry["status"] = "cached"
+                entry["size_bytes"] = cached_size
+
+        if entry["status"] != "cached" and folder_paths is not None and category and filename:
+            try:
+                if category not in filename_lists:
+                    filename_lists[category] = set(folder_paths.get_filename_list(category))
+                if filename.replace('\\', '/') in filename_lists[category] or filename in filename_lists[category]:
+                    get_origin = getattr(folder_paths, "get_full_path_origin", folder_paths.get_full_path)
+                    source_path = get_origin(category, filename)
+                    if source_path:
+                        entry["status"] = "nas"
+                        entry["source_path"] = source_path
+                        entry["size_bytes"] = _source_size(source_path)
+                        if throughput_bps > 0:
+                            entry["estimated_copy_s"] = entry["size_bytes"] / throughput_bps
+            except Exception as e:
+                if _settings and _settings.verbose:
+                    print(f"[ArenaAutoCache] Resolve lookup failed for {category}/{filename}: {e}")
+
+        summary[entry["status"]] += 1
+        if entry["status"] == "nas":
+            summary["bytes_to_copy"] += entry["size_bytes"]
+        # RU: Поля прежнего формата ответа
+        entry["exists_in_cache"] = entry["status"] == "cached"
+        entry["would_download"] = entry["status"] == "nas"
+        resolved.append(entry)
+
+    if throughput_bps > 0:
+        summary["estimated_copy_s"] = summary["bytes_to_copy"] / throughput_bps
+    summary["throughput_bps"] = throughput_bps
+    return {"resolved": resolved, "summary": summary}
+
+
+def _count_uncached_models() -> tuple[int, int]:
+    """RU: Считает некешированные модели workflow (блокирующая ФС-работа, выполняется в executor)."""
+    workflow_models = _get_workflow_models()
+    uncached_count = 0
+    
+    if _settings:
+        for category, filename in workflow_models:
+            _, cached_size = _lookup_cached(category, filename)
+            if cached_size is None:
+                uncached_count += 1
+    return uncached_count, len(workflow_models)
+
+
+def _render_metrics() -> str:
+    """RU: Обновляет gauge-метрики (очередь, заполненность кеша) и рендерит Prometheus текст (выполняется в executor)."""
+    snapshot = _copy_jobs.snapshot()
+    arena_metrics.COPY_QUEUE_DEPTH.set(snapshot["queue_depth"])
+    arena_metrics.COPY_ACTIVE.set(snapshot["active_jobs"])
+    if _settings:
+        stats = _get_cache_index().stats()
+        arena_metrics.CACHE_OCCUPANCY.set(stats["bytes"])
+        arena_metrics.CACHE_FILES.set(stats["files"])
+        arena_metrics.CACHE_LIMIT.set(max(0.0, _settings.max_cache_gb) * 1024 ** 3)
+    return arena_metrics.REGISTRY.render()
+
+
+# RU: Prefetch по очереди промптов: расширения файлов моделей и подсказки категорий по именам входов нод
+MODEL_FILE_EXTENSIONS = (".safetensors", ".ckpt", ".pt", ".pth", ".bin", ".gguf", ".sft", ".onnx")
+PROMPT_INPUT_CATEGORIES = {
+    "ckpt_name": ["checkpoints"],
+    "lora_name": ["loras"],
+    "vae_name": ["vae"],
+    "clip_name": ["text_encoders", "clip"],
+    "unet_name": ["diffusion_models", "unet_models", "gguf_models"],
+    "control_net_name": ["controlnet"],
+    "style_model_name": ["style_models"],
+    "upscale_model_name": ["upscale_models"],
+    "model_name": ["upscale_models", "checkpoints"],
+}
+
+# RU: Однопоточный пул сохраняет порядок промптов в очереди копирования
+_prompt_prefetch_executor = None
+
+
+def _prompt_model_candidates(prompt: dict) -> list[tuple[str, str]]:
+    """RU: Собирает (имя входа, файл) из API-формата промпта; чистый обход dict без ФС (безопасно в event loop)."""
+    candidates = []
+    seen = set()
+    for node in prompt.values():
+        if not isinstance(node, dict):
+            continue
+        for input_name, value in (node.get("inputs") or {}).items():
+            if not isinstance(value, str) or not value.lower().endswith(MODEL_FILE_EXTENSIONS):
+                continue
+            key = (input_name, value)
+            if key not in seen:
+                seen.add(key)
+                candidates.append(key)
+    return candidates
+
+
+def _resolve_prompt_models(candidates: list[tuple[str, str]]) -> list[dict]:
+    """RU: Определяет категорию каждого файла через списки folder_paths (сначала по подсказке имени входа)."""
+    try:
+        import folder_paths
+    except Exception:
+        return []
+
+    filename_lists: dict[str, set[str]] = {}
+
+    def has_file(category: str, filename: str) -> bool:
+        if category not in filename_lists:
+            try:
+                filename_lists[category] = set(folder_paths.get_filename_list(category))
+            except Exception:
+                filename_lists[category] = set()
+        return filename in filename_lists[category]
+
+    all_categories = list(getattr(folder_paths, "folder_names_and_paths", {}).keys())
+    models = []
+    for input_name, filename in candidates:
+        # RU: clip_name1/clip_name2/... используют ту же подсказку, что и clip_name
+        hint_key = input_name.rstrip("0123456789")
+        hinted = [c for c in PROMPT_INPUT_CATEGORIES.get(hint_key, []) if c in all_categories]
+        for category in hinted + [c for c in all_categories if c not in hinted]:
+            if has_file(category, filename):
+                models.append({"category": category, "filename": filename})
+                break
+    return models
+
+
+def _prefetch_prompt_models(prompt_label: str, candidates: list[tuple[str, str]]) -> None:
+    """RU: Резолвит модели поставленного в очередь промпта и ставит промахи на копирование (в фоне)."""
+    try:
+        models = _resolve_prompt_models(candidates)
+        if not models:
+            return
+        print(f"[ArenaAutoCache] Queue prefetch for prompt {prompt_label}: {len(models)} models")
+        _prefetch_models(models)
+    except Exception as e:
+        print(f"[ArenaAutoCache] Queue prefetch error for prompt {prompt_label}: {e}")
+
+
+def _on_prompt_queued(json_data: dict) -> dict:
+    """RU: on_prompt handler PromptServer: прогревает модели промпта до его выполнения, не блокируя event loop."""
+    global _prompt_prefetch_executor
+    try:
+        if not (_settings and _auto_cache_enabled and _autopatch_enabled):
+            return json_data
+        if not get_env_default("ARENA_CACHE_QUEUE_PREFETCH", True, bool):
+            return json_data
+
+        prompt = json_data.get("prompt")
+        if not isinstance(prompt, dict):
+            return json_data
+        candidates = _prompt_model_candidates(prompt)
+        if not candidates:
+            return json_data
+
+        if _prompt_prefetch_executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            _prompt_prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ArenaQueuePrefetch")
+        label = str(json_data.get("client_id") or "?")[:8]
+        _prompt_prefetch_executor.submit(_prefetch_prompt_models, label, candidates)
+    except Exception as e:
+        # RU: Prefetch никогда не должен ломать постановку промпта в очередь
+        print(f"[ArenaAutoCache] Queue prefetch hook error: {e}")
+    return json_data
+
+
 def _setup_workflow_analysis_api():
     """RU: Настраивает API endpoint для получения моделей от JavaScript."""
     try:
@@ -1498,38 +2320,7 @@ def _setup_workflow_analysis_api():
                     if models and _auto_cache_enabled and _autopatch_enabled:
                         print(f"[ArenaAutoCache] Prefetch request: {len(models)} models from workflow")
                         
-                        # RU: Планируем копирование ВСЕХ моделей сразу
-                        prefetched = 0
-                        for model_info in models:
-                            try:
-                                category = model_info.get('category', 'checkpoints')
-                                filename = model_info.get('filename', '')
-                                
-                                if not filename:
-                                    continue
-                                
-                                # RU: Проверяем кеш
-                                cache_path_obj = _get_cache_path(category, filename)
-                                if cache_path_obj and cache_path_obj.exists():
-                                    print(f"[ArenaAutoCache] Already cached: {filename}")
-                                    continue
-                                
-                                # RU: Получаем оригинальный путь
-                                try:
-                                    import folder_paths
-                                    original_path = folder_paths.get_full_path_origin(category, filename)
-                                    if original_path and os.path.exists(original_path):
-                                        target_cache_path = str(cache_path_obj) if cache_path_obj else str(_settings.root / category / filename)
-                                        _copy_queue.put((category, filename, original_path, target_cache_path))
-                                        prefetched += 1
-                                        print(f"[ArenaAutoCache] Prefetch scheduled: {category}/{filename}")
-                                except Exception as e:
-                                    print(f"[ArenaAutoCache] Prefetch error for {filename}: {e}")
-                                    
-                            except Exception as e:
-                                print(f"[ArenaAutoCache] Error processing model info: {e}")
-                        
-                        print(f"[ArenaAutoCache] Prefetch: scheduled {prefetched}/{len(models)} models for caching")
+                        prefetched = await _run_blocking_fs(_prefetch_models, models)
                         return web.json_response({"status": "success", "prefetched": prefetched, "total": len(models)})
                     else:
                         return web.json_response({"status": "error", "message": "Prefetch disabled or no models"})
@@ -1551,12 +2342,20 @@ def _setup_workflow_analysis_api():
                 else:
                     return web.json_response({"status": "error", "message": "Unknown action"})
                     
+            except asyncio.TimeoutError:
+                from aiohttp import web
+                return _fs_timeout_response(web, "Workflow prefetch")
             except Exception as e:
                 from aiohttp import web
                 print(f"[ArenaAutoCache] Workflow analysis API error: {e}")
                 return web.json_response({"status": "error", "message": str(e)})
         
         print("[ArenaAutoCache] Workflow analysis API endpoint registered")
+
+        # RU: Хук очереди промптов - prefetch моделей без участия браузера
+        if hasattr(PromptServer.instance, "add_on_prompt_handler"):
+            PromptServer.instance.add_on_prompt_handler(_on_prompt_queued)
+            print("[ArenaAutoCache] Prompt queue prefetch hook registered")
         
         # RU: Добавляем API для синхронизации .env
         @PromptServer.instance.routes.get("/arena/env")
@@ -1583,16 +2382,7 @@ def _setup_workflow_analysis_api():
                 update_only = data.get("update_only", False)
                 
                 # RU: Валидируем ключи
-                valid_keys = {
-                    "ARENA_CACHE_ROOT", "ARENA_CACHE_MIN_SIZE_MB", "ARENA_CACHE_MAX_GB",
-                    "ARENA_CACHE_VERBOSE", "ARENA_CACHE_CATEGORIES", "ARENA_CACHE_CATEGORIES_MODE",
-                    "ARENA_CACHE_MODE", "ARENA_AUTO_CACHE_ENABLED", "ARENA_AUTOCACHE_AUTOPATCH",
-                    "ARENA_CACHE_DISCOVERY", "ARENA_CACHE_PREFETCH_STRATEGY",
-                    "ARENA_CACHE_MAX_CONCURRENCY", "ARENA_CACHE_SESSION_BYTE_BUDGET",
-                    "ARENA_CACHE_COOLDOWN_MS"
-                }
-                
-                filtered_env = {k: v for k, v in env_data.items() if k in valid_keys}
+                filtered_env = {k: v for k, v in env_data.items() if k in _ENV_KNOWN_KEYS}
                 
                 if filtered_env:
                     # RU: Обновляем os.environ
@@ -1695,7 +2485,7 @@ def _setup_workflow_analysis_api():
                     # RU: Инициализируем _settings если еще не инициализирован
                     global _settings
                     if _settings is None:
-                        _settings = _init_settings()
+                        _settings = await _run_blocking_fs(_init_settings)
                     
                     # RU: Проверяем cooldown
                     global _last_autopatch_time
@@ -1720,128 +2510,7 @@ def _setup_workflow_analysis_api():
                     not_found = []
                     
                     if required_models:
-                        print(f"[ArenaAutoCache] 📥 Received {len(required_models)} models from frontend:")
-                        
-                        # RU: Проверяем каждую модель
-                        for model in required_models:
-                            category = model.get("category", "unknown")
-                            filename = model.get("filename", "")
-                            print(f"  - {category}/{filename}")
-                            
-                            # RU: Проверяем существование модели через folder_paths
-                            try:
-                                import folder_paths
-                                
-                                # RU: Нормализуем путь (replace backslash with forward slash)
-                                filename_normalized = filename.replace('\\', '/')
-                                
-                                # RU: ВАЖНО: folder_paths ожидает только имя файла БЕЗ подпапок
-                                # Frontend может отправить "SUPIR\SUPIR-v0Q_fp16.safetensors"
-                                # Нужно извлечь только "SUPIR-v0Q_fp16.safetensors"
-                                filename_for_lookup = os.path.basename(filename_normalized)
-                                
-                                if hasattr(folder_paths, 'get_full_path_origin'):
-                                    original_path = folder_paths.get_full_path_origin(category, filename_for_lookup)
-                                else:
-                                    original_path = folder_paths.get_full_path(category, filename_for_lookup)
-                                
-                                if original_path and os.path.exists(original_path):
-                                    # RU: Вычисляем cache path (используем только имя файла для определения типа)
-                                    filename_only = os.path.basename(filename_normalized)
-                                    model_type = _detect_model_type(category, filename_only)
-                                    # RU: КРИТИЧНО: используем filename_only вместо filename_normalized чтобы избежать двойных подпапок
-                                    cache_path = _settings.root / category / model_type / filename_only
-                                    
-                                    if cache_path.exists():
-                                        cache_hits += 1
-                                        print(f"    ✅ Cache HIT: {cache_path}")
-                                    else:
-                                        cache_misses += 1
-                                        print(f"    ⏳ Cache MISS: will be copied from {original_path}")
-                                else:
-                                    not_found.append(f"{category}/{filename_normalized}")
-                                    print(f"    ⚠️ Model NOT FOUND in folder_paths")
-                            except Exception as e:
-                                print(f"    ❌ Error checking model: {e}")
-                        
-                        # RU: Добавляем в required_models
-                        with _required_models_lock:
-                            _required_models.update((m["category"], m["filename"]) for m in required_models)
-                        
-                        # RU: НЕМЕДЛЕННО добавляем модели в очередь копирования для prefetch
-                        print(f"[ArenaAutoCache] 🚀 Adding {cache_misses} models to copy queue for prefetch...")
-                        for model in required_models:
-                            category = model.get("category", "unknown")
-                            filename = model.get("filename", "")
-                            filename_normalized = filename.replace('\\', '/')
-                            
-                            try:
-                                import folder_paths
-                                
-                                # RU: ВАЖНО: folder_paths ожидает только имя файла БЕЗ подпапок
-                                filename_for_lookup = os.path.basename(filename_normalized)
-                                
-                                # RU: УНИВЕРСАЛЬНЫЙ ПОИСК: сначала пробуем в указанной категории, потом во всех
-                                original_path = None
-                                if hasattr(folder_paths, 'get_full_path_origin'):
-                                    original_path = folder_paths.get_full_path_origin(category, filename_for_lookup)
-                                else:
-                                    original_path = folder_paths.get_full_path(category, filename_for_lookup)
-                                
-                                # RU: Если не найдено - пробуем ВСЕ категории (УНИВЕРСАЛЬНЫЙ ПОИСК)
-                                if not original_path or not os.path.exists(original_path):
-                                    all_categories = ['checkpoints', 'loras', 'vae', 'clip', 'diffusion_models', 
-                                                     'gguf_models', 'unet', 'controlnet', 'upscale_models', 'embeddings',
-                                                     'text_encoders', 'clip_vision', 'style_models', 'gligen']
-                                    for fallback_cat in all_categories:
-                                        try:
-                                            # RU: Проверяем что категория существует в folder_paths
-                                            if not hasattr(folder_paths, 'folder_names_and_paths'):
-                                                continue
-                                            if fallback_cat not in folder_paths.folder_names_and_paths:
-                                                continue
-                                            
-                                            if hasattr(folder_paths, 'get_full_path_origin'):
-                                                test_path = folder_paths.get_full_path_origin(fallback_cat, filename_for_lookup)
-                                            else:
-                                                test_path = folder_paths.get_full_path(fallback_cat, filename_for_lookup)
-                                            
-                                            if test_path and os.path.exists(test_path):
-                                                original_path = test_path
-                                                category = fallback_cat  # Обновляем категорию
-                                                print(f"    🔍 Found in fallback category: {fallback_cat}/{filename_for_lookup}")
-                                                break
-                                        except Exception as ex:
-                                            if _settings.verbose:
-                                                print(f"    🔍 Fallback search failed for {fallback_cat}: {ex}")
-                                
-                                if original_path and os.path.exists(original_path):
-                                    filename_only = os.path.basename(filename_normalized)
-                                    model_type = _detect_model_type(category, filename_only)
-                                    # RU: Используем filename_only для пути кеша чтобы избежать двойных подпапок
-                                    cache_path = _settings.root / category / model_type / filename_only
-                                    
-                                    # RU: Копируем ТОЛЬКО модели из workflow (через API), а не все подряд с NAS
-                                    if not cache_path.exists():
-                                        with _scheduled_lock:
-                                            if (category, filename_normalized) not in _scheduled_tasks:
-                                                _scheduled_tasks.add((category, filename_normalized))
-                                                _copy_queue.put((category, filename_normalized, original_path, str(cache_path)))
-                                                print(f"    📋 Queued for copy from workflow: {category}/{filename_normalized}")
-                                            else:
-                                                print(f"    ⏭️ Already queued: {category}/{filename_normalized}")
-                                    else:
-                                        print(f"    ✅ Already cached: {category}/{filename_normalized}")
-                            except Exception as e:
-                                print(f"    ❌ Failed to queue {category}/{filename_normalized}: {e}")
-                        
-                        print(f"[ArenaAutoCache] 📊 Statistics:")
-                        print(f"  Cache hits: {cache_hits}")
-                        print(f"  Cache misses: {cache_misses} (will be copied)")
-                        if not_found:
-                            print(f"  Not found: {len(not_found)}")
-                            for nf in not_found:
-                                print(f"    - {nf}")
+                        cache_hits, cache_misses, not_found = await _run_blocking_fs(_autopatch_process_models, required_models)
                     # RU: Разрешаем запуск без required_models для on-demand режима
                     else:
                         print("[ArenaAutoCache] Autopatch requested without explicit required_models (on-demand mode)")
@@ -1863,6 +2532,9 @@ def _setup_workflow_analysis_api():
                 else:
                     return web.json_response({"status": "error", "code": "INVALID_ACTION", "message": "Invalid action"})
                     
+            except asyncio.TimeoutError:
+                from aiohttp import web
+                return _fs_timeout_response(web, "Autopatch model check")
             except Exception as e:
                 from aiohttp import web
                 return web.json_response({"status": "error", "code": "INTERNAL_ERROR", "message": str(e)})
@@ -1901,35 +2573,20 @@ def _setup_workflow_analysis_api():
         
         print("[ArenaAutoCache] Status API endpoint registered")
         
-        # RU: Добавляем API для dry-run резолвинга моделей
+        # RU: Добавляем API для пакетного dry-run резолвинга моделей
         @PromptServer.instance.routes.post("/arena/resolve")
         async def post_resolve_endpoint(request):
-            """RU: Dry-run резолвинг моделей без загрузки."""
+            """RU: Пакетный dry-run резолвинг моделей без загрузки (cached/nas/missing, размер, ETA копирования)."""
             try:
                 from aiohttp import web
                 data = await request.json()
                 models = data.get("models", [])
+                result = await _run_blocking_fs(_resolve_models, models)
                 
-                resolved = []
-                for model in models:
-                    category = model.get("category", "")
-                    filename = model.get("filename", "")
-                    
-                    # RU: Проверяем наличие в кеше
-                    if _settings:
-                        cache_path = _settings.root / category / filename
-                        exists_in_cache = cache_path.exists()
-                    else:
-                        exists_in_cache = False
-                    
-                    resolved.append({
-                        "category": category,
-                        "filename": filename,
-                        "exists_in_cache": exists_in_cache,
-                        "would_download": not exists_in_cache
-                    })
-                
-                return web.json_response({"status": "success", "resolved": resolved})
+                return web.json_response({"status": "success", **result})
+            except asyncio.TimeoutError:
+                from aiohttp import web
+                return _fs_timeout_response(web, "Resolve")
             except Exception as e:
                 from aiohttp import web
                 return web.json_response({"status": "error", "message": str(e)})
@@ -1943,21 +2600,16 @@ def _setup_workflow_analysis_api():
             try:
                 from aiohttp import web
                 
-                # RU: Получаем модели из workflow
-                workflow_models = _get_workflow_models()
-                uncached_count = 0
-                
-                if _settings:
-                    for category, filename in workflow_models:
-                        cache_path = _get_cache_path(category, filename)
-                        if not cache_path.exists():
-                            uncached_count += 1
+                uncached_count, total_workflow_models = await _run_blocking_fs(_count_uncached_models)
                 
                 return web.json_response({
                     "status": "success",
                     "uncached_count": uncached_count,
-                    "total_workflow_models": len(workflow_models)
+                    "total_workflow_models": total_workflow_models
                 })
+            except asyncio.TimeoutError:
+                from aiohttp import web
+                return _fs_timeout_response(web, "Uncached models check")
             except Exception as e:
                 from aiohttp import web
                 print(f"[ArenaAutoCache] Uncached models API error: {e}")
@@ -1971,14 +2623,11 @@ def _setup_workflow_analysis_api():
             """RU: Возвращает текущий статус копирования для UI индикатора."""
             try:
                 from aiohttp import web
-                global _copy_status
-                
-                # RU: Возвращаем копию статуса для thread-safety
-                status_copy = dict(_copy_status)
                 
+                # RU: Консистентный снимок реестра задач (собирается под локом)
                 return web.json_response({
                     "status": "success", 
-                    "copy_status": status_copy
+                    "copy_status": _copy_jobs.snapshot()
                 })
             except Exception as e:
                 from aiohttp import web
@@ -1987,6 +2636,56 @@ def _setup_workflow_analysis_api():
         
         print("[ArenaAutoCache] Copy status API endpoint registered")
         
+        # RU: Prometheus метрики (резолвер, hit/miss, копирование, вытеснение, сканирование NAS)
+        @PromptServer.instance.routes.get("/arena/metrics")
+        async def get_metrics_endpoint(request):
+            """RU: Возвращает метрики в текстовом формате Prometheus."""
+            from aiohttp import web
+            try:
+                text = await _run_blocking_fs(_render_metrics)
+                return web.Response(text=text, headers={"Content-Type": arena_metrics.CONTENT_TYPE})
+            except asyncio.TimeoutError:
+                print("[ArenaAutoCache] Metrics render timed out (slow NAS?)")
+                return web.Response(status=503, text="metrics render timed out\n")
+            except Exception as e:
+                print(f"[ArenaAutoCache] Metrics API error: {e}")
+                return web.Response(status=500, text=f"{e}\n")
+        
+        print("[ArenaAutoCache] Metrics API endpoint registered")
+        
+        # RU: Профилирование hot path резолвера (opt-in)
+        @PromptServer.instance.routes.get("/arena/profile")
+        async def get_profile_endpoint(request):
+            """RU: Возвращает сводку профилирования get_full_path/_get_cache_path/_schedule_copy_task."""
+            try:
+                from aiohttp import web
+                return web.json_response({"status": "success", "profile": PROFILER.summary()})
+            except Exception as e:
+                from aiohttp import web
+                print(f"[ArenaAutoCache] Profile API error: {e}")
+                return web.json_response({"status": "error", "message": str(e)})
+        
+        @PromptServer.instance.routes.post("/arena/profile")
+        async def post_profile_endpoint(request):
+            """RU: Включает/выключает профилирование и сбрасывает накопленную статистику."""
+            try:
+                from aiohttp import web
+                data = await request.json()
+                if data.get("reset"):
+                    PROFILER.reset()
+                if "enabled" in data:
+                    if data["enabled"]:
+                        PROFILER.enable()
+                    else:
+                        PROFILER.disable()
+                return web.json_response({"status": "success", "profile": PROFILER.summary()})
+            except Exception as e:
+                from aiohttp import web
+                print(f"[ArenaAutoCache] Profile API error: {e}")
+                return web.json_response({"status": "error", "message": str(e)})
+        
+        print("[ArenaAutoCache] Profile API endpoint registered")
+        
     except ImportError:
         print("[ArenaAutoCache] Server not available - workflow analysis API not registered")
     except Exception as e:
@@ -2297,6 +2996,8 @@ try:
             print("[ArenaAutoCache] Reset ENABLED/AUTOPATCH to 0 on exit")
         except Exception as e:
             print(f"[ArenaAutoCache] Failed to reset env on exit: {e}")
+        # RU: Дописываем накопленные события журнала
+        EVENT_LOG.close()
 
     def _signal_handler(signum, frame):
         print(f"[ArenaAutoCache] Caught signal {signum}, resetting env to 0/0")
@@ -0,0 +1,180 @@
+"""
+Arena Blob Store
+
+Purpose: Content-addressed storage for the SSD cache (ARENA_CACHE_DEDUP=1).
+Each distinct model is stored once under
+<cache_root>/.arena_blobs/<sha256[:2]>/<sha256>; the per-category cache paths
+the resolver returns are hardlinks to it, so a second name for the same
+content (a VAE under vae/ and checkpoints/, CLIP under clip/ and
+text_encoders/) costs no extra bytes.
+
+Notes:
+- The digest is computed while copying (the bytes are read anyway), so there
+  is no extra NAS read.
+- sources.json remembers source identity (real path, size, mtime_ns) ->
+  digest. Another name that resolves to a NAS file already stored (the same
+  file listed in two categories, symlinks, extra_model_paths) is linked
+  without reading the NAS at all. Different NAS files with identical content
+  are read once more and then deduplicated (the duplicate .part is dropped).
+- Reference count = st_nlink - 1 (the blob itself). A blob with no names left
+  is an orphan; eviction reclaims orphans first.
+- Hardlinks need a filesystem that supports them (ext4, xfs, btrfs, NTFS; not
+  FAT/exFAT). supported() probes that once; callers fall back to plain files.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+
+BLOB_DIR = ".arena_blobs"
+SOURCES_FILE = "sources.json"
+
+
+def new_hasher():
+    """Hash object fed by the copy loop."""
+    return hashlib.sha256()
+
+
+class BlobStore:
+    """Blobs by digest plus the source -> digest map."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        self.dir = self.root / BLOB_DIR
+        self.sources_path = self.dir / SOURCES_FILE
+        self._lock = threading.Lock()
+        self._sources: dict[str, str] | None = None
+        self._supported: bool | None = None
+
+    # ------------------------------------------------------------------ paths
+
+    def blob_path(self, digest: str) -> Path:
+        return self.dir / digest[:2] / digest
+
+    @staticmethod
+    def refcount(path: str | os.PathLike) -> int:
+        """Number of cache names pointing at a blob (0 = orphan)."""
+        return max(0, os.stat(path).st_nlink - 1)
+
+    def supported(self) -> bool:
+        """True if the cache filesystem supports hardlinks (probed once)."""
+        if self._supported is None:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            probe = self.dir / f".probe.{os.getpid()}"
+            probe_link = self.dir / f".probe.{os.getpid()}.link"
+            try:
+                probe.write_bytes(b"")
+                os.link(probe, probe_link)
+                self._supported = True
+            except OSError:
+                self._supported = False
+            finally:
+                for path in (probe_link, probe):
+                    try:
+                        path.unlink()
+                    except OSError:
+                        pass
+        return self._supported
+
+    # ------------------------------------------------------------------ sources
+
+    @staticmethod
+    def _source_key(source_path: str) -> str:
+        st = os.stat(source_path)
+        return f"{os.path.normcase(os.path.realpath(source_path))}|{st.st_size}|{st.st_mtime_ns}"
+
+    def _load_sources(self) -> dict[str, str]:
+        try:
+            with open(self.sources_path, encoding="utf-8") as f:
+                data = json.load(f)
+            return {str(k): str(v) for k, v in data.items()} if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def lookup(self, source_path: str) -> Path | None:
+        """Stored blob for this exact source file (same path, size and mtime), if any."""
+        try:
+            key = self._source_key(source_path)
+        except OSError:
+            return None
+        with self._lock:
+            if self._sources is None or key not in self._sources:
+                # RU: Другой процесс мог добавить источник - перечитываем файл при промахе
+                self._sources = self._load_sources()
+            digest = self._sources.get(key)
+        if digest is None:
+            return None
+        blob = self.blob_path(digest)
+        return blob if blob.exists() else None
+
+    def remember(self, source_path: str, digest: str) -> None:
+        """Record source -> digest; merges with the file on disk, replaced atomically."""
+        try:
+            key = self._source_key(source_path)
+        except OSError:
+            return
+        with self._lock:
+            sources = self._load_sources()
+            sources[key] = digest
+            tmp = self.sources_path.with_name(f"{SOURCES_FILE}.{os.getpid()}.{threading.get_ident()}.tmp")
+            self.dir.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(sources, f, separators=(",", ":"))
+            os.replace(tmp, self.sources_path)
+            self._sources = sources
+
+    # ------------------------------------------------------------------ blobs
+
+    def ingest(self, part_path: str | os.PathLike, digest: str) -> tuple[Path, bool]:
+        """Move a finished copy into the store; returns (blob, created). Duplicates are dropped."""
+        blob = self.blob_path(digest)
+        if blob.exists():
+            os.unlink(part_path)
+            return blob, False
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(part_path, blob)
+        return blob, True
+
+    def link(self, blob: Path, cache_path: str | os.PathLike) -> None:
+        """Expose a blob at ``cache_path`` (atomically replaces whatever is there)."""
+        cache_path = Path(cache_path)
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.link.part")
+        try:
+            tmp.unlink()
+        except FileNotFoundError:
+            pass
+        os.link(blob, tmp)
+        os.replace(tmp, cache_path)
+
+    def iter_blobs(self):
+        """Yield (path, stat) for every stored blob."""
+        if not self.dir.exists():
+            return
+        for bucket in self.dir.iterdir():
+            if not bucket.is_dir():
+                continue
+            for blob in bucket.iterdir():
+                if blob.name.endswith(".part"):
+                    continue
+                try:
+                    yield blob, blob.stat()
+                except OSError:
+                    continue
+
+    def collect_orphans(self) -> int:
+        """Delete blobs no cache name points at; returns bytes freed."""
+        freed = 0
+        for blob, st in list(self.iter_blobs()):
+            if st.st_nlink <= 1:
+                try:
+                    blob.unlink()
+                    freed += st.st_size
+                except OSError:
+                    continue
+        return freed
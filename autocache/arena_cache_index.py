@@ -0,0 +1,181 @@
+"""
+Arena Cache Index
+
+Purpose: In-memory index of files in the SSD cache (path -> size), so batch
+queries (resolve, occupancy) do not stat the cache once per model.
+
+Notes:
+- Built by one os.scandir walk of the cache root, then kept current by the
+  copy worker (add) and pruning/clearing (remove/rebuild).
+- Rebuilt lazily when older than ``max_age_s`` to pick up external changes.
+- Unfinished ``.part`` files and the ``.arena*`` coordination files are never
+  indexed.
+- With a SharedIndex (several processes on one cache root) every add/remove/
+  rebuild is written through, and a change of the shared file (one stat per
+  lookup) is picked up without walking the cache again.
+- Keys are normalized absolute paths (os.path.normcase) so Windows lookups are
+  case-insensitive like the filesystem.
+- ``suffix`` restricts the index to files with that suffix (the smart cache
+  tiers index ``*.cache`` only, not in-flight temporary files).
+- Hardlinked names (ARENA_CACHE_DEDUP blobs) share one file id (st_dev,
+  st_ino), and the byte total counts each id once. The shared index stores
+  sizes only, so a process that loaded it counts each name until its next
+  rebuild.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from pathlib import Path
+
+
+def _key(path: str | os.PathLike) -> str:
+    return os.path.normcase(os.path.abspath(os.fspath(path)))
+
+
+def file_id(st: os.stat_result):
+    """Identity shared by hardlinks; None where the platform does not report inodes."""
+    return (st.st_dev, st.st_ino) if st.st_ino else None
+
+
+class CacheIndex:
+    """Thread-safe path -> size index of a cache directory."""
+
+    def __init__(self, root: Path, max_age_s: float = 300.0, shared=None, suffix: str | None = None) -> None:
+        self.root = Path(root)
+        self.max_age_s = max_age_s
+        self.shared = shared  # arena_shared_cache.SharedIndex | None
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self._sizes: dict[str, int] = {}
+        self._ids: dict[str, tuple] = {}  # RU: только для файлов с известным inode
+        self._refs: dict = {}  # RU: file id -> число имен в индексе
+        self._total_bytes = 0
+        self._built_at = 0.0
+        self._shared_signature = None
+
+    def _set_sizes(self, sizes: dict[str, int], signature=None, ids: dict[str, tuple] | None = None) -> None:
+        ids = ids or {}
+        refs: dict = {}
+        total = 0
+        for key, size in sizes.items():
+            fid = ids.get(key, key)
+            if fid not in refs:
+                refs[fid] = 0
+                total += size
+            refs[fid] += 1
+        with self._lock:
+            self._sizes = sizes
+            self._ids = ids
+            self._refs = refs
+            self._total_bytes = total
+            self._built_at = time.time()
+            self._shared_signature = signature
+
+    def _forget_locked(self, key: str) -> None:
+        size = self._sizes.pop(key, None)
+        if size is None:
+            return
+        fid = self._ids.pop(key, key)
+        self._refs[fid] = self._refs.get(fid, 1) - 1
+        if self._refs[fid] <= 0:
+            del self._refs[fid]
+            self._total_bytes -= size
+
+    def rebuild(self) -> int:
+        """Rescan the cache root; returns the number of indexed files."""
+        sizes: dict[str, int] = {}
+        ids: dict[str, tuple] = {}
+        stack = [str(self.root)]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        try:
+                            if entry.name.startswith(".arena"):
+                                continue
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                            elif entry.is_file() and not entry.name.endswith(".part"):
+                                if self.suffix is not None and not entry.name.endswith(self.suffix):
+                                    continue
+                                st = entry.stat()
+                                key = _key(entry.path)
+                                sizes[key] = st.st_size
+                                fid = file_id(st)
+                                if fid is not None:
+                                    ids[key] = fid
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+        signature = None
+        if self.shared is not None:
+            root = os.path.normcase(os.path.abspath(self.root))
+            self.shared.update(replace={os.path.relpath(k, root): v for k, v in sizes.items()})
+            signature = self.shared.signature()
+        self._set_sizes(sizes, signature, ids)
+        return len(sizes)
+
+    def _load_shared(self, signature) -> None:
+        sizes = {_key(self.root / rel): size for rel, size in self.shared.load().items()}
+        self._set_sizes(sizes, signature)
+
+    def _ensure_fresh(self) -> None:
+        if not self._built_at or (self.max_age_s > 0 and time.time() - self._built_at > self.max_age_s):
+            self.rebuild()
+            return
+        if self.shared is not None:
+            signature = self.shared.signature()
+            if signature is None:
+                self.rebuild()
+            elif signature != self._shared_signature:
+                # RU: Другой процесс изменил общий индекс - перечитываем его вместо обхода кеша
+                self._load_shared(signature)
+
+    def add(self, path: str | os.PathLike, size: int, fid: tuple | None = None) -> None:
+        """Record a file that was just written (or linked, with its ``file_id``) to the cache."""
+        key = _key(path)
+        with self._lock:
+            self._forget_locked(key)
+            self._sizes[key] = size
+            if fid is not None:
+                self._ids[key] = fid
+            ref = fid if fid is not None else key
+            self._refs[ref] = self._refs.get(ref, 0) + 1
+            if self._refs[ref] == 1:
+                self._total_bytes += size
+        if self.shared is not None:
+            self.shared.update(add={os.fspath(path): size})
+
+    def remove(self, path: str | os.PathLike) -> None:
+        """Forget a file that was deleted from the cache."""
+        with self._lock:
+            self._forget_locked(_key(path))
+        if self.shared is not None:
+            self.shared.update(remove=[os.fspath(path)])
+
+    def size_of(self, path: str | os.PathLike) -> int | None:
+        """Size of a cached file, or None if it is not in the cache."""
+        self._ensure_fresh()
+        with self._lock:
+            return self._sizes.get(_key(path))
+
+    def entries(self) -> dict[str, int]:
+        """Snapshot of path -> size."""
+        self._ensure_fresh()
+        with self._lock:
+            return dict(self._sizes)
+
+    def stats(self) -> dict:
+        """File count, total bytes and index age."""
+        self._ensure_fresh()
+        with self._lock:
+            return {
+                "files": len(self._sizes),
+                "bytes": self._total_bytes,
+                "built_at": self._built_at,
+            }
@@ -0,0 +1,178 @@
+"""
+Arena Compression
+
+Purpose: Compression backends for smart-cache entries, including file-to-file
+streaming, so a multi-GB model is never held in memory and compression can
+run outside the cache lock.
+
+Notes:
+- zstd prefers the optional ``zstandard`` package: streaming, and
+  multi-threaded (``threads``; 0 = all cores) - the library cuts the input
+  into jobs and compresses them in parallel into one standard frame.
+- Without it the ``zstd`` package is used: also multi-threaded, but one-shot,
+  so compress_file() has to read the whole file. Both write standard zstd
+  frames, so entries written by either backend decode with the other.
+- gzip is stdlib, streamed and single-threaded.
+- compress_file()/decompress_file() write ``dst`` in place; callers write to
+  a temporary path and rename it.
+- estimate_ratio() compresses a few evenly spaced slices (bytes or a file)
+  to predict the ratio of the whole payload before paying for it. Slices
+  lose some long-range context, so the estimate errs on the pessimistic
+  side - fine for deciding whether compression is worth it.
+"""
+
+from __future__ import annotations
+
+import gzip
+import os
+import shutil
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import zstd as zstd_oneshot
+except ImportError:
+    zstd_oneshot = None
+
+
+MB = 1024 * 1024
+STREAM_CHUNK = 4 * MB
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def zstd_backend() -> str | None:
+    """Name of the zstd implementation in use, or None if neither package is installed."""
+    if zstandard is not None:
+        return "zstandard"
+    if zstd_oneshot is not None:
+        return "zstd"
+    return None
+
+
+def frame_method(path: str | os.PathLike) -> str | None:
+    """"zstd" or "gzip" if ``path`` starts with that frame magic, else None."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(len(ZSTD_MAGIC))
+    except OSError:
+        return None
+    if head.startswith(ZSTD_MAGIC):
+        return "zstd"
+    if head.startswith(GZIP_MAGIC):
+        return "gzip"
+    return None
+
+
+def available(method: str) -> bool:
+    return method == "gzip" or (method == "zstd" and zstd_backend() is not None)
+
+
+def _threads(threads: int) -> int:
+    return threads if threads > 0 else (os.cpu_count() or 1)
+
+
+def _require_zstd() -> None:
+    if zstd_backend() is None:
+        raise RuntimeError("zstd compression needs the 'zstandard' (or 'zstd') package")
+
+
+def compress_bytes(data, method: str = "zstd", level: int = 6, threads: int = 0) -> bytes:
+    if method == "zstd":
+        _require_zstd()
+        if zstandard is not None:
+            return zstandard.ZstdCompressor(level=level, threads=_threads(threads)).compress(data)
+        return zstd_oneshot.compress(bytes(data), level, _threads(threads))
+    if method == "gzip":
+        return gzip.compress(data, compresslevel=min(9, max(1, level)))
+    raise ValueError(f"Unsupported compression method: {method}")
+
+
+def decompress_bytes(data, method: str = "zstd") -> bytes:
+    if method == "zstd":
+        _require_zstd()
+        if zstandard is not None:
+            # RU: decompressobj не требует размер в заголовке кадра (старые записи его могут не иметь)
+            return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+        return zstd_oneshot.decompress(bytes(data))
+    if method == "gzip":
+        return gzip.decompress(data)
+    raise ValueError(f"Unsupported compression method: {method}")
+
+
+def compress_file(src: str | os.PathLike, dst: str | os.PathLike, method: str = "zstd",
+                  level: int = 6, threads: int = 0) -> tuple[int, int]:
+    """Compress ``src`` into ``dst``; returns (input bytes, output bytes)."""
+    if method == "zstd":
+        _require_zstd()
+        if zstandard is not None:
+            cctx = zstandard.ZstdCompressor(level=level, threads=_threads(threads))
+            with open(src, "rb") as fin, open(dst, "wb") as fout:
+                size = os.fstat(fin.fileno()).st_size
+                read, written = cctx.copy_stream(
+                    fin, fout, size=size, read_size=STREAM_CHUNK, write_size=STREAM_CHUNK
+                )
+            return read, written
+        with open(src, "rb") as fin:
+            data = fin.read()
+        compressed = zstd_oneshot.compress(data, level, _threads(threads))
+        with open(dst, "wb") as fout:
+            fout.write(compressed)
+        return len(data), len(compressed)
+    if method == "gzip":
+        with open(src, "rb") as fin, gzip.open(dst, "wb", compresslevel=min(9, max(1, level))) as fout:
+            shutil.copyfileobj(fin, fout, STREAM_CHUNK)
+        return os.path.getsize(src), os.path.getsize(dst)
+    raise ValueError(f"Unsupported compression method: {method}")
+
+
+def decompress_file(src: str | os.PathLike, dst: str | os.PathLike, method: str = "zstd") -> int:
+    """Decompress ``src`` into ``dst``; returns output bytes."""
+    if method == "zstd":
+        _require_zstd()
+        if zstandard is not None:
+            with open(src, "rb") as fin, open(dst, "wb") as fout:
+                _, written = zstandard.ZstdDecompressor().copy_stream(
+                    fin, fout, read_size=STREAM_CHUNK, write_size=STREAM_CHUNK
+                )
+            return written
+        with open(src, "rb") as fin:
+            data = zstd_oneshot.decompress(fin.read())
+        with open(dst, "wb") as fout:
+            fout.write(data)
+        return len(data)
+    if method == "gzip":
+        with gzip.open(src, "rb") as fin, open(dst, "wb") as fout:
+            shutil.copyfileobj(fin, fout, STREAM_CHUNK)
+        return os.path.getsize(dst)
+    raise ValueError(f"Unsupported compression method: {method}")
+
+
+def _sample_offsets(size: int, samples: int, sample_size: int) -> list[int]:
+    if size <= samples * sample_size:
+        return list(range(0, size, sample_size))
+    step = (size - sample_size) / max(1, samples - 1)
+    return [int(i * step) for i in range(samples)]
+
+
+def estimate_ratio(source, method: str = "zstd", level: int = 6, samples: int = 8,
+                   sample_size: int = 256 * 1024) -> float:
+    """Projected compressed/original ratio of ``source`` (bytes-like or a file path) from sampled slices."""
+    if isinstance(source, (str, os.PathLike)):
+        size = os.path.getsize(source)
+        chunks = []
+        with open(source, "rb") as f:
+            for offset in _sample_offsets(size, samples, sample_size):
+                f.seek(offset)
+                chunks.append(f.read(sample_size))
+    else:
+        view = memoryview(source).cast("B")
+        chunks = [view[offset:offset + sample_size] for offset in _sample_offsets(len(view), samples, sample_size)]
+    original = sum(len(chunk) for chunk in chunks)
+    if not original:
+        return 1.0
+    compressed = sum(len(compress_bytes(chunk, method, level, threads=1)) for chunk in chunks)
+    return compressed / original
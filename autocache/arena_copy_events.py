@@ -0,0 +1,120 @@
+"""
+Arena Copy Events
+
+Purpose: Push copy start/progress/complete/fail events to the browser over
+ComfyUI's existing websocket (PromptServer.send_sync), so the UI does not poll
+/arena/copy_status while a copy is running.
+
+Notes:
+- One websocket message type ("arena_copy"); the phase is in data["event"].
+- Progress events are coalesced per job to at most one per interval
+  (ARENA_COPY_EVENT_INTERVAL_MS, default 250 ms). start/complete/fail are
+  always sent immediately.
+- send_sync is thread-safe in ComfyUI (call_soon_threadsafe), so copy workers
+  publish directly; when the server is not available publishing is a no-op
+  (the failed import is remembered, not retried per chunk).
+- Every event carries the full job record (filename, state, progress, ...),
+  so the UI never has to merge progress into state from earlier events.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Callable
+
+
+EVENT_TYPE = "arena_copy"
+DEFAULT_INTERVAL_MS = 250
+
+
+def interval_from_env() -> float:
+    """Read ARENA_COPY_EVENT_INTERVAL_MS (milliseconds) as seconds."""
+    try:
+        value = int(os.environ.get("ARENA_COPY_EVENT_INTERVAL_MS", str(DEFAULT_INTERVAL_MS)))
+    except ValueError:
+        value = DEFAULT_INTERVAL_MS
+    return max(0, value) / 1000.0
+
+
+_server_unavailable = False
+
+
+def _default_sender() -> Callable[[str, dict], None] | None:
+    """Return PromptServer.instance.send_sync when running inside ComfyUI."""
+    global _server_unavailable
+    if _server_unavailable:
+        return None
+    try:
+        from server import PromptServer  # provided by ComfyUI at runtime
+    except Exception:
+        # RU: Вне ComfyUI импорт не появится - не повторяем его на каждом чанке копии
+        _server_unavailable = True
+        return None
+    instance = getattr(PromptServer, "instance", None)
+    return getattr(instance, "send_sync", None)
+
+
+class CopyEventPublisher:
+    """Rate-limited publisher of copy job events."""
+
+    def __init__(
+        self,
+        sender: Callable[[str, dict], None] | None = None,
+        interval_s: float | None = None,
+    ) -> None:
+        self._sender = sender
+        self._interval_override = None if interval_s is None else max(0.0, interval_s)
+        self._last_progress: dict[Any, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def interval_s(self) -> float:
+        """Coalescing interval; follows the env setting unless overridden."""
+        if self._interval_override is not None:
+            return self._interval_override
+        return interval_from_env()
+
+    def _send(self, data: dict) -> None:
+        sender = self._sender or _default_sender()
+        if sender is None:
+            return
+        self._sender = sender
+        try:
+            sender(EVENT_TYPE, data)
+        except Exception:
+            # RU: UI-уведомления не должны ломать копирование
+            pass
+
+    def publish(self, event: str, job: dict, copy_status: dict) -> None:
+        """Publish a job lifecycle event (start/complete/fail) immediately."""
+        job_id = job.get("job_id")
+        with self._lock:
+            if event == "start":
+                self._last_progress[job_id] = time.monotonic()
+            else:
+                self._last_progress.pop(job_id, None)
+        self._send({"event": event, "job": job, "copy_status": copy_status, "ts": time.time()})
+
+    def progress(self, job_id: Any, job: dict | Callable[[], dict | None],
+                 copy_status: dict | Callable[[], dict]) -> bool:
+        """Publish a progress event if the job's coalescing interval has elapsed.
+
+        ``job`` and ``copy_status`` may be callables so the job record and the
+        aggregate snapshot are only built when an event is actually sent.
+        Returns True if an event was sent.
+        """
+        now = time.monotonic()
+        interval_s = self.interval_s
+        with self._lock:
+            last = self._last_progress.get(job_id, 0.0)
+            if now - last < interval_s:
+                return False
+            self._last_progress[job_id] = now
+        record = job() if callable(job) else job
+        if record is None:
+            return False
+        status = copy_status() if callable(copy_status) else copy_status
+        self._send({"event": "progress", "job": dict(record), "copy_status": status, "ts": time.time()})
+        return True
@@ -0,0 +1,160 @@
+"""
+Arena Copy I/O
+
+Purpose: The byte-moving part of a cache copy, tuned for multi-GB .part files:
+preallocation, page-cache hygiene and an optional O_DIRECT mode.
+
+Notes:
+- posix_fallocate reserves the whole file before the first write: extents
+  stay contiguous, and a full SSD fails the copy at once instead of at 90%.
+- posix_fadvise(SEQUENTIAL) on the source asks for aggressive readahead.
+  Every ``window_bytes`` the written range is flushed (fdatasync) and dropped
+  with DONTNEED, and so is the consumed source range, so a 40 GB copy does
+  not push the models ComfyUI is using out of the page cache. The flush also
+  bounds how much dirty data the kernel writes back in one burst.
+- O_DIRECT (optional) bypasses the page cache for writes. It needs aligned
+  buffers and lengths: the buffer is an anonymous mmap (page aligned), reads
+  fill it completely, and the last block is padded and truncated back.
+  Filesystems that refuse O_DIRECT (tmpfs, some FUSE mounts) get buffered
+  writes instead.
+- Every hint is best effort: without posix_fadvise/posix_fallocate (Windows,
+  macOS) or on filesystems that do not support them, the copy behaves as a
+  plain read/write loop.
+"""
+
+from __future__ import annotations
+
+import errno
+import mmap
+import os
+from dataclasses import dataclass
+
+
+MB = 1024 * 1024
+_ALIGN = 4096
+
+
+@dataclass
+class CopyOptions:
+    chunk_size: int = 1 * MB
+    preallocate: bool = True
+    drop_cache: bool = True
+    direct: bool = False
+    window_bytes: int = 64 * MB
+
+
+def _advise(fd: int | None, offset: int, length: int, name: str) -> None:
+    advice = getattr(os, name, None)
+    if fd is None or advice is None or not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        os.posix_fadvise(fd, offset, length, advice)
+    except OSError:
+        pass
+
+
+def _preallocate(fd: int, size: int) -> bool:
+    if size <= 0 or not hasattr(os, "posix_fallocate"):
+        return False
+    try:
+        os.posix_fallocate(fd, 0, size)
+        return True
+    except OSError as e:
+        # RU: Нет места - ошибка копии сразу; EOPNOTSUPP/EINVAL (ФС не умеет) - просто без резерва
+        if e.errno == errno.ENOSPC:
+            raise
+        return False
+
+
+def _open_dest(dest_path: str, direct: bool) -> tuple[int, bool]:
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+    if direct and hasattr(os, "O_DIRECT"):
+        try:
+            return os.open(dest_path, flags | os.O_DIRECT, 0o644), True
+        except OSError:
+            pass
+    return os.open(dest_path, flags, 0o644), False
+
+
+def _fileno(f) -> int | None:
+    try:
+        return f.fileno()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def _fill(src, view: memoryview) -> int:
+    """Read until the buffer is full or EOF (short reads would misalign O_DIRECT writes)."""
+    filled = 0
+    while filled < len(view):
+        n = src.readinto(view[filled:])
+        if not n:
+            break
+        filled += n
+    return filled
+
+
+def _write_all(fd: int, data: memoryview) -> None:
+    while data:
+        written = os.write(fd, data)
+        data = data[written:]
+
+
+def _drop_window(fd: int, src_fd: int | None, start: int, end: int, direct: bool) -> None:
+    if not hasattr(os, "posix_fadvise"):
+        return
+    if not direct:
+        # RU: DONTNEED не выбрасывает грязные страницы - сначала сбрасываем окно на диск
+        os.fdatasync(fd)
+        _advise(fd, start, end - start, "POSIX_FADV_DONTNEED")
+    _advise(src_fd, start, end - start, "POSIX_FADV_DONTNEED")
+
+
+def copy_stream(src, dest_path: str, total_size: int, options: CopyOptions | None = None,
+                on_progress=None, hasher=None) -> int:
+    """Copy the open binary file ``src`` to ``dest_path``; returns bytes copied.
+
+    ``on_progress(copied)`` is called after every chunk, ``hasher.update()`` with every chunk.
+    """
+    options = options or CopyOptions()
+    src_fd = _fileno(src)
+    _advise(src_fd, 0, 0, "POSIX_FADV_SEQUENTIAL")
+
+    fd, direct = _open_dest(dest_path, options.direct)
+    chunk_size = max(_ALIGN, (options.chunk_size + _ALIGN - 1) // _ALIGN * _ALIGN)
+    buf = mmap.mmap(-1, chunk_size)
+    view = memoryview(buf)
+    try:
+        preallocated = options.preallocate and _preallocate(fd, total_size)
+        copied = 0
+        dropped = 0
+        while True:
+            n = _fill(src, view)
+            if not n:
+                break
+            if hasher is not None:
+                hasher.update(view[:n])
+            if direct and n % _ALIGN:
+                # RU: Хвост O_DIRECT дополняется до блока и обрезается ftruncate после цикла
+                padded = (n + _ALIGN - 1) // _ALIGN * _ALIGN
+                view[n:padded] = bytes(padded - n)
+                _write_all(fd, view[:padded])
+            else:
+                _write_all(fd, view[:n])
+            copied += n
+            if on_progress is not None:
+                on_progress(copied)
+            if options.drop_cache and copied - dropped >= options.window_bytes:
+                _drop_window(fd, src_fd, dropped, copied, direct)
+                dropped = copied
+            if n < chunk_size:
+                break
+        if (direct and copied % _ALIGN) or (preallocated and copied < total_size):
+            os.ftruncate(fd, copied)
+        if options.drop_cache and copied > dropped:
+            _drop_window(fd, src_fd, dropped, copied, direct)
+    finally:
+        view.release()
+        buf.close()
+        os.close(fd)
+    return copied
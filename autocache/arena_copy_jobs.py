@@ -0,0 +1,280 @@
+"""
+Arena Copy Jobs
+
+Purpose: Thread-safe registry of cache copy jobs. Replaces the single global
+status dict that parallel copy workers used to overwrite.
+
+Notes:
+- Every job is registered when it is queued, so queue depth is exact.
+- All mutations and snapshot() go through one lock; snapshot() returns plain
+  dicts that are safe to serialize after the lock is released.
+- snapshot() keeps the legacy flat fields (is_copying, current_file, ...)
+  aggregated over all active jobs, so existing UI code keeps working.
+- eta_for()/wait() let a caller block on a job (loader waiting for its copy).
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+
+
+QUEUED = "queued"
+COPYING = "copying"
+DONE = "done"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+_FINISHED_STATES = (DONE, FAILED, SKIPPED)
+
+
+@dataclass
+class CopyJob:
+    """State of one copy job."""
+
+    job_id: int
+    category: str
+    filename: str
+    source: str
+    destination: str
+    state: str = QUEUED
+    worker: str = ""
+    bytes_total: int = 0
+    bytes_done: int = 0
+    queued_at: float = 0.0
+    started_at: float = 0.0
+    finished_at: float = 0.0
+    error: str = ""
+
+    def throughput_bps(self, now: float) -> float:
+        """Average bytes/s since the copy started."""
+        if not self.started_at:
+            return 0.0
+        end = self.finished_at or now
+        elapsed = end - self.started_at
+        return self.bytes_done / elapsed if elapsed > 0 else 0.0
+
+    def to_dict(self, now: float) -> dict:
+        data = asdict(self)
+        throughput = self.throughput_bps(now)
+        remaining = max(0, self.bytes_total - self.bytes_done)
+        data["progress"] = int(self.bytes_done * 100 / self.bytes_total) if self.bytes_total else 0
+        data["throughput_bps"] = throughput
+        data["eta_s"] = remaining / throughput if self.state == COPYING and throughput > 0 else None
+        return data
+
+
+class CopyJobRegistry:
+    """Registry of queued, active and recently finished copy jobs."""
+
+    def __init__(self, history_size: int = 50, throughput_alpha: float = 0.3) -> None:
+        self._lock = threading.Lock()
+        self._finished = threading.Condition(self._lock)
+        self._jobs: dict[int, CopyJob] = {}
+        self._history: deque[CopyJob] = deque(maxlen=history_size)
+        self._next_id = 1
+        self._alpha = throughput_alpha
+
+        self.total_jobs = 0
+        self.completed_jobs = 0
+        self.failed_jobs = 0
+        self.skipped_jobs = 0
+        self.bytes_copied = 0
+        self.avg_throughput_bps = 0.0  # RU: EWMA по завершенным копиям
+        self.last_update = 0.0
+
+    # ------------------------------------------------------------------ lifecycle
+
+    def enqueue(self, category: str, filename: str, source: str, destination: str, bytes_total: int = 0) -> int:
+        """Register a queued job and return its id (``bytes_total`` if already known, for ETAs)."""
+        with self._lock:
+            job_id = self._next_id
+            self._next_id += 1
+            now = time.time()
+            self._jobs[job_id] = CopyJob(
+                job_id=job_id,
+                category=category,
+                filename=filename,
+                source=str(source),
+                destination=str(destination),
+                bytes_total=bytes_total,
+                queued_at=now,
+            )
+            self.total_jobs += 1
+            self.last_update = now
+            return job_id
+
+    def start(self, job_id: int, worker: str, bytes_total: int) -> dict:
+        """Mark a job as copying; returns the job as a dict."""
+        with self._lock:
+            job = self._jobs[job_id]
+            now = time.time()
+            job.state = COPYING
+            job.worker = worker
+            job.bytes_total = bytes_total
+            job.bytes_done = 0
+            job.started_at = now
+            self.last_update = now
+            return job.to_dict(now)
+
+    def advance(self, job_id: int, bytes_done: int) -> None:
+        """Record copy progress for a job."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.bytes_done = bytes_done
+                self.last_update = time.time()
+
+    def finish(self, job_id: int) -> dict | None:
+        """Mark a job as done and fold its throughput into the running average; None if the job already ended (ids are not reused)."""
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+            if job is None:
+                return None
+            now = time.time()
+            job.state = DONE
+            job.finished_at = now
+            self.completed_jobs += 1
+            self.bytes_copied += job.bytes_done
+            throughput = job.throughput_bps(now)
+            if throughput > 0:
+                if self.avg_throughput_bps:
+                    self.avg_throughput_bps += self._alpha * (throughput - self.avg_throughput_bps)
+                else:
+                    self.avg_throughput_bps = throughput
+            self._history.append(job)
+            self.last_update = now
+            self._finished.notify_all()
+            return job.to_dict(now)
+
+    def fail(self, job_id: int, error: str) -> dict | None:
+        """Mark a job as failed; None if the job already ended (ids are not reused)."""
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+            if job is None:
+                return None
+            now = time.time()
+            job.state = FAILED
+            job.error = error
+            job.finished_at = now
+            self.failed_jobs += 1
+            self._history.append(job)
+            self.last_update = now
+            self._finished.notify_all()
+            return job.to_dict(now)
+
+    def skip(self, job_id: int, reason: str) -> dict | None:
+        """Mark a job as skipped (already cached, too small, ...); None if the job already ended (ids are not reused)."""
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+            if job is None:
+                return None
+            now = time.time()
+            job.state = SKIPPED
+            job.error = reason
+            job.finished_at = now
+            self.skipped_jobs += 1
+            self._history.append(job)
+            self.last_update = now
+            self._finished.notify_all()
+            return job.to_dict(now)
+
+    # ------------------------------------------------------------------ waiting
+
+    def get(self, job_id: int) -> dict | None:
+        """The job as a dict (active or recently finished), or None."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                job = next((j for j in reversed(self._history) if j.job_id == job_id), None)
+            return job.to_dict(time.time()) if job is not None else None
+
+    def find(self, category: str, filename: str) -> int | None:
+        """Id of the queued or active job for a model, if any."""
+        with self._lock:
+            for job in self._jobs.values():
+                if job.category == category and job.filename == filename:
+                    return job.job_id
+            return None
+
+    def eta_for(self, job_id: int) -> float | None:
+        """Seconds until ``job_id`` completes: bytes left in it and all jobs queued before it
+        over the measured throughput. 0 if it is finished, None if there is no measurement yet."""
+        with self._lock:
+            if job_id not in self._jobs:
+                return 0.0
+            now = time.time()
+            jobs = self._jobs.values()
+            live = sum(j.throughput_bps(now) for j in jobs if j.state == COPYING)
+            throughput = live if live > 0 else self.avg_throughput_bps
+            if throughput <= 0:
+                return None
+            remaining = sum(max(0, j.bytes_total - j.bytes_done) for j in jobs if j.job_id <= job_id)
+            return remaining / throughput
+
+    def wait(self, job_id: int, timeout: float) -> dict | None:
+        """Block until the job finishes; returns it as a dict, or None on timeout."""
+        deadline = time.monotonic() + timeout
+        with self._finished:
+            while job_id in self._jobs:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._finished.wait(remaining)
+            now = time.time()
+            for job in reversed(self._history):
+                if job.job_id == job_id:
+                    return job.to_dict(now)
+            return {"job_id": job_id, "state": DONE}
+
+    # ------------------------------------------------------------------ reading
+
+    def measured_throughput_bps(self) -> float:
+        """Best current throughput estimate: live copies if any, else the EWMA."""
+        with self._lock:
+            now = time.time()
+            active = [j.throughput_bps(now) for j in self._jobs.values() if j.state == COPYING]
+            live = sum(active)
+            return live if live > 0 else self.avg_throughput_bps
+
+    def snapshot(self) -> dict:
+        """Consistent point-in-time view of all jobs and aggregates."""
+        with self._lock:
+            now = time.time()
+            active = [j for j in self._jobs.values() if j.state == COPYING]
+            queued = [j for j in self._jobs.values() if j.state == QUEUED]
+
+            active_total = sum(j.bytes_total for j in active)
+            active_done = sum(j.bytes_done for j in active)
+            throughput = sum(j.throughput_bps(now) for j in active)
+
+            if not active:
+                current_file = ""
+            elif len(active) == 1:
+                current_file = active[0].filename
+            else:
+                current_file = f"{active[0].filename} (+{len(active) - 1} more)"
+
+            return {
+                "jobs": [j.to_dict(now) for j in sorted(active + queued, key=lambda j: j.job_id)],
+                "recent": [j.to_dict(now) for j in self._history],
+                "queue_depth": len(queued),
+                "active_jobs": len(active),
+                "total_jobs": self.total_jobs,
+                "completed_jobs": self.completed_jobs,
+                "failed_jobs": self.failed_jobs,
+                "skipped_jobs": self.skipped_jobs,
+                "bytes_copied": self.bytes_copied,
+                "throughput_bps": throughput,
+                "avg_throughput_bps": self.avg_throughput_bps,
+                "eta_s": (active_total - active_done) / throughput if throughput > 0 else None,
+                "last_update": self.last_update,
+                # RU: Плоские поля для совместимости с UI индикатором (агрегат по активным копиям)
+                "is_copying": bool(active),
+                "current_file": current_file,
+                "current_file_size": active_total,
+                "current_file_copied": active_done,
+                "current_file_progress": int(active_done * 100 / active_total) if active_total else 0,
+            }
@@ -0,0 +1,244 @@
+"""
+Arena Env Watcher
+
+Purpose: Notify Arena AutoCache when user/arena_autocache.env changes, without
+waking up every second.
+
+Notes:
+- Linux: inotify through ctypes (no extra dependency), watching the parent
+  directory so editor "save via rename" is caught as well.
+- Elsewhere (or if inotify is unavailable): stat-only polling of a single known
+  path with exponential backoff while the file is unchanged, capped at
+  ``poll_max_s`` (default 2 s, so an edit after a long idle period still
+  applies within about 2 s) and reset to ``poll_min_s`` after every change.
+- Bursts of events are debounced into a single callback.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import Callable
+
+
+# inotify constants (linux/inotify.h)
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (
+    _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO
+    | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF | _IN_MOVE_SELF
+)
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+def _load_libc_inotify():
+    """Return libc with inotify symbols, or None when unavailable."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_init1.restype = ctypes.c_int
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_add_watch.restype = ctypes.c_int
+        return libc
+    except Exception:
+        return None
+
+
+def _stat_signature(path: Path) -> tuple[int, int, int] | None:
+    """Cheap change signature (mtime_ns, size, inode); None if the file is missing."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class EnvFileWatcher:
+    """Background watcher for a single settings file.
+
+    ``on_change`` is called from the watcher thread once per debounced burst of
+    changes (including creation and deletion of the file).
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        on_change: Callable[[], None],
+        *,
+        debounce_s: float = 0.3,
+        poll_min_s: float = 0.5,
+        poll_max_s: float = 2.0,
+        use_inotify: bool = True,
+    ) -> None:
+        self.path = Path(path)
+        self.on_change = on_change
+        self.debounce_s = max(0.0, debounce_s)
+        self.poll_min_s = max(0.05, poll_min_s)
+        self.poll_max_s = max(self.poll_min_s, poll_max_s)
+        self.use_inotify = use_inotify
+        self.backend = "none"
+
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._wake_r: int | None = None
+        self._wake_w: int | None = None
+
+    # ------------------------------------------------------------------ control
+
+    def start(self) -> None:
+        """Start the watcher thread (idempotent)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+
+        inotify_fd = self._open_inotify() if self.use_inotify else None
+        if inotify_fd is not None:
+            self.backend = "inotify"
+            self._wake_r, self._wake_w = os.pipe()
+            target = lambda: self._run_inotify(inotify_fd)  # noqa: E731
+        else:
+            self.backend = "poll"
+            target = self._run_poll
+
+        self._thread = threading.Thread(target=target, daemon=True, name="ArenaEnvWatcher")
+        self._thread.start()
+
+    def stop(self, timeout: float | None = 2.0) -> None:
+        """Stop the watcher thread and release OS resources."""
+        self._stop_event.set()
+        if self._wake_w is not None:
+            try:
+                os.write(self._wake_w, b"x")
+            except OSError:
+                pass
+        thread = self._thread
+        if thread and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(timeout)
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    # ------------------------------------------------------------------ helpers
+
+    def _fire(self) -> None:
+        try:
+            self.on_change()
+        except Exception as e:
+            print(f"[ArenaAutoCache] Env watcher callback error: {e}")
+
+    def _open_inotify(self) -> int | None:
+        libc = _load_libc_inotify()
+        if libc is None or not self.path.parent.is_dir():
+            return None
+        fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            return None
+        wd = libc.inotify_add_watch(fd, os.fsencode(str(self.path.parent)), _WATCH_MASK)
+        if wd < 0:
+            os.close(fd)
+            return None
+        return fd
+
+    def _drain_inotify(self, fd: int) -> bool:
+        """Read pending events; return True if any concerns the watched file."""
+        relevant = False
+        name = os.fsencode(self.path.name)
+        while True:
+            try:
+                buf = os.read(fd, 64 * 1024)
+            except BlockingIOError:
+                return relevant
+            except OSError:
+                return relevant
+            if not buf:
+                return relevant
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(buf):
+                _wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(buf, offset)
+                offset += _EVENT_HEADER.size
+                event_name = buf[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if event_name == name or mask & (_IN_DELETE_SELF | _IN_MOVE_SELF):
+                    relevant = True
+
+    # ------------------------------------------------------------------ loops
+
+    def _run_inotify(self, fd: int) -> None:
+        wake_r = self._wake_r
+        try:
+            while not self._stop_event.is_set():
+                readable, _, _ = select.select([fd, wake_r], [], [])
+                if wake_r in readable or self._stop_event.is_set():
+                    break
+                if not self._drain_inotify(fd):
+                    continue
+                # RU: Debounce - ждём тишины debounce_s после последнего события
+                while not self._stop_event.is_set():
+                    readable, _, _ = select.select([fd, wake_r], [], [], self.debounce_s)
+                    if wake_r in readable:
+                        return
+                    if not readable:
+                        break
+                    self._drain_inotify(fd)
+                if not self._stop_event.is_set():
+                    self._fire()
+        except Exception as e:
+            print(f"[ArenaAutoCache] inotify watcher failed ({e}), falling back to polling")
+            if not self._stop_event.is_set():
+                self.backend = "poll"
+                self._run_poll()
+        finally:
+            for handle in (fd, self._wake_r, self._wake_w):
+                if handle is not None:
+                    try:
+                        os.close(handle)
+                    except OSError:
+                        pass
+            self._wake_r = self._wake_w = None
+
+    def _run_poll(self) -> None:
+        last = _stat_signature(self.path)
+        interval = self.poll_min_s
+        while not self._stop_event.wait(interval):
+            current = _stat_signature(self.path)
+            if current == last:
+                interval = min(interval * 2, self.poll_max_s)
+                continue
+            # RU: Debounce - ждём, пока сигнатура файла перестанет меняться
+            while not self._stop_event.wait(self.debounce_s):
+                settled = _stat_signature(self.path)
+                if settled == current:
+                    break
+                current = settled
+            if self._stop_event.is_set():
+                return
+            last = current
+            interval = self.poll_min_s
+            self._fire()
+
+
+def debounce_from_env(default_ms: int = 300) -> float:
+    """Read ARENA_ENV_WATCH_DEBOUNCE_MS (milliseconds) as seconds."""
+    try:
+        return max(0, int(os.environ.get("ARENA_ENV_WATCH_DEBOUNCE_MS", str(default_ms)))) / 1000.0
+    except ValueError:
+        return default_ms / 1000.0
@@ -0,0 +1,206 @@
+"""
+Arena Event Log
+
+Purpose: Structured, rotating JSONL log of cache events (resolve, hit, miss,
+copy_start, copy_end, evict, scan, settings) for offline analysis and replay.
+
+Notes:
+- Disabled by default; emit() is a single attribute check when off.
+- emit() never blocks: events go to a bounded queue and are dropped (and
+  counted) when it is full. One daemon thread batches writes to disk.
+- ``size_path`` lets callers defer the stat() for an event's size to the
+  writer thread, keeping the resolver hot path free of extra syscalls.
+- Size-based rotation: events.jsonl -> events.jsonl.1 -> ... -> .N.
+- If the writer dies (unwritable path, disk full) the log disables itself;
+  close() never waits longer than its timeout.
+
+Record shape (one JSON object per line):
+    {"ts": 1712345678.123, "event": "hit", "key": "loras/foo.safetensors",
+     "size": 151234567, "latency_ms": 0.21, ...extra fields}
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+
+
+EVENTS = ("resolve", "hit", "miss", "copy_start", "copy_end", "evict", "scan", "settings")
+
+_STOP = object()
+
+
+class EventLog:
+    """Non-blocking JSONL event writer with size-based rotation."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.path: Path | None = None
+        self.max_bytes = 50 * 1024 * 1024
+        self.backups = 3
+        self.dropped = 0
+        self.written = 0
+
+        self._queue: queue.Queue | None = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------ control
+
+    def configure(
+        self,
+        path: Path | None,
+        *,
+        max_bytes: int = 50 * 1024 * 1024,
+        backups: int = 3,
+        queue_size: int = 10000,
+    ) -> None:
+        """Enable logging to ``path`` (or disable with None); restarts the writer if the target changed."""
+        with self._lock:
+            target = Path(path) if path else None
+            same = (
+                target == self.path
+                and self.enabled == (target is not None)
+                and self._queue is not None
+                and self._queue.maxsize == max(1, queue_size)
+            )
+            self.max_bytes = max(0, int(max_bytes))
+            self.backups = max(0, int(backups))
+            if same:
+                return
+            self._stop_locked()
+            self.path = target
+            if target is None:
+                return
+            target.parent.mkdir(parents=True, exist_ok=True)
+            self._queue = queue.Queue(maxsize=max(1, queue_size))
+            self._thread = threading.Thread(
+                target=self._run, args=(self._queue, target), daemon=True, name="ArenaEventLog"
+            )
+            self._thread.start()
+            self.enabled = True
+
+    def close(self, timeout: float | None = 2.0) -> None:
+        """Flush pending events and stop the writer thread."""
+        with self._lock:
+            self._stop_locked(timeout)
+
+    def _stop_locked(self, timeout: float | None = 2.0) -> None:
+        self.enabled = False
+        q, thread = self._queue, self._thread
+        self._queue = self._thread = None
+        if q is None or thread is None or not thread.is_alive():
+            return
+        # RU: Маркер остановки ждет места в очереди не дольше timeout; если писатель завис, не блокируемся навсегда
+        try:
+            q.put(_STOP, timeout=timeout)
+        except queue.Full:
+            print("[ArenaAutoCache] Event log writer is not draining; pending events dropped")
+            return
+        if thread is not threading.current_thread():
+            thread.join(timeout)
+
+    # ------------------------------------------------------------------ emit
+
+    def emit(
+        self,
+        event: str,
+        key: str = "",
+        *,
+        size: int | None = None,
+        latency_ms: float | None = None,
+        size_path: str | None = None,
+        **fields,
+    ) -> None:
+        """Queue one event; returns immediately and drops the event if the queue is full."""
+        if not self.enabled:
+            return
+        record = {"ts": time.time(), "event": event, "key": key, "size": size, "latency_ms": latency_ms}
+        record.update(fields)
+        q = self._queue
+        if q is None:
+            return
+        try:
+            q.put_nowait((record, size_path))
+        except queue.Full:
+            self.dropped += 1
+
+    # ------------------------------------------------------------------ writer
+
+    def _rotate(self, path: Path) -> None:
+        if self.backups <= 0:
+            path.unlink(missing_ok=True)
+            return
+        for i in range(self.backups - 1, 0, -1):
+            older = path.with_name(f"{path.name}.{i}")
+            if older.exists():
+                os.replace(older, path.with_name(f"{path.name}.{i + 1}"))
+        os.replace(path, path.with_name(f"{path.name}.1"))
+
+    def _run(self, q: queue.Queue, path: Path) -> None:
+        f = None
+        try:
+            f = open(path, "a", encoding="utf-8")
+            while True:
+                batch = [q.get()]
+                # RU: Забираем все накопившееся одним пакетом - одна запись/flush на пакет
+                while len(batch) < 1000:
+                    try:
+                        batch.append(q.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = False
+                for item in batch:
+                    if item is _STOP:
+                        stop = True
+                        continue
+                    record, size_path = item
+                    if size_path and record.get("size") is None:
+                        try:
+                            record["size"] = os.path.getsize(size_path)
+                        except OSError:
+                            pass
+                    f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                    self.written += 1
+                    if self.max_bytes and f.tell() >= self.max_bytes:
+                        f.close()
+                        self._rotate(path)
+                        f = open(path, "a", encoding="utf-8")
+                f.flush()
+                if stop:
+                    return
+        except Exception as e:
+            print(f"[ArenaAutoCache] Event log writer stopped: {e}")
+        finally:
+            if f is not None:
+                f.close()
+            # RU: Писатель умер - выключаем лог, чтобы emit() не копил очередь, и освобождаем ее
+            if self._queue is q:
+                self.enabled = False
+                self._queue = None
+            while True:
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    break
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "path": str(self.path) if self.path else None,
+            "written": self.written,
+            "dropped": self.dropped,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+        }
+
+
+EVENT_LOG = EventLog()
+
+
+def emit(event: str, key: str = "", **kwargs) -> None:
+    """Emit an event to the process-wide log (no-op while disabled)."""
+    EVENT_LOG.emit(event, key, **kwargs)
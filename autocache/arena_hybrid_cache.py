@@ -126,8 +126,16 @@ class ArenaHybridCache:
             # Try smart cache first if enabled
             if self._should_use_smart_cache(category, filename, original_path):
                 try:
+                    # Uncompressed entries are used in place - no copy to a temp file
+                    cached_path = self.smart_cache.get_model_path(category, filename)
+                    if cached_path:
+                        if self.config.track_migration_stats:
+                            self.config.migration_stats["smart_cache_hits"] += 1
+                        print(f"[ArenaHybridCache] Smart cache hit: {filename}")
+                        return cached_path
+
                     model_data = self.smart_cache.get_model(category, filename)
-                    if model_data:
+                    if model_data is not None:
                         # Smart cache hit
                         if self.config.track_migration_stats:
                             self.config.migration_stats["smart_cache_hits"] += 1
@@ -170,8 +178,8 @@ class ArenaHybridCache:
                 self.config.migration_stats["original_cache_misses"] += 1
             return None
     
-    def _save_temp_model(self, model_data: bytes, filename: str) -> str:
-        """Save model data to temporary file"""
+    def _save_temp_model(self, model_data, filename: str) -> str:
+        """Save decoded model data (bytes or memoryview) to a temporary file"""
         import tempfile
         temp_dir = Path(tempfile.gettempdir()) / "arena_hybrid_cache"
         temp_dir.mkdir(exist_ok=True)
@@ -335,10 +343,8 @@ if __name__ == "__main__":
     
     # Test workflow analysis
     workflow = {
-        "nodes": {
-            "1": {"inputs": {"model": "large_model.pt"}},
-            "2": {"inputs": {"model": "small_model.pt"}}
-        }
+        "1": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "large_model.safetensors"}},
+        "2": {"class_type": "LoraLoader", "inputs": {"lora_name": "small_model.safetensors"}}
     }
     
     models = cache.analyze_workflow(workflow)
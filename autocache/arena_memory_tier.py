@@ -0,0 +1,113 @@
+"""
+Arena Memory Tier
+
+Purpose: Byte-bounded LRU used as the RAM (L1) tier of the smart cache.
+
+Notes:
+- Bounded by the real payload size (buffer nbytes for bytes/bytearray/
+  memoryview, sys.getsizeof otherwise), not by the number of entries.
+- OrderedDict order is recency: a hit moves the key to the end, eviction
+  pops the front, both O(1).
+- Admission: entries larger than ``max_item_bytes`` (default: half the
+  budget) are never stored in RAM, so one multi-GB model cannot flush the
+  whole tier; such entries stay on L2/L3.
+- Thread-safe; operations are short dictionary updates under one lock.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+from collections import OrderedDict
+
+
+def payload_size(data) -> int:
+    """Bytes an entry occupies in RAM."""
+    try:
+        with memoryview(data) as view:
+            return view.nbytes
+    except TypeError:
+        return sys.getsizeof(data)
+
+
+class MemoryTier:
+    """LRU mapping key -> payload with a byte budget."""
+
+    def __init__(self, max_bytes: int, max_item_bytes: int | None = None) -> None:
+        self.max_bytes = max(0, int(max_bytes))
+        self.max_item_bytes = self.max_bytes // 2 if max_item_bytes is None else max(0, int(max_item_bytes))
+        self.bytes_used = 0
+        self.evictions = 0
+        self.rejected = 0
+        self._entries: OrderedDict[str, tuple[object, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str):
+        """Payload for ``key`` (marked most recently used), or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: str, data) -> bool:
+        """Store ``data``, evicting LRU entries as needed; False if it is not admitted."""
+        size = payload_size(data)
+        with self._lock:
+            self._pop_locked(key)
+            if size > self.max_item_bytes or size > self.max_bytes:
+                self.rejected += 1
+                return False
+            while self._entries and self.bytes_used + size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes_used -= evicted_size
+                self.evictions += 1
+            self._entries[key] = (data, size)
+            self.bytes_used += size
+            return True
+
+    def _pop_locked(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self.bytes_used -= entry[1]
+        return entry[0]
+
+    def pop(self, key: str):
+        """Remove ``key``; returns its payload or None."""
+        with self._lock:
+            return self._pop_locked(key)
+
+    def evict_lru(self) -> str | None:
+        """Drop the least recently used entry; returns its key."""
+        with self._lock:
+            if not self._entries:
+                return None
+            key, (_, size) = self._entries.popitem(last=False)
+            self.bytes_used -= size
+            self.evictions += 1
+            return key
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes_used = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes_used,
+                "max_bytes": self.max_bytes,
+                "max_item_bytes": self.max_item_bytes,
+                "evictions": self.evictions,
+                "rejected": self.rejected,
+            }
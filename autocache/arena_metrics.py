@@ -0,0 +1,213 @@
+"""
+Arena Metrics
+
+Purpose: Minimal Prometheus text-format metrics (counters, gauges, histograms)
+for the Arena cache, served by /arena/metrics. Stdlib only, so no extra
+dependency is required on render nodes.
+
+Notes:
+- Metrics are module-level singletons registered in REGISTRY.
+- State gauges (queue depth, cache occupancy) are set right before rendering
+  by the scrape handler, so hot paths never update them.
+- Exposition format: https://prometheus.io/docs/instrumenting/exposition_formats/
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+from typing import Iterable
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _labels(self, labelvalues: tuple) -> tuple[str, ...]:
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {labelvalues}")
+        return tuple(str(v) for v in labelvalues)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> None:
+        super().__init__(name, help_text, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labelvalues, amount: float = 1.0) -> None:
+        key = self._labels(labelvalues)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        if not items and not self.labelnames:
+            items = [((), 0.0)]
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items
+        ]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> None:
+        super().__init__(name, help_text, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def set(self, value: float, *labelvalues) -> None:
+        key = self._labels(labelvalues)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items
+        ]
+
+
+class Histogram(_Metric):
+    """Cumulative histogram with fixed upper bounds."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        buckets: Iterable[float],
+        labelnames: Iterable[str] = (),
+    ) -> None:
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        # RU: На каждый набор меток: счетчики по бакетам (+Inf последний), сумма, количество
+        self._series: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labelvalues) -> None:
+        key = self._labels(labelvalues)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._series[key] = series
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._series.items())
+        lines = self.header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Ordered collection of metrics rendered together."""
+
+    def __init__(self) -> None:
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REGISTRY = MetricsRegistry()
+
+_LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+_COPY_SECONDS_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1200, 3600)
+_MB = 1024 * 1024
+_THROUGHPUT_BUCKETS = (10 * _MB, 25 * _MB, 50 * _MB, 100 * _MB, 200 * _MB, 400 * _MB, 800 * _MB, 1600 * _MB, 3200 * _MB)
+_SCAN_SECONDS_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+RESOLVER_CALLS = REGISTRY.register(Counter(
+    "arena_resolver_calls_total", "folder_paths.get_full_path calls handled by Arena, by result", ("result",)))
+RESOLVER_LATENCY = REGISTRY.register(Histogram(
+    "arena_resolver_latency_seconds", "Latency added by the Arena get_full_path patch", _LATENCY_BUCKETS, ("result",)))
+CACHE_HITS = REGISTRY.register(Counter(
+    "arena_cache_hits_total", "Model loads served from the SSD cache", ("category",)))
+CACHE_MISSES = REGISTRY.register(Counter(
+    "arena_cache_misses_total", "Model loads served from the NAS/original path", ("category",)))
+COPY_JOBS = REGISTRY.register(Counter(
+    "arena_copy_jobs_total", "Finished cache copy jobs by final state", ("state",)))
+COPY_BYTES = REGISTRY.register(Counter(
+    "arena_copy_bytes_total", "Bytes copied into the SSD cache"))
+COPY_DURATION = REGISTRY.register(Histogram(
+    "arena_copy_duration_seconds", "Wall time of completed cache copies", _COPY_SECONDS_BUCKETS))
+COPY_THROUGHPUT = REGISTRY.register(Histogram(
+    "arena_copy_throughput_bytes_per_second", "Average throughput of completed cache copies", _THROUGHPUT_BUCKETS))
+COPY_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "arena_copy_queue_depth", "Copy jobs waiting for a worker"))
+COPY_ACTIVE = REGISTRY.register(Gauge(
+    "arena_copy_active_jobs", "Copy jobs currently running"))
+DEDUP_BYTES = REGISTRY.register(Counter(
+    "arena_dedup_bytes_total", "Bytes not stored because the content was already in the blob store"))
+MISS_WAITS = REGISTRY.register(Counter(
+    "arena_miss_waits_total", "Cache misses that waited for their copy, by outcome (cache/nas)", ("outcome",)))
+EVICTIONS = REGISTRY.register(Counter(
+    "arena_evictions_total", "Files evicted from the SSD cache by the size limit"))
+EVICTED_BYTES = REGISTRY.register(Counter(
+    "arena_evicted_bytes_total", "Bytes evicted from the SSD cache by the size limit"))
+NAS_SCAN_DURATION = REGISTRY.register(Histogram(
+    "arena_nas_scan_duration_seconds", "Duration of full NAS structure scans", _SCAN_SECONDS_BUCKETS))
+CACHE_OCCUPANCY = REGISTRY.register(Gauge(
+    "arena_cache_occupancy_bytes", "Bytes currently stored in the SSD cache"))
+CACHE_FILES = REGISTRY.register(Gauge(
+    "arena_cache_files", "Files currently stored in the SSD cache"))
+CACHE_LIMIT = REGISTRY.register(Gauge(
+    "arena_cache_limit_bytes", "Configured SSD cache size limit (0 = unlimited)"))
@@ -0,0 +1,89 @@
+"""
+Arena Model Store
+
+Purpose: Persistent metadata of smart-cache entries (model_id -> record), so
+compression flags, ratios, sizes, digests and access history survive a
+restart. Without it a restarted cache cannot tell that an L2 file is
+compressed.
+
+Notes:
+- One JSON file next to the tiers, read once at start and replaced
+  atomically (temporary file + os.replace), so readers never see a partial
+  file; a damaged file is treated as empty.
+- Structural changes (insert, clear) are saved at once; access statistics
+  only mark the store dirty and are saved at most every ``flush_interval_s``
+  (and on flush()), so hits do not rewrite the file.
+- Records are plain dicts; the cache converts them to and from ModelInfo.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+
+STORE_FILE = "model_info.json"
+_VERSION = 1
+
+
+class ModelInfoStore:
+    """JSON file of model_id -> metadata record."""
+
+    def __init__(self, path: Path, flush_interval_s: float = 5.0) -> None:
+        self.path = Path(path)
+        self.flush_interval_s = flush_interval_s
+        self.saves = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = 0.0
+
+    def load(self) -> dict[str, dict]:
+        """All records in one read; {} if the file is missing or unreadable."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        records = data.get("models") if isinstance(data, dict) else None
+        if not isinstance(records, dict):
+            return {}
+        return {str(k): v for k, v in records.items() if isinstance(v, dict)}
+
+    def mark_dirty(self) -> None:
+        self._dirty = True
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def due(self) -> bool:
+        """True if there are unsaved changes and the flush interval has passed."""
+        return self._dirty and time.monotonic() - self._saved_at >= self.flush_interval_s
+
+    def save(self, snapshot) -> None:
+        """Replace the file with the records returned by ``snapshot()``.
+
+        The dirty flag is cleared before the snapshot is taken, so a change made
+        while the file is being written is saved next time rather than lost.
+        """
+        with self._lock:
+            self._dirty = False
+            records = snapshot()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump({"version": _VERSION, "models": records}, f, separators=(",", ":"), default=str)
+                os.replace(tmp, self.path)
+            except OSError:
+                self._dirty = True
+                try:
+                    tmp.unlink()
+                except OSError:
+                    pass
+                raise
+            self._saved_at = time.monotonic()
+            self.saves += 1
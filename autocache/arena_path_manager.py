@@ -18,6 +18,9 @@ import time
 from pathlib import Path
 from typing import Dict, List
 
+from autocache.arena_event_log import emit as emit_event
+from autocache.arena_metrics import NAS_SCAN_DURATION
+
 
 _register_lock = threading.Lock()
 _cached_path_map: Dict[str, List[str]] | None = None
@@ -231,7 +234,11 @@ def scan_nas_structure(nas_root: str, use_cache: bool = True, min_size_mb: float
                     pass
     
     # Start universal scan from NAS root
+    scan_started = time.perf_counter()
     universal_scan_dir(root, 0)
+    scan_seconds = time.perf_counter() - scan_started
+    NAS_SCAN_DURATION.observe(scan_seconds)
+    emit_event("scan", str(root), latency_ms=scan_seconds * 1000.0, folders=len(all_found_paths))
     
     # Now categorize found paths based on KNOWN_CATEGORY_FOLDERS
     for category, subfolders in KNOWN_CATEGORY_FOLDERS.items():
@@ -0,0 +1,234 @@
+"""
+Arena Predictor
+
+Purpose: Predicts which models the next workflow run will load, from the
+model sets of previous runs, with a confidence score per model.
+
+Notes:
+- Three signals, all probabilities in [0, 1]:
+  * transition: first-order Markov between consecutive runs,
+    P(b in next run | a in this run), averaged over the current models;
+  * co-occurrence: P(b in the same run | a in the run), for models that are
+    usually loaded together with the current ones;
+  * popularity: share of runs that used b (the cold-start fallback).
+  confidence = 0.6 * transition + 0.3 * co-occurrence + 0.1 * popularity.
+- Exponential decay (``decay`` per observed run) lets the model follow
+  changing habits. It is applied lazily: each run is added with a weight that
+  grows by 1/decay, and all counts are rescaled when the weight gets large,
+  so an observation costs O(models in run x models in previous run).
+- Rows whose weight decays to almost nothing are dropped at rescale time and
+  the table is capped at ``max_models`` (least used models go first).
+- State is a JSON file (save()/load()), replaced atomically.
+- Models are keyed "category/filename"; workflow_model_keys() derives the
+  category from the loader input name (ckpt_name -> checkpoints, ...), the
+  same hints the queue prefetch of the node uses.
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import os
+import threading
+from pathlib import Path
+
+
+STATE_FILE = "predictor.json"
+W_TRANSITION = 0.6
+W_COOCCURRENCE = 0.3
+W_POPULARITY = 0.1
+_RESCALE_AT = 1e12
+_MIN_WEIGHT = 1e-4
+
+MODEL_FILE_EXTENSIONS = (".safetensors", ".ckpt", ".pt", ".pth", ".bin", ".gguf", ".sft", ".onnx")
+INPUT_CATEGORIES = {
+    "ckpt_name": "checkpoints",
+    "model": "checkpoints",
+    "lora_name": "loras",
+    "vae_name": "vae",
+    "clip_name": "text_encoders",
+    "unet_name": "diffusion_models",
+    "control_net_name": "controlnet",
+    "style_model_name": "style_models",
+    "upscale_model_name": "upscale_models",
+    "model_name": "upscale_models",
+}
+
+
+def workflow_model_keys(workflow: dict) -> list[str]:
+    """"category/filename" of every model a workflow loads.
+
+    Accepts the API prompt format ({node_id: {"class_type", "inputs"}}), a dict
+    with it under "prompt", or {"nodes": {node_id: {"inputs"}}}.
+    """
+    nodes = workflow.get("nodes") or workflow.get("prompt") or workflow
+    if isinstance(nodes, list):
+        nodes = dict(enumerate(nodes))
+    keys = []
+    for node in nodes.values() if isinstance(nodes, dict) else ():
+        if not isinstance(node, dict):
+            continue
+        for input_name, value in (node.get("inputs") or {}).items():
+            if not isinstance(value, str):
+                continue
+            # RU: clip_name1/clip_name2 используют подсказку clip_name
+            category = INPUT_CATEGORIES.get(input_name.rstrip("0123456789"))
+            if category is None or (input_name != "model" and not value.lower().endswith(MODEL_FILE_EXTENSIONS)):
+                continue
+            keys.append(f"{category}/{value}")
+    return list(dict.fromkeys(keys))
+
+
+class ModelPredictor:
+    """Co-occurrence + transition model over model sets of workflow runs."""
+
+    def __init__(self, decay: float = 0.98, max_models: int = 5000) -> None:
+        self.decay = min(1.0, max(0.5, decay))
+        self.max_models = max_models
+        self.observations = 0
+        self.last: list[str] = []
+        self._scale = 1.0  # weight of the next observation (lazy decay)
+        self._count: dict[str, float] = {}
+        self._total = 0.0
+        self._cooc: dict[str, dict[str, float]] = {}
+        self._trans: dict[str, dict[str, float]] = {}
+        self._trans_out: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------ learning
+
+    def observe(self, models) -> None:
+        """Record the model set of one workflow run (order does not matter)."""
+        current = list(dict.fromkeys(m for m in models if m))
+        if not current:
+            return
+        with self._lock:
+            w = self._scale
+            for a in current:
+                self._count[a] = self._count.get(a, 0.0) + w
+                row = self._cooc.setdefault(a, {})
+                for b in current:
+                    if b != a:
+                        row[b] = row.get(b, 0.0) + w
+            for a in self.last:
+                row = self._trans.setdefault(a, {})
+                for b in current:
+                    row[b] = row.get(b, 0.0) + w
+                self._trans_out[a] = self._trans_out.get(a, 0.0) + w
+            self._total += w
+            self.last = current
+            self.observations += 1
+            self._scale /= self.decay
+            if self._scale > _RESCALE_AT:
+                self._rescale_locked()
+
+    def _rescale_locked(self) -> None:
+        factor = 1.0 / self._scale
+        self._scale = 1.0
+        self._total *= factor
+
+        def scaled(table: dict[str, float]) -> dict[str, float]:
+            return {k: v * factor for k, v in table.items() if v * factor >= _MIN_WEIGHT}
+
+        self._count = scaled(self._count)
+        if len(self._count) > self.max_models:
+            keep = sorted(self._count, key=self._count.get, reverse=True)[:self.max_models]
+            self._count = {k: self._count[k] for k in keep}
+        known = self._count
+        self._trans_out = {k: v for k, v in scaled(self._trans_out).items() if k in known}
+        self._cooc = {a: {b: v for b, v in scaled(row).items() if b in known}
+                      for a, row in self._cooc.items() if a in known}
+        self._trans = {a: {b: v for b, v in scaled(row).items() if b in known}
+                       for a, row in self._trans.items() if a in self._trans_out}
+
+    # ------------------------------------------------------------------ prediction
+
+    def predict(self, current_models=None, k: int = 5, exclude_current: bool = False) -> list[tuple[str, float]]:
+        """Top ``k`` (model, confidence) for the run after one using ``current_models``.
+
+        Defaults to the last observed run.
+        """
+        current = list(dict.fromkeys(current_models if current_models is not None else self.last))
+        with self._lock:
+            if not self._total:
+                return []
+            known = [a for a in current if a in self._count]
+            transition: dict[str, float] = {}
+            cooccurrence: dict[str, float] = {}
+            for a in known:
+                out = self._trans_out.get(a)
+                if out:
+                    for b, w in self._trans.get(a, {}).items():
+                        transition[b] = transition.get(b, 0.0) + w / out
+                count = self._count[a]
+                for b, w in self._cooc.get(a, {}).items():
+                    cooccurrence[b] = cooccurrence.get(b, 0.0) + w / count
+            n = len(known) or 1
+            candidates = set(transition) | set(cooccurrence)
+            candidates.update(heapq.nlargest(k, self._count, key=self._count.get))
+            scores = []
+            for b in candidates:
+                if exclude_current and b in current:
+                    continue
+                confidence = (
+                    W_TRANSITION * transition.get(b, 0.0) / n
+                    + W_COOCCURRENCE * cooccurrence.get(b, 0.0) / n
+                    + W_POPULARITY * min(1.0, self._count.get(b, 0.0) / self._total)
+                )
+                scores.append((b, round(confidence, 6)))
+        scores.sort(key=lambda item: (-item[1], item[0]))
+        return scores[:k]
+
+    # ------------------------------------------------------------------ persistence
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            factor = 1.0 / self._scale
+
+            def scaled(table: dict[str, float]) -> dict[str, float]:
+                return {k: v * factor for k, v in table.items()}
+
+            return {
+                "version": 1,
+                "decay": self.decay,
+                "observations": self.observations,
+                "last": list(self.last),
+                "total": self._total * factor,
+                "count": scaled(self._count),
+                "cooc": {a: scaled(row) for a, row in self._cooc.items()},
+                "trans": {a: scaled(row) for a, row in self._trans.items()},
+                "trans_out": scaled(self._trans_out),
+            }
+
+    @classmethod
+    def from_dict(cls, data: dict, decay: float | None = None, max_models: int = 5000) -> "ModelPredictor":
+        predictor = cls(decay if decay is not None else float(data.get("decay", 0.98)), max_models)
+        predictor.observations = int(data.get("observations", 0))
+        predictor.last = [str(m) for m in data.get("last", [])]
+        predictor._total = float(data.get("total", 0.0))
+        predictor._count = {str(k): float(v) for k, v in data.get("count", {}).items()}
+        predictor._cooc = {str(a): {str(b): float(v) for b, v in row.items()} for a, row in data.get("cooc", {}).items()}
+        predictor._trans = {str(a): {str(b): float(v) for b, v in row.items()} for a, row in data.get("trans", {}).items()}
+        predictor._trans_out = {str(k): float(v) for k, v in data.get("trans_out", {}).items()}
+        return predictor
+
+    def save(self, path: str | os.PathLike) -> None:
+        path = Path(path)
+        data = self.to_dict()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str | os.PathLike, decay: float | None = None, max_models: int = 5000) -> "ModelPredictor":
+        """Predictor saved at ``path``, or an empty one if it is missing or unreadable."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                return cls.from_dict(data, decay, max_models)
+        except (OSError, ValueError, TypeError, AttributeError):
+            pass
+        return cls(decay if decay is not None else 0.98, max_models)
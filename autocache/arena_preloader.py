@@ -0,0 +1,206 @@
+"""
+Arena Preloader
+
+Purpose: Background speculative warming of predicted models, with its own byte
+budget, cancellation when the prediction changes, and hit-rate accounting.
+
+Notes:
+- The owner supplies two callbacks: ``plan(key)`` returns the bytes a load
+  would bring in (None if there is nothing to do: already warm, no source),
+  and ``load(key, cancelled)`` does the work, polling ``cancelled()`` and
+  raising PreloadCancelled to abort.
+- submit() replaces the plan. Queued keys that are no longer predicted are
+  dropped, and a load in progress for such a key is cancelled through its
+  ``cancelled()`` check.
+- Budget: bytes of speculatively loaded entries that have not been used yet.
+  A hit (on_access) or an eviction (on_evict) releases the entry's bytes, so
+  wrong guesses cannot keep pushing real data out of the cache.
+- One daemon worker at low priority: it lowers its own nice value where the
+  OS allows per-thread priorities (Linux), and waits for ``idle()`` (e.g. no
+  foreground loads in flight) before each item.
+- hit_rate = speculative entries used before eviction / speculative loads.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sys
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+class PreloadCancelled(Exception):
+    """Raised by a load callback when its key is no longer predicted."""
+
+
+class SpeculativePreloader:
+    """Single-worker queue of predicted keys, warmed within a byte budget."""
+
+    def __init__(self, plan, load, budget_bytes: int, idle=None, nice: int = 10) -> None:
+        self._plan = plan
+        self._load = load
+        self._idle = idle
+        self.budget_bytes = max(0, int(budget_bytes))
+        self.nice = nice
+        self._cond = threading.Condition()
+        self._queue: list[str] = []
+        self._wanted: set[str] = set()
+        self._speculative: dict[str, int] = {}  # key -> bytes, loaded and not used yet
+        self._current: str | None = None
+        self._thread: threading.Thread | None = None
+        self._closed = False
+        self.submitted = 0
+        self.preloaded = 0
+        self.preloaded_bytes = 0
+        self.hits = 0
+        self.wasted = 0
+        self.cancelled = 0
+        self.skipped_budget = 0
+        self.failed = 0
+
+    # ------------------------------------------------------------------ owner API
+
+    def submit(self, predictions) -> list[str]:
+        """Replace the plan with ``predictions`` (keys or (key, confidence), best first); returns queued keys."""
+        keys = [p[0] if isinstance(p, tuple) else p for p in predictions]
+        with self._cond:
+            self._wanted = set(keys)
+            self._queue = [k for k in dict.fromkeys(keys) if k not in self._speculative and k != self._current]
+            self.submitted += len(self._queue)
+            queued = list(self._queue)
+            if queued:
+                self._start_locked()
+            self._cond.notify_all()
+        return queued
+
+    def on_access(self, key: str) -> bool:
+        """Record a real use of ``key``; True if it was warmed speculatively (a prediction hit)."""
+        with self._cond:
+            if self._speculative.pop(key, None) is None:
+                return False
+            self.hits += 1
+            return True
+
+    def on_evict(self, key: str) -> None:
+        """A speculatively loaded entry left the cache before it was used."""
+        with self._cond:
+            if self._speculative.pop(key, None) is not None:
+                self.wasted += 1
+
+    def speculative_bytes(self) -> int:
+        with self._cond:
+            return sum(self._speculative.values())
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "queued": len(self._queue),
+                "submitted": self.submitted,
+                "preloaded": self.preloaded,
+                "preloaded_bytes": self.preloaded_bytes,
+                "hits": self.hits,
+                "wasted": self.wasted,
+                "cancelled": self.cancelled,
+                "skipped_budget": self.skipped_budget,
+                "failed": self.failed,
+                "speculative_bytes": sum(self._speculative.values()),
+                "budget_bytes": self.budget_bytes,
+                "hit_rate": self.hits / self.preloaded if self.preloaded else 0.0,
+            }
+
+    def wait_idle(self, timeout: float | None = None) -> bool:
+        """Block until the queue is empty and nothing is loading."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._queue or self._current is not None:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def reset(self) -> None:
+        """Drop the plan and forget speculative entries (the cache they were in was cleared)."""
+        with self._cond:
+            self._queue.clear()
+            self._wanted.clear()
+            self._speculative.clear()
+            self._cond.notify_all()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._queue.clear()
+            self._wanted.clear()
+            self._cond.notify_all()
+
+    # ------------------------------------------------------------------ worker
+
+    def _start_locked(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, daemon=True, name="ArenaSmartPreload")
+            self._thread.start()
+
+    def _lower_priority(self) -> None:
+        # RU: На Linux nice действует на поток (native id); на других ОС пропускаем
+        native_id = getattr(threading, "get_native_id", None)
+        if native_id is None or not hasattr(os, "setpriority") or not sys.platform.startswith("linux"):
+            return
+        try:
+            os.setpriority(os.PRIO_PROCESS, native_id(), self.nice)
+        except OSError:
+            pass
+
+    def _next(self) -> str | None:
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                return None
+            key = self._queue.pop(0)
+            self._current = key
+            return key
+
+    def _finish(self, key: str, loaded: int | None) -> None:
+        with self._cond:
+            self._current = None
+            if loaded is not None:
+                self.preloaded += 1
+                self.preloaded_bytes += loaded
+                self._speculative[key] = loaded
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        self._lower_priority()
+        while True:
+            key = self._next()
+            if key is None:
+                return
+            loaded = None
+            try:
+                while self._idle is not None and not self._idle() and key in self._wanted:
+                    time.sleep(0.2)
+                if key not in self._wanted:
+                    raise PreloadCancelled(key)
+                size = self._plan(key)
+                if size is not None:
+                    with self._cond:
+                        over = sum(self._speculative.values()) + size > self.budget_bytes
+                        if over:
+                            self.skipped_budget += 1
+                    if not over:
+                        self._load(key, lambda: key not in self._wanted)
+                        loaded = size
+            except PreloadCancelled:
+                with self._cond:
+                    self.cancelled += 1
+            except Exception as e:
+                with self._cond:
+                    self.failed += 1
+                logger.warning(f"Preload failed for {key}: {e}")
+            finally:
+                self._finish(key, loaded)
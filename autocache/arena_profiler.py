@@ -0,0 +1,191 @@
+"""
+Arena Profiler
+
+Purpose: Opt-in profiling of the resolver hot path (patched get_full_path,
+_get_cache_path, _schedule_copy_task): per-call wall time, stat()/mkdir()
+counts and the category the call was made for. Summarised by /arena/profile.
+
+Notes:
+- Disabled by default (ARENA_PROFILE=1 or POST /arena/profile to enable).
+  When disabled a profiled function costs one attribute check.
+- Syscall counting wraps os.stat/os.lstat/os.mkdir only while profiling is
+  enabled; pathlib and os.path go through them, so Path.exists(), mkdir() and
+  os.makedirs() are counted. The hooks count only inside a profiled call on
+  the same thread (a thread-local frame): calls from other nodes and threads
+  pass straight through after one attribute lookup and are never counted.
+- Counts are inclusive: a stat() made by _get_cache_path inside
+  get_full_path is counted for both (the inner frame adds its counts to the
+  outer one when it returns).
+- Percentiles come from the most recent ``max_samples`` calls per function.
+"""
+
+from __future__ import annotations
+
+import functools
+import os
+import threading
+import time
+from collections import deque
+
+
+class _FunctionStats:
+    __slots__ = ("calls", "total_s", "max_s", "stat", "mkdir", "samples", "by_category")
+
+    def __init__(self, max_samples: int) -> None:
+        self.calls = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+        self.stat = 0
+        self.mkdir = 0
+        self.samples: deque[float] = deque(maxlen=max_samples)
+        self.by_category: dict[str, list] = {}  # category -> [calls, total_s]
+
+
+class HotPathProfiler:
+    """Collects timings and syscall counts for decorated functions."""
+
+    def __init__(self, max_samples: int = 5000) -> None:
+        self.enabled = False
+        self.max_samples = max_samples
+        self.enabled_at = 0.0
+        self._lock = threading.Lock()
+        self._stats: dict[str, _FunctionStats] = {}
+        self._local = threading.local()
+        self._originals: dict[str, object] = {}
+
+    # ------------------------------------------------------------------ control
+
+    def enable(self) -> None:
+        with self._lock:
+            if self.enabled:
+                return
+            self._install_syscall_hooks()
+            self.enabled_at = time.time()
+            self.enabled = True
+
+    def disable(self) -> None:
+        with self._lock:
+            if not self.enabled:
+                return
+            self.enabled = False
+            self._remove_syscall_hooks()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            if self.enabled:
+                self.enabled_at = time.time()
+
+    # ------------------------------------------------------------------ syscall hooks
+
+    def _counting(self, original, kind: str):
+        local = self._local
+
+        @functools.wraps(original)
+        def hook(*args, **kwargs):
+            frame = getattr(local, "frame", None)
+            if frame is not None:
+                frame[kind] += 1
+            return original(*args, **kwargs)
+
+        return hook
+
+    def _install_syscall_hooks(self) -> None:
+        for name, kind in (("stat", "stat"), ("lstat", "stat"), ("mkdir", "mkdir")):
+            original = getattr(os, name)
+            self._originals[name] = original
+            setattr(os, name, self._counting(original, kind))
+
+    def _remove_syscall_hooks(self) -> None:
+        for name, original in self._originals.items():
+            setattr(os, name, original)
+        self._originals.clear()
+
+    # ------------------------------------------------------------------ recording
+
+    def profiled(self, name: str):
+        """Decorator; the first positional argument is recorded as the category."""
+
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                return self._call(name, func, args, kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def _call(self, name: str, func, args, kwargs):
+        local = self._local
+        parent = getattr(local, "frame", None)
+        frame = local.frame = {"stat": 0, "mkdir": 0}
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            local.frame = parent
+            if parent is not None:
+                parent["stat"] += frame["stat"]
+                parent["mkdir"] += frame["mkdir"]
+            category = args[0] if args and isinstance(args[0], str) else ""
+            self._record(name, category, elapsed, frame["stat"], frame["mkdir"])
+
+    def _record(self, name: str, category: str, elapsed: float, stats: int, mkdirs: int) -> None:
+        with self._lock:
+            entry = self._stats.get(name)
+            if entry is None:
+                entry = self._stats[name] = _FunctionStats(self.max_samples)
+            entry.calls += 1
+            entry.total_s += elapsed
+            entry.max_s = max(entry.max_s, elapsed)
+            entry.stat += stats
+            entry.mkdir += mkdirs
+            entry.samples.append(elapsed)
+            per_category = entry.by_category.setdefault(category, [0, 0.0])
+            per_category[0] += 1
+            per_category[1] += elapsed
+
+    # ------------------------------------------------------------------ reading
+
+    def summary(self) -> dict:
+        """Per-function aggregates (times in microseconds)."""
+        with self._lock:
+            functions = {}
+            for name, entry in self._stats.items():
+                ordered = sorted(entry.samples)
+
+                def pct(p, ordered=ordered):
+                    if not ordered:
+                        return 0.0
+                    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * 1e6
+
+                functions[name] = {
+                    "calls": entry.calls,
+                    "total_ms": entry.total_s * 1e3,
+                    "mean_us": entry.total_s / entry.calls * 1e6 if entry.calls else 0.0,
+                    "p50_us": pct(50),
+                    "p95_us": pct(95),
+                    "p99_us": pct(99),
+                    "max_us": entry.max_s * 1e6,
+                    "stat_calls": entry.stat,
+                    "mkdir_calls": entry.mkdir,
+                    "stat_per_call": entry.stat / entry.calls if entry.calls else 0.0,
+                    "mkdir_per_call": entry.mkdir / entry.calls if entry.calls else 0.0,
+                    "by_category": {
+                        category: {"calls": calls, "total_ms": total * 1e3}
+                        for category, (calls, total) in sorted(
+                            entry.by_category.items(), key=lambda item: item[1][1], reverse=True
+                        )
+                    },
+                }
+            return {
+                "enabled": self.enabled,
+                "since": self.enabled_at or None,
+                "functions": functions,
+            }
+
+
+PROFILER = HotPathProfiler()
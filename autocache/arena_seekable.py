@@ -0,0 +1,324 @@
+"""
+Arena Seekable Container
+
+Purpose: Seekable compressed format for smart-cache L2/L3 entries. The payload
+is cut into independently compressed chunks and an index maps uncompressed
+byte ranges - and, for safetensors, the header and every tensor - to chunks,
+so a reader can fetch the header or a single tensor by decompressing only the
+chunks that overlap it.
+
+Notes:
+- Layout: MAGIC, chunk frames, JSON index, footer (index offset, index
+  length, MAGIC). The index is written last, so the container is produced in
+  one streaming pass; readers start from the footer.
+- Chunk boundaries follow the safetensors layout: the header is a chunk of its
+  own, consecutive small tensors are packed together up to ``chunk_size``,
+  and large tensors are split at ``chunk_size``. Other payloads are cut at
+  fixed offsets.
+- A chunk that does not shrink is stored raw (codec "raw"), so the container
+  is never much larger than the payload.
+- Chunks are compressed and decompressed on a thread pool; zstd and zlib
+  release the GIL, so a full decode also scales with cores, which a single
+  zstd frame cannot do.
+- Each chunk is a standard zstd/gzip frame; smaller chunks mean finer random
+  access but a slightly worse ratio (4 MB costs well under 1% on weights).
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import os
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from autocache import arena_compression
+
+
+MAGIC = b"ARSEEK01"
+_FOOTER = struct.Struct("<QQ8s")
+MB = 1024 * 1024
+DEFAULT_CHUNK_SIZE = 4 * MB
+_MAX_HEADER = 100 * MB
+
+
+def is_container(path: str | os.PathLike) -> bool:
+    """True if ``path`` starts with the container magic."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def parse_safetensors_header(read_range, size: int) -> tuple[dict, int] | None:
+    """(header, data_start) of a safetensors payload, or None if it is not one.
+
+    ``read_range(offset, length)`` returns payload bytes; data offsets in the
+    header are relative to ``data_start``.
+    """
+    if size < 8:
+        return None
+    (header_len,) = struct.unpack("<Q", read_range(0, 8))
+    if header_len == 0 or header_len > _MAX_HEADER or 8 + header_len > size:
+        return None
+    try:
+        header = json.loads(bytes(read_range(8, header_len)).decode("utf-8"))
+    except (UnicodeDecodeError, ValueError):
+        return None
+    if not isinstance(header, dict):
+        return None
+    return header, 8 + header_len
+
+
+def _tensor_ranges(header: dict, data_start: int) -> dict[str, tuple[int, int]]:
+    ranges = {}
+    for name, meta in header.items():
+        if name == "__metadata__" or not isinstance(meta, dict):
+            continue
+        offsets = meta.get("data_offsets")
+        if isinstance(offsets, list) and len(offsets) == 2:
+            ranges[name] = (data_start + int(offsets[0]), data_start + int(offsets[1]))
+    return ranges
+
+
+def _plan_chunks(size: int, chunk_size: int, data_start: int | None,
+                 tensors: dict[str, tuple[int, int]]) -> list[tuple[int, int]]:
+    """Uncompressed (offset, length) of every chunk."""
+    cuts = [0]
+    if data_start is not None:
+        cuts.append(data_start)
+        for begin, end in sorted(tensors.values()):
+            if begin < cuts[-1] or end > size:
+                continue
+            # RU: Тензор не влезает в текущий чанк - закрываем чанк на его начале, большой режем по chunk_size
+            if end - cuts[-1] > chunk_size and begin > cuts[-1]:
+                cuts.append(begin)
+            while end - cuts[-1] > chunk_size:
+                cuts.append(cuts[-1] + chunk_size)
+    while size - cuts[-1] > chunk_size:
+        cuts.append(cuts[-1] + chunk_size)
+    cuts.append(size)
+    bounds = sorted(set(cut for cut in cuts if 0 <= cut <= size))
+    return [(a, b - a) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def _source_reader(source):
+    """(read_range, size, close) for a bytes-like payload or a file path."""
+    if isinstance(source, (str, os.PathLike)):
+        f = open(source, "rb")
+        size = os.fstat(f.fileno()).st_size
+        lock = threading.Lock()
+
+        def read_range(offset: int, length: int) -> bytes:
+            # RU: Вызывается из пула потоков: pread без общего указателя, иначе seek+read под замком
+            if hasattr(os, "pread"):
+                return os.pread(f.fileno(), length, offset)
+            with lock:
+                f.seek(offset)
+                return f.read(length)
+
+        return read_range, size, f.close
+    view = memoryview(source).cast("B")
+    return (lambda offset, length: view[offset:offset + length]), len(view), view.release
+
+
+def write_container(source, dest_path: str | os.PathLike, method: str = "zstd", level: int = 6,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE, threads: int = 0, hasher=None,
+                    on_progress=None) -> tuple[int, int]:
+    """Write ``source`` (bytes-like or file path) as a container; returns (input bytes, output bytes).
+
+    ``hasher.update()`` is called with the uncompressed chunks in order, and
+    ``on_progress(bytes_done)`` after every batch (it may raise to abort).
+    """
+    read_range, size, close = _source_reader(source)
+    workers = threads if threads > 0 else (os.cpu_count() or 1)
+    try:
+        parsed = parse_safetensors_header(read_range, size)
+        data_start = parsed[1] if parsed else None
+        tensors = _tensor_ranges(*parsed) if parsed else {}
+        plan = _plan_chunks(size, max(1, chunk_size), data_start, tensors)
+
+        def encode(span):
+            offset, length = span
+            raw = read_range(offset, length)
+            packed = arena_compression.compress_bytes(raw, method, level, threads=1)
+            return raw, ((packed, method) if len(packed) < length else (bytes(raw), "raw"))
+
+        chunks = []
+        with open(dest_path, "wb") as out, ThreadPoolExecutor(max_workers=workers) as pool:
+            out.write(MAGIC)
+            position = len(MAGIC)
+            # RU: Пачками по числу потоков - в памяти не больше workers сжатых чанков
+            for batch_start in range(0, len(plan), workers):
+                batch = plan[batch_start:batch_start + workers]
+                for (offset, length), (raw, (payload, codec)) in zip(batch, pool.map(encode, batch)):
+                    if hasher is not None:
+                        hasher.update(raw)
+                    out.write(payload)
+                    chunks.append([offset, length, position, len(payload), codec])
+                    position += len(payload)
+                if on_progress is not None:
+                    on_progress(batch[-1][0] + batch[-1][1])
+
+            index = {
+                "version": 1,
+                "method": method,
+                "size": size,
+                "chunks": chunks,
+                "safetensors": None,
+            }
+            if parsed:
+                starts = [chunk[0] for chunk in chunks]
+                index["safetensors"] = {
+                    "data_start": data_start,
+                    "tensors": {
+                        name: [begin, end, max(0, bisect.bisect_right(starts, begin) - 1),
+                               max(0, bisect.bisect_right(starts, max(begin, end - 1)) - 1)]
+                        for name, (begin, end) in tensors.items()
+                    },
+                }
+            index_bytes = json.dumps(index, separators=(",", ":")).encode("utf-8")
+            out.write(index_bytes)
+            out.write(_FOOTER.pack(position, len(index_bytes), MAGIC))
+            position += len(index_bytes) + _FOOTER.size
+    finally:
+        close()
+    return size, position
+
+
+class SeekableReader:
+    """Random access to a container: byte ranges, the safetensors header, single tensors."""
+
+    def __init__(self, path: str | os.PathLike, threads: int = 0) -> None:
+        self.path = str(path)
+        self.threads = threads if threads > 0 else (os.cpu_count() or 1)
+        self._file = open(self.path, "rb")
+        try:
+            self._load_index()
+        except Exception:
+            self._file.close()
+            raise
+        self._cached: tuple[int, bytes] | None = None
+
+    def _load_index(self) -> None:
+        f = self._file
+        end = os.fstat(f.fileno()).st_size
+        if end < len(MAGIC) + _FOOTER.size:
+            raise ValueError(f"Not a seekable container: {self.path}")
+        f.seek(end - _FOOTER.size)
+        index_offset, index_len, magic = _FOOTER.unpack(f.read(_FOOTER.size))
+        if magic != MAGIC:
+            raise ValueError(f"Not a seekable container: {self.path}")
+        f.seek(index_offset)
+        index = json.loads(f.read(index_len).decode("utf-8"))
+        self.method: str = index["method"]
+        self.size: int = index["size"]
+        self.chunks: list[list] = index["chunks"]
+        self._starts = [chunk[0] for chunk in self.chunks]
+        self.safetensors: dict | None = index.get("safetensors")
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "SeekableReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------ chunks
+
+    def _raw_chunk(self, chunk: list) -> bytes:
+        # RU: os.pread не двигает общий указатель файла - чтение из пула потоков безопасно
+        if hasattr(os, "pread"):
+            return os.pread(self._file.fileno(), chunk[3], chunk[2])
+        with open(self.path, "rb") as f:
+            f.seek(chunk[2])
+            return f.read(chunk[3])
+
+    def _decode(self, index: int) -> bytes:
+        chunk = self.chunks[index]
+        payload = self._raw_chunk(chunk)
+        return payload if chunk[4] == "raw" else arena_compression.decompress_bytes(payload, chunk[4])
+
+    def _chunk(self, index: int) -> bytes:
+        cached = self._cached
+        if cached is not None and cached[0] == index:
+            return cached[1]
+        data = self._decode(index)
+        self._cached = (index, data)
+        return data
+
+    def chunks_for(self, offset: int, length: int) -> range:
+        """Indices of the chunks overlapping [offset, offset + length)."""
+        if length <= 0 or offset >= self.size:
+            return range(0)
+        first = bisect.bisect_right(self._starts, offset) - 1
+        last = bisect.bisect_right(self._starts, min(self.size, offset + length) - 1) - 1
+        return range(max(0, first), last + 1)
+
+    # ------------------------------------------------------------------ reads
+
+    def read(self, offset: int, length: int) -> bytes:
+        """Uncompressed bytes [offset, offset + length), decoding only the overlapping chunks."""
+        length = max(0, min(length, self.size - offset))
+        indices = self.chunks_for(offset, length)
+        if len(indices) > 2:
+            out = bytearray(length)
+            self._decode_into(out, indices, offset)
+            return bytes(out)
+        parts = []
+        for index in indices:
+            start = self.chunks[index][0]
+            data = self._chunk(index)
+            parts.append(data[max(0, offset - start):offset + length - start])
+        return b"".join(parts)
+
+    def _decode_into(self, out, indices, base: int) -> None:
+        view = memoryview(out)
+        end = base + len(out)
+
+        def fill(index: int) -> None:
+            start, length = self.chunks[index][0], self.chunks[index][1]
+            data = self._decode(index)
+            lo, hi = max(start, base), min(start + length, end)
+            view[lo - base:hi - base] = data[lo - start:hi - start]
+
+        with ThreadPoolExecutor(max_workers=self.threads) as pool:
+            list(pool.map(fill, indices))
+
+    def read_all(self) -> bytes:
+        """The whole payload, chunks decoded in parallel."""
+        out = bytearray(self.size)
+        self._decode_into(out, range(len(self.chunks)), 0)
+        return bytes(out)
+
+    def decompress_to(self, dest_path: str | os.PathLike) -> int:
+        """Write the whole payload to ``dest_path``; returns bytes written."""
+        with open(dest_path, "wb") as out, ThreadPoolExecutor(max_workers=self.threads) as pool:
+            for batch_start in range(0, len(self.chunks), self.threads):
+                batch = range(batch_start, min(len(self.chunks), batch_start + self.threads))
+                for data in pool.map(self._decode, batch):
+                    out.write(data)
+        return self.size
+
+    # ------------------------------------------------------------------ safetensors
+
+    def header(self) -> dict | None:
+        """Parsed safetensors header (decodes the header chunk only), or None."""
+        if not self.safetensors:
+            return None
+        parsed = parse_safetensors_header(self.read, self.size)
+        return parsed[0] if parsed else None
+
+    def tensor_names(self) -> list[str]:
+        return list(self.safetensors["tensors"]) if self.safetensors else []
+
+    def tensor(self, name: str) -> bytes:
+        """Raw bytes of one tensor."""
+        if not self.safetensors or name not in self.safetensors["tensors"]:
+            raise KeyError(name)
+        begin, end = self.safetensors["tensors"][name][:2]
+        return self.read(begin, end - begin)
@@ -0,0 +1,209 @@
+"""
+Arena Shared Cache
+
+Purpose: Coordinate several ComfyUI processes that share one ARENA_CACHE_ROOT
+(several instances per GPU box): one copier per model, one evictor, and a
+shared view of what is in the cache.
+
+Notes:
+- Advisory OS file locks (fcntl.flock on POSIX, msvcrt.locking on Windows),
+  stored under <cache_root>/.arena_locks. The OS releases them when a process
+  dies, so a crashed copier or evictor never leaves the cache stuck.
+- Per-model lock: held for the whole copy (.part write + rename). A process
+  that finds it held waits for the other copy instead of duplicating it; the
+  evictor skips files whose lock is held.
+- Shared index: <cache_root>/.arena_index.json (relative path -> size),
+  read-modify-written under its own lock and replaced atomically, so readers
+  never see a partial file and concurrent writers do not lose updates.
+- Evictor election: the process holding .arena_locks/evictor.lock is the only
+  one that prunes; others skip. The lock is kept until the process exits.
+"""
+
+from __future__ import annotations
+
+import errno
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+LOCK_DIR = ".arena_locks"
+INDEX_FILE = ".arena_index.json"
+
+
+class FileLock:
+    """Exclusive advisory lock on a file.
+
+    Each instance owns its own descriptor, so two instances on the same path
+    exclude each other across threads as well as across processes.
+    """
+
+    def __init__(self, path: str | os.PathLike, poll_s: float = 0.1) -> None:
+        self.path = Path(path)
+        self.poll_s = poll_s
+        self._fd: int | None = None
+
+    @property
+    def locked(self) -> bool:
+        return self._fd is not None
+
+    def _try_lock(self, fd: int) -> bool:
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except (BlockingIOError, PermissionError):
+            return False
+        except OSError as e:
+            # RU: EACCES/EAGAIN/EDEADLK - занято; прочие ошибки (нет поддержки блокировок) пробрасываем
+            if e.errno in (errno.EACCES, errno.EAGAIN, errno.EDEADLK):
+                return False
+            raise
+
+    def acquire(self, timeout: float | None = None) -> bool:
+        """Take the lock; ``timeout`` None waits forever, 0 tries once. Returns False on timeout."""
+        if self._fd is not None:
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            while not self._try_lock(fd):
+                if deadline is not None and time.monotonic() >= deadline:
+                    os.close(fd)
+                    return False
+                time.sleep(self.poll_s)
+        except Exception:
+            os.close(fd)
+            raise
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        fd, self._fd = self._fd, None
+        if fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+def _relative_key(root: Path, path: str | os.PathLike) -> str:
+    try:
+        rel = os.path.relpath(
+            os.path.normcase(os.path.abspath(os.fspath(path))), os.path.normcase(os.path.abspath(root))
+        )
+    except ValueError:  # other drive on Windows
+        rel = os.fspath(path)
+    return rel.replace("\\", "/")
+
+
+def model_lock(root: Path, cache_path: str | os.PathLike) -> FileLock:
+    """Lock guarding the copy (and eviction) of one cached file."""
+    digest = hashlib.sha1(_relative_key(root, cache_path).encode("utf-8")).hexdigest()
+    return FileLock(Path(root) / LOCK_DIR / f"{digest}.lock")
+
+
+class SharedIndex:
+    """Cache contents shared between processes (relative path -> size)."""
+
+    def __init__(self, root: Path, lock_timeout_s: float = 10.0) -> None:
+        self.root = Path(root)
+        self.path = self.root / INDEX_FILE
+        self.lock_path = self.root / LOCK_DIR / "index.lock"
+        self.lock_timeout_s = lock_timeout_s
+
+    def signature(self) -> tuple[int, int] | None:
+        """Cheap change marker (mtime_ns, size); None if there is no index yet."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def load(self) -> dict[str, int]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        files = data.get("files", {}) if isinstance(data, dict) else {}
+        return {str(k): int(v) for k, v in files.items()}
+
+    def _write(self, files: dict[str, int]) -> None:
+        tmp = self.path.with_name(f"{INDEX_FILE}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"updated_at": time.time(), "files": files}, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+    def update(
+        self,
+        add: dict[str, int] | None = None,
+        remove: list[str] | None = None,
+        replace: dict[str, int] | None = None,
+    ) -> bool:
+        """Apply changes under the index lock; paths may be absolute or relative to the root."""
+        lock = FileLock(self.lock_path)
+        if not lock.acquire(self.lock_timeout_s):
+            return False
+        try:
+            files = {} if replace is not None else self.load()
+            for path, size in (replace or {}).items():
+                files[_relative_key(self.root, self.root / path)] = size
+            for path, size in (add or {}).items():
+                files[_relative_key(self.root, self.root / path)] = size
+            for path in remove or ():
+                files.pop(_relative_key(self.root, self.root / path), None)
+            self._write(files)
+            return True
+        finally:
+            lock.release()
+
+
+class EvictorElection:
+    """Only the process holding the evictor lock prunes the shared cache."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        self._lock = FileLock(self.root / LOCK_DIR / "evictor.lock")
+        self._guard = threading.Lock()
+
+    def is_leader(self) -> bool:
+        """True if this process is (or just became) the evictor."""
+        with self._guard:
+            if self._lock.locked:
+                return True
+            try:
+                return self._lock.acquire(timeout=0)
+            except OSError:
+                # RU: Файловая система без блокировок - каждый процесс чистит сам, как раньше
+                return True
+
+    def resign(self) -> None:
+        with self._guard:
+            self._lock.release()
@@ -0,0 +1,97 @@
+"""
+Arena Single Flight
+
+Purpose: Per-key coordination for cache reads and writes, so work on one
+model never blocks lookups of another.
+
+Notes:
+- KeyedLocks hands out one lock per key and forgets it when the last holder
+  leaves, so the table only holds keys in use.
+- SingleFlight runs one load per key at a time: the first caller (leader)
+  runs the function and concurrent callers for the same key wait for its
+  result - or its exception - instead of repeating multi-GB I/O.
+- Results are shared objects; callers must treat them as read-only (bytes and
+  read-only memoryviews are).
+"""
+
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+
+
+class KeyedLocks:
+    """One lock per key, created on demand and dropped when unused."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._locks: dict[str, list] = {}  # key -> [lock, holders]
+
+    @contextmanager
+    def hold(self, key: str):
+        with self._lock:
+            entry = self._locks.get(key)
+            if entry is None:
+                entry = self._locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[key]
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls per key."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[str, _Call] = {}
+        self.shared = 0  # calls served by another caller's load
+
+    def do(self, key: str, fn):
+        """Return ``fn()``, or the result of the call already running for ``key``."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.shared += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
@@ -12,6 +12,9 @@ Features:
 """
 
 import os
+import atexit
+import mmap
+import shutil
 import time
 import json
 import pickle
@@ -19,15 +22,24 @@ import hashlib
 import threading
 import asyncio
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Any
-from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple, Any
+from dataclasses import dataclass, field, fields, asdict
 from enum import Enum
-import zstd
 import torch
 import numpy as np
 from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 import logging
 
+from autocache import arena_compression, arena_seekable
+from autocache.arena_memory_tier import MemoryTier
+from autocache.arena_model_store import STORE_FILE, ModelInfoStore
+from autocache.arena_copy_io import CopyOptions, copy_stream
+from autocache.arena_single_flight import KeyedLocks, SingleFlight
+from autocache.arena_cache_index import CacheIndex
+from autocache.arena_predictor import STATE_FILE as PREDICTOR_FILE, ModelPredictor, workflow_model_keys
+from autocache.arena_preloader import PreloadCancelled, SpeculativePreloader
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -58,12 +70,22 @@ class CacheConfig:
     """Configuration for smart cache"""
     # Cache levels
     l1_max_size_mb: int = 2048  # 2GB RAM cache
+    l1_max_item_fraction: float = 0.5  # larger entries are not admitted to RAM
     l2_max_size_gb: int = 50    # 50GB SSD cache
     l3_max_size_gb: int = 200   # 200GB HDD cache
+    async_promotion: bool = True  # copy L3 hits to L2 in the background
+    demote_to_l3: bool = True  # entries evicted from L2 move to L3 instead of being deleted
+    tier_reconcile_interval_s: float = 300.0  # tier byte/count counters are re-scanned this often
     
     # Compression
     compression_type: CompressionType = CompressionType.ZSTD
     compression_level: int = 6
+    compression_threads: int = 0  # zstd worker threads, 0 = all cores
+    compression_min_saving: float = 0.10  # store raw if sampling predicts a smaller saving
+    compression_sample_count: int = 8
+    compression_sample_kb: int = 256
+    compression_chunk_mb: int = 4  # seekable container chunk size, 0 = one zstd frame per entry
+    metadata_flush_interval_s: float = 5.0  # how often access statistics are written to model_info.json
     
     # Quantization
     quantization_type: QuantizationType = QuantizationType.FP16
@@ -72,6 +94,9 @@ class CacheConfig:
     # Prediction
     enable_prediction: bool = True
     prediction_window: int = 5  # models to predict ahead
+    prediction_decay: float = 0.98  # per observed workflow; older runs fade out
+    preload_confidence: float = 0.3  # predicted models at or above this are warmed into L2
+    preload_budget_mb: int = 8192  # bytes of preloaded-but-unused entries
     
     # Analytics
     enable_analytics: bool = True
@@ -113,26 +138,43 @@ class ModelInfo:
     compressed: bool = False
     quantized: bool = False
     compression_ratio: float = 1.0
+    sampled_ratio: Optional[float] = None  # ratio predicted by the admission sampler
+    compression_decision: str = ""  # compressed / raw_incompressible / raw_small / raw_unavailable / raw_failed
+    compression_level: int = 0
+    stored_bytes: int = 0  # size of the cache file
+    digest: str = ""  # sha256 of the uncompressed payload ("" if not computed)
+    created_at: float = 0.0
     metadata: Dict[str, Any] = field(default_factory=dict)
 
+    def to_record(self) -> Dict[str, Any]:
+        """JSON-serialisable form for the metadata store"""
+        record = asdict(self)
+        record["cache_level"] = self.cache_level.value
+        return record
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "ModelInfo":
+        """Inverse of to_record(); unknown keys (newer versions) are ignored"""
+        known = {f.name for f in fields(cls)}
+        values = {k: v for k, v in record.items() if k in known}
+        values["cache_level"] = CacheLevel(values.get("cache_level", CacheLevel.L2_SSD.value))
+        return cls(**values)
+
 class WorkflowAnalyzer:
     """Analyzes ComfyUI workflows to predict model usage"""
     
-    def __init__(self):
+    def __init__(self, state_path: Optional[Path] = None, decay: float = 0.98):
         self.workflow_patterns = defaultdict(list)
         self.model_dependencies = defaultdict(set)
         self.usage_history = deque(maxlen=1000)
+        
+        # Co-occurrence/transition model, persisted so predictions survive restarts
+        self.state_path = state_path
+        self.predictor = ModelPredictor.load(state_path, decay) if state_path else ModelPredictor(decay)
     
     def analyze_workflow(self, workflow: Dict) -> List[str]:
-        """Analyze workflow and extract model requirements"""
-        models = []
-        
-        # Extract models from workflow nodes
-        for node_id, node_data in workflow.get("nodes", {}).items():
-            if "model" in node_data.get("inputs", {}):
-                model_name = node_data["inputs"]["model"]
-                if isinstance(model_name, str):
-                    models.append(model_name)
+        """Analyze workflow and extract model requirements ("category/filename" keys)"""
+        models = workflow_model_keys(workflow)
         
         # Store pattern for future prediction
         self.usage_history.append({
@@ -140,22 +182,22 @@ class WorkflowAnalyzer:
             "models": models,
             "workflow_id": workflow.get("id", "unknown")
         })
+        self.predictor.observe(models)
+        if self.state_path is not None:
+            try:
+                self.predictor.save(self.state_path)
+            except OSError as e:
+                logger.warning(f"Predictor save error: {e}")
         
         return models
     
+    def predict_ranked(self, current_models: List[str], k: int = 5) -> List[Tuple[str, float]]:
+        """Top k (model, confidence) expected in the next workflow run"""
+        return self.predictor.predict(current_models, k)
+    
     def predict_next_models(self, current_models: List[str], window: int = 5) -> List[str]:
-        """Predict next models based on usage patterns"""
-        if not self.usage_history:
-            return []
-        
-        # Simple pattern matching - can be enhanced with ML
-        predictions = []
-        for entry in list(self.usage_history)[-window:]:
-            if any(model in entry["models"] for model in current_models):
-                predictions.extend(entry["models"])
-        
-        # Return unique predictions
-        return list(set(predictions))
+        """Predict next models based on usage patterns (most likely first)"""
+        return [model for model, _ in self.predict_ranked(current_models, window)]
 
 class ModelCompressor:
     """Handles model compression and quantization"""
@@ -163,20 +205,21 @@ class ModelCompressor:
     def __init__(self, config: CacheConfig):
         self.config = config
     
+    @property
+    def method(self) -> Optional[str]:
+        """Backend name for the configured type, None if stored raw"""
+        method = self.config.compression_type.value
+        return method if arena_compression.available(method) else None
+
     def compress_model(self, model_data: bytes) -> Tuple[bytes, float]:
-        """Compress model data"""
-        if self.config.compression_type == CompressionType.NONE:
+        """Compress model data (returns the input unchanged on failure)"""
+        if self.method is None or not model_data:
             return model_data, 1.0
         
         try:
-            if self.config.compression_type == CompressionType.ZSTD:
-                compressed = zstd.compress(model_data, self.config.compression_level)
-            elif self.config.compression_type == CompressionType.GZIP:
-                import gzip
-                compressed = gzip.compress(model_data)
-            else:
-                return model_data, 1.0
-            
+            compressed = arena_compression.compress_bytes(
+                model_data, self.method, self.config.compression_level, self.config.compression_threads
+            )
             ratio = len(compressed) / len(model_data)
             return compressed, ratio
         except Exception as e:
@@ -185,20 +228,49 @@ class ModelCompressor:
     
     def decompress_model(self, compressed_data: bytes) -> bytes:
         """Decompress model data"""
-        if self.config.compression_type == CompressionType.NONE:
+        if self.method is None:
             return compressed_data
         
         try:
-            if self.config.compression_type == CompressionType.ZSTD:
-                return zstd.decompress(compressed_data)
-            elif self.config.compression_type == CompressionType.GZIP:
-                import gzip
-                return gzip.decompress(compressed_data)
-            else:
-                return compressed_data
+            return arena_compression.decompress_bytes(compressed_data, self.method)
         except Exception as e:
             logger.warning(f"Decompression failed: {e}")
             return compressed_data
+
+    def compress_file(self, source, dest_path: str, hasher=None, on_progress=None) -> Tuple[int, int]:
+        """Compress a file path or payload into dest_path; returns (input bytes, output bytes).
+
+        Writes a seekable chunked container (header and tensors readable without a full
+        decode) unless compression_chunk_mb is 0, which writes one zstd frame.
+        ``hasher`` is fed the uncompressed bytes where the writer sees them in order.
+        """
+        level, threads = self.config.compression_level, self.config.compression_threads
+        if self.config.compression_chunk_mb > 0:
+            return arena_seekable.write_container(
+                source, dest_path, self.method, level, self.config.compression_chunk_mb * 1024 * 1024, threads,
+                hasher, on_progress
+            )
+        if isinstance(source, (str, os.PathLike)):
+            return arena_compression.compress_file(source, dest_path, self.method, level, threads)
+        if hasher is not None:
+            hasher.update(source)
+        compressed = arena_compression.compress_bytes(source, self.method, level, threads)
+        with open(dest_path, 'wb') as f:
+            f.write(compressed)
+        return len(source), len(compressed)
+
+    def decompress_file(self, path: Path) -> bytes:
+        """Decode a stored entry: seekable containers in parallel, single frames in one piece"""
+        if arena_seekable.is_container(path):
+            with arena_seekable.SeekableReader(path, self.config.compression_threads) as reader:
+                return reader.read_all()
+        # The frame magic names the codec, so entries survive a compression_type change
+        method = arena_compression.frame_method(path)
+        with open(path, 'rb') as f:
+            data = f.read()
+        if method is None:
+            return self.decompress_model(data)
+        return arena_compression.decompress_bytes(data, method)
     
     def quantize_model(self, model_path: str) -> Optional[str]:
         """Quantize model to reduce size"""
@@ -227,25 +299,65 @@ class ModelCompressor:
             logger.warning(f"Quantization failed: {e}")
             return None
 
+def _default_source_resolver(category: str, filename: str) -> Optional[str]:
+    """Original path of a model via ComfyUI folder_paths (the unpatched resolver if AutoCache patched it)."""
+    try:
+        import folder_paths
+    except ImportError:
+        return None
+    resolve = getattr(folder_paths, "get_full_path_origin", None) or folder_paths.get_full_path
+    try:
+        return resolve(category, filename)
+    except Exception:
+        return None
+
 class MultiLevelCache:
     """Multi-level cache implementation"""
     
-    def __init__(self, config: CacheConfig):
+    def __init__(self, config: CacheConfig, source_resolver: Optional[Callable[[str, str], Optional[str]]] = None):
         self.config = config
-        self.l1_cache: Dict[str, bytes] = {}  # RAM cache
+        self.source_resolver = source_resolver or _default_source_resolver
+        l1_max_bytes = config.l1_max_size_mb * 1024 * 1024
+        self.l1_cache = MemoryTier(  # RAM cache, bounded by real bytes
+            l1_max_bytes, int(l1_max_bytes * config.l1_max_item_fraction)
+        )
         self.l2_cache: Dict[str, str] = {}    # SSD cache (file paths)
         self.l3_cache: Dict[str, str] = {}    # HDD cache (file paths)
         
         self.model_info: Dict[str, ModelInfo] = {}
         self.metrics = CacheMetrics()
-        self.workflow_analyzer = WorkflowAnalyzer()
         self.compressor = ModelCompressor(config)
         
-        # Thread safety
+        # Thread safety: self.lock guards metadata and metrics only (short sections);
+        # disk I/O runs under per-key locks, and concurrent loads of one key are shared
         self.lock = threading.RLock()
+        self._key_locks = KeyedLocks()
+        self._flight = SingleFlight()
+        self._promotions: set = set()
+        self._promotion_executor: Optional[ThreadPoolExecutor] = None
         
         # Initialize cache directories
         self._init_cache_directories()
+        self.workflow_analyzer = WorkflowAnalyzer(self.cache_root / PREDICTOR_FILE, config.prediction_decay)
+
+        # Per-tier byte/count counters: updated on insert and evict, re-scanned periodically
+        self.tier_index = {
+            level: CacheIndex(path, config.tier_reconcile_interval_s, suffix=".cache")
+            for level, path in ((CacheLevel.L2_SSD, self.l2_dir), (CacheLevel.L3_HDD, self.l3_dir))
+        }
+        self._evict_lock = threading.Lock()
+
+        # Speculative warming of predicted models (low priority, own byte budget)
+        self._preload_names: Dict[str, Tuple[str, str]] = {}
+        self.preloader = SpeculativePreloader(
+            self._preload_plan, self._preload_load, config.preload_budget_mb * 1024 * 1024,
+            idle=lambda: self._flight.in_flight() == 0
+        )
+
+        # Entry metadata survives restarts (compression flags, sizes, access history)
+        self.metadata_store = ModelInfoStore(self.cache_root / STORE_FILE, config.metadata_flush_interval_s)
+        self._load_model_info()
+        atexit.register(self.flush_metadata)
     
     def _init_cache_directories(self):
         """Initialize cache directories"""
@@ -256,6 +368,42 @@ class MultiLevelCache:
         self.l2_dir.mkdir(parents=True, exist_ok=True)
         self.l3_dir.mkdir(parents=True, exist_ok=True)
     
+    def _load_model_info(self) -> None:
+        """Load entry metadata in one read; records whose file is gone are dropped."""
+        dropped = 0
+        for model_id, record in self.metadata_store.load().items():
+            try:
+                info = ModelInfo.from_record(record)
+            except (TypeError, ValueError):
+                dropped += 1
+                continue
+            path = self._entry_path(model_id)
+            if path is None:
+                dropped += 1
+                continue
+            # L1 is empty after a restart: the entry lives where its file is
+            info.cache_level = CacheLevel.L2_SSD if path.parent == self.l2_dir else CacheLevel.L3_HDD
+            self.model_info[model_id] = info
+        if dropped:
+            self.metadata_store.mark_dirty()
+        if self.model_info:
+            logger.info(f"Loaded metadata of {len(self.model_info)} cached models")
+
+    def _save_model_info(self) -> None:
+        # Lock order: cache lock, then the store lock (save() snapshots under both)
+        with self.lock:
+            self.metadata_store.save(
+                lambda: {model_id: info.to_record() for model_id, info in self.model_info.items()}
+            )
+
+    def flush_metadata(self) -> None:
+        """Write pending metadata changes (access statistics) to disk"""
+        if self.metadata_store.dirty:
+            try:
+                self._save_model_info()
+            except OSError as e:
+                logger.warning(f"Metadata save error: {e}")
+
     def _get_model_id(self, category: str, filename: str) -> str:
         """Generate unique model ID"""
         return hashlib.md5(f"{category}:{filename}".encode()).hexdigest()
@@ -270,158 +418,381 @@ class MultiLevelCache:
             raise ValueError(f"Invalid cache level: {level}")
     
     def _calculate_cache_size(self) -> int:
-        """Calculate total cache size in bytes"""
-        total_size = 0
-        
-        # L1 cache size
-        for data in self.l1_cache.values():
-            total_size += len(data)
-        
-        # L2 and L3 cache sizes
-        for cache_dir in [self.l2_dir, self.l3_dir]:
-            for file_path in cache_dir.glob("*.cache"):
-                total_size += file_path.stat().st_size
-        
+        """Calculate total cache size in bytes (from the tier counters, no directory scan)"""
+        total_size = self.l1_cache.bytes_used
+        for index in self.tier_index.values():
+            total_size += index.stats()["bytes"]
         return total_size
-    
-    def _evict_lru(self, level: CacheLevel):
-        """Evict least recently used items from cache"""
+
+    def _tier_limit(self, level: CacheLevel) -> int:
+        gb = self.config.l2_max_size_gb if level == CacheLevel.L2_SSD else self.config.l3_max_size_gb
+        return int(gb * 1024 ** 3)
+
+    def _evict_lru(self, level: CacheLevel, exclude: Optional[str] = None) -> bool:
+        """Evict the least recently used entry of a level; returns False if there is none.
+
+        L2 victims move to L3 (demote_to_l3) unless L3 already holds them.
+        """
         if level == CacheLevel.L1_MEMORY:
-            # Find LRU item in L1
-            lru_model_id = min(
-                self.l1_cache.keys(),
-                key=lambda k: self.model_info[k].last_access
-            )
-            del self.l1_cache[lru_model_id]
-        else:
-            # For L2/L3, remove oldest files
-            cache_dir = self.l2_dir if level == CacheLevel.L2_SSD else self.l3_dir
-            files = [(f.stat().st_mtime, f) for f in cache_dir.glob("*.cache")]
-            if files:
-                oldest_file = min(files)[1]
-                oldest_file.unlink()
+            return self.l1_cache.evict_lru() is not None
+
+        index = self.tier_index[level]
+        with self.lock:
+            candidates = []
+            for path in index.entries():
+                model_id = Path(path).stem
+                if model_id == exclude:
+                    continue
+                info = self.model_info.get(model_id)
+                candidates.append((info.last_access if info else 0.0, path))
+        if not candidates:
+            return False
+        victim = min(candidates)[1]
+        model_id = Path(victim).stem
+        l3_path = self._get_cache_path(model_id, CacheLevel.L3_HDD)
+
+        with self._key_locks.hold(model_id):
+            size = index.size_of(victim) or 0
+            demoted = False
+            if level == CacheLevel.L2_SSD and self.config.demote_to_l3 and not l3_path.exists():
+                tmp_path = self._temp_path(l3_path)
+                try:
+                    shutil.move(victim, tmp_path)
+                    os.replace(tmp_path, l3_path)
+                    demoted = True
+                except OSError as e:
+                    tmp_path.unlink(missing_ok=True)
+                    logger.warning(f"L3 demotion error: {e}")
+            if not demoted:
+                try:
+                    os.unlink(victim)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning(f"Eviction error: {e}")
+                    return False
+            index.remove(victim)
+            if demoted:
+                self.tier_index[CacheLevel.L3_HDD].add(l3_path, size)
+        if level == CacheLevel.L2_SSD:
+            self.preloader.on_evict(model_id)
+
+        with self.lock:
+            info = self.model_info.get(model_id)
+            if info is not None:
+                if level == CacheLevel.L2_SSD and l3_path.exists():
+                    info.cache_level = CacheLevel.L3_HDD
+                elif self._entry_path(model_id) is None:
+                    del self.model_info[model_id]
+                self.metadata_store.mark_dirty()
+        logger.info(f"Evicted from {level.value}: {model_id} ({'demoted to L3' if demoted else 'deleted'})")
+        return True
+
+    def _enforce_limits(self, keep: Optional[str] = None) -> None:
+        """Evict LRU entries until L2 and L3 fit l2_max_size_gb / l3_max_size_gb"""
+        with self._evict_lock:
+            for level in (CacheLevel.L2_SSD, CacheLevel.L3_HDD):
+                limit = self._tier_limit(level)
+                while self.tier_index[level].stats()["bytes"] > limit:
+                    if not self._evict_lru(level, exclude=keep):
+                        break
+        with self.lock:
+            self.metrics.cache_size_bytes = self._calculate_cache_size()
     
     def _should_compress(self, size_bytes: int) -> bool:
         """Determine if model should be compressed"""
         return size_bytes > 1024 * 1024  # Compress if > 1MB
+
+    def _compression_admission(self, size_bytes: int, source) -> Tuple[bool, Optional[float], str]:
+        """Decide whether to compress from a sampled ratio estimate.
+
+        ``source`` is the payload (bytes-like) or a file path. Returns
+        (compress, sampled_ratio, decision). fp16/bf16 weights often save only a few
+        percent, which is not worth decompressing on every hit.
+        """
+        if not self._should_compress(size_bytes):
+            return False, None, "raw_small"
+        method = self.compressor.method
+        if method is None:
+            return False, None, "raw_unavailable"
+        try:
+            sampled = arena_compression.estimate_ratio(
+                source, method, self.config.compression_level,
+                self.config.compression_sample_count, self.config.compression_sample_kb * 1024
+            )
+        except Exception as e:
+            logger.warning(f"Compression sampling failed: {e}")
+            return True, None, "compressed"
+        if 1.0 - sampled < self.config.compression_min_saving:
+            return False, sampled, "raw_incompressible"
+        return True, sampled, "compressed"
     
-    def get_model(self, category: str, filename: str) -> Optional[bytes]:
-        """Get model from cache"""
-        start_time = time.time()
+    def _is_compressed(self, model_id: str) -> bool:
+        info = self.model_info.get(model_id)
+        return bool(info and info.compressed)
+
+    def _map_file(self, path: Path):
+        """Read-only zero-copy view of a cache file (pages come from the OS page cache).
+
+        The mapping stays valid while the view is referenced. On Windows a mapped
+        file cannot be deleted until the view is released.
+        """
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return b""
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(mapped)
+
+    def _is_encoded(self, model_id: str, path: Path) -> bool:
+        """True if the file at path is compressed (not loadable as the model itself).
+
+        The metadata record decides when there is one; the magic checks cover entries
+        whose record was lost (crash before the metadata save, unreadable model_info.json).
+        """
+        if arena_seekable.is_container(path):
+            return True
+        info = self.model_info.get(model_id)
+        if info is not None:
+            return info.compressed
+        return arena_compression.frame_method(path) is not None
+
+    def _read_entry(self, model_id: str, path: Path):
+        """Entry payload: a mapped view for raw entries, decompressed bytes otherwise."""
+        if not self._is_encoded(model_id, path):
+            return self._map_file(path)
+        return self.compressor.decompress_file(path)
+
+    def _entry_path(self, model_id: str) -> Optional[Path]:
+        for level in (CacheLevel.L2_SSD, CacheLevel.L3_HDD):
+            path = self._get_cache_path(model_id, level)
+            if path.exists():
+                return path
+        return None
+
+    def get_model_header(self, category: str, filename: str) -> Optional[Dict[str, Any]]:
+        """Safetensors header of a cached entry without decoding the tensors, or None.
+
+        Raw entries are parsed in place; seekable containers decode only the header chunk.
+        Entries stored as a single compressed frame have no index and return None.
+        """
         model_id = self._get_model_id(category, filename)
-        
+        path = self._entry_path(model_id)
+        if path is None:
+            return None
+        try:
+            if arena_seekable.is_container(path):
+                with arena_seekable.SeekableReader(path) as reader:
+                    return reader.header()
+            if self._is_compressed(model_id):
+                return None
+            view = self._map_file(path)
+            parsed = arena_seekable.parse_safetensors_header(lambda o, n: view[o:o + n], len(view))
+            return parsed[0] if parsed else None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Header read error: {e}")
+            return None
+
+    def read_tensor(self, category: str, filename: str, tensor_name: str) -> Optional[Any]:
+        """Raw bytes of one safetensors tensor, decoding only the chunks that hold it.
+
+        Returns a mapped view for raw entries, bytes for containers, None if unavailable.
+        """
+        model_id = self._get_model_id(category, filename)
+        path = self._entry_path(model_id)
+        if path is None:
+            return None
+        try:
+            if arena_seekable.is_container(path):
+                with arena_seekable.SeekableReader(path) as reader:
+                    return reader.tensor(tensor_name)
+            if self._is_compressed(model_id):
+                return None
+            view = self._map_file(path)
+            parsed = arena_seekable.parse_safetensors_header(lambda o, n: view[o:o + n], len(view))
+            if not parsed or tensor_name not in parsed[0]:
+                return None
+            begin, end = parsed[0][tensor_name]["data_offsets"]
+            return view[parsed[1] + begin:parsed[1] + end]
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Tensor read error: {e}")
+            return None
+
+    def _promote_to_l2(self, model_id: str, l3_path: Path, l2_path: Path) -> bool:
+        """Copy an L3 entry to L2 as stored (no decode, no Python-heap copy)."""
+        with self._key_locks.hold(model_id):
+            if l2_path.exists() or not l3_path.exists():
+                return False
+            tmp_path = self._temp_path(l2_path)
+            try:
+                shutil.copyfile(l3_path, tmp_path)
+                os.replace(tmp_path, l2_path)
+            except OSError:
+                tmp_path.unlink(missing_ok=True)
+                raise
+            self.tier_index[CacheLevel.L2_SSD].add(l2_path, l2_path.stat().st_size)
+        with self.lock:
+            info = self.model_info.get(model_id)
+            if info is not None:
+                info.cache_level = CacheLevel.L2_SSD
+                self.metadata_store.mark_dirty()
+        self._enforce_limits(keep=model_id)
+        return True
+
+    def _promote(self, model_id: str, l3_path: Path, l2_path: Path) -> None:
+        """Promote an L3 entry to L2: in the background (once per key) or inline."""
+        if not self.config.async_promotion:
+            try:
+                self._promote_to_l2(model_id, l3_path, l2_path)
+            except OSError as e:
+                logger.warning(f"L3 promotion error: {e}")
+            return
+
+        with self.lock:
+            if model_id in self._promotions:
+                return
+            self._promotions.add(model_id)
+            if self._promotion_executor is None:
+                self._promotion_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ArenaSmartPromote")
+
+        def run():
+            try:
+                if self._promote_to_l2(model_id, l3_path, l2_path):
+                    logger.info(f"Promoted to L2: {model_id}")
+            except OSError as e:
+                logger.warning(f"L3 promotion error: {e}")
+            finally:
+                with self.lock:
+                    self._promotions.discard(model_id)
+
+        self._promotion_executor.submit(run)
+
+    def _record_hit(self, model_id: str, start_time: float) -> None:
+        self.preloader.on_access(model_id)
         with self.lock:
-            # Check L1 cache first
-            if model_id in self.l1_cache:
-                self.metrics.hits += 1
-                self.metrics.total_requests += 1
+            self.metrics.hits += 1
+            self.metrics.total_requests += 1
+            if model_id in self.model_info:
                 self.model_info[model_id].access_count += 1
                 self.model_info[model_id].last_access = time.time()
-                self.metrics.update_hit_rate()
-                
-                load_time = (time.time() - start_time) * 1000
-                self.metrics.avg_load_time_ms = (
-                    self.metrics.avg_load_time_ms * 0.9 + load_time * 0.1
-                )
-                
-                logger.info(f"L1 cache hit: {filename}")
-                return self.l1_cache[model_id]
-            
-            # Check L2 cache
-            l2_path = self._get_cache_path(model_id, CacheLevel.L2_SSD)
-            if l2_path.exists():
-                try:
-                    with open(l2_path, 'rb') as f:
-                        data = f.read()
-                    
-                    # Decompress if needed
-                    if model_id in self.model_info and self.model_info[model_id].compressed:
-                        data = self.compressor.decompress_model(data)
-                    
-                    # Promote to L1 if space available
-                    if len(self.l1_cache) * 1024 * 1024 < self.config.l1_max_size_mb:
-                        self.l1_cache[model_id] = data
-                    
-                    self.metrics.hits += 1
-                    self.metrics.total_requests += 1
-                    if model_id in self.model_info:
-                        self.model_info[model_id].access_count += 1
-                        self.model_info[model_id].last_access = time.time()
-                    self.metrics.update_hit_rate()
-                    
-                    load_time = (time.time() - start_time) * 1000
-                    self.metrics.avg_load_time_ms = (
-                        self.metrics.avg_load_time_ms * 0.9 + load_time * 0.1
-                    )
-                    
-                    logger.info(f"L2 cache hit: {filename}")
-                    return data
-                except Exception as e:
-                    logger.warning(f"L2 cache read error: {e}")
-            
-            # Check L3 cache
-            l3_path = self._get_cache_path(model_id, CacheLevel.L3_HDD)
-            if l3_path.exists():
-                try:
-                    with open(l3_path, 'rb') as f:
-                        data = f.read()
-                    
-                    # Decompress if needed
-                    if model_id in self.model_info and self.model_info[model_id].compressed:
-                        data = self.compressor.decompress_model(data)
-                    
-                    # Promote to L2
-                    with open(l2_path, 'wb') as f:
-                        f.write(data)
-                    
-                    self.metrics.hits += 1
-                    self.metrics.total_requests += 1
-                    if model_id in self.model_info:
-                        self.model_info[model_id].access_count += 1
-                        self.model_info[model_id].last_access = time.time()
-                    self.metrics.update_hit_rate()
-                    
-                    load_time = (time.time() - start_time) * 1000
-                    self.metrics.avg_load_time_ms = (
-                        self.metrics.avg_load_time_ms * 0.9 + load_time * 0.1
-                    )
-                    
-                    logger.info(f"L3 cache hit: {filename}")
-                    return data
-                except Exception as e:
-                    logger.warning(f"L3 cache read error: {e}")
-            
-            # Cache miss
+                self.metadata_store.mark_dirty()
+            self.metrics.update_hit_rate()
+
+            load_time = (time.time() - start_time) * 1000
+            self.metrics.avg_load_time_ms = (
+                self.metrics.avg_load_time_ms * 0.9 + load_time * 0.1
+            )
+        if self.metadata_store.due():
+            self.flush_metadata()
+
+    def _record_miss(self, filename: str) -> None:
+        with self.lock:
             self.metrics.misses += 1
             self.metrics.total_requests += 1
             self.metrics.update_hit_rate()
-            
-            logger.info(f"Cache miss: {filename}")
+        logger.info(f"Cache miss: {filename}")
+
+    def _load_entry(self, model_id: str) -> Tuple[Optional[Any], Optional[str]]:
+        """Read an entry from L2, else L3 (scheduling promotion); returns (data, level)."""
+        l2_path = self._get_cache_path(model_id, CacheLevel.L2_SSD)
+        if l2_path.exists():
+            try:
+                data = self._read_entry(model_id, l2_path)
+                # Promote decoded data to L1 (mapped views are already served by the page cache)
+                if not isinstance(data, memoryview):
+                    self.l1_cache.put(model_id, data)
+                return data, "L2"
+            except Exception as e:
+                logger.warning(f"L2 cache read error: {e}")
+
+        l3_path = self._get_cache_path(model_id, CacheLevel.L3_HDD)
+        if l3_path.exists():
+            try:
+                # Serve from L3 now; the copy to L2 does not delay this hit
+                data = self._read_entry(model_id, l3_path)
+                self._promote(model_id, l3_path, l2_path)
+                if not isinstance(data, memoryview):
+                    self.l1_cache.put(model_id, data)
+                return data, "L3"
+            except Exception as e:
+                logger.warning(f"L3 cache read error: {e}")
+        return None, None
+
+    def get_model(self, category: str, filename: str) -> Optional[Any]:
+        """Get model from cache.
+
+        Returns bytes (L1 hits and compressed entries) or a read-only memoryview over
+        an mmap of the L2 file (uncompressed entries), so a hit on a multi-GB entry is
+        not copied into the Python heap. Use bytes(result) if a real copy is needed.
+        """
+        start_time = time.time()
+        model_id = self._get_model_id(category, filename)
+        
+        # Check L1 cache first (it has its own lock)
+        data = self.l1_cache.get(model_id)
+        if data is not None:
+            self._record_hit(model_id, start_time)
+            logger.info(f"L1 cache hit: {filename}")
+            return data
+        
+        # L2/L3 reads run without the cache lock; concurrent requests for a key share one load
+        data, level = self._flight.do(model_id, lambda: self._load_entry(model_id))
+        if data is None:
+            self._record_miss(filename)
+            return None
+        self._record_hit(model_id, start_time)
+        logger.info(f"{level} cache hit: {filename}")
+        return data
+
+    def get_model_path(self, category: str, filename: str) -> Optional[str]:
+        """Path of an uncompressed cached entry, or None.
+
+        An L3 entry is returned in place while it is promoted to L2 in the background.
+
+        Lets callers that need a file (ComfyUI loaders) use the cache file directly
+        instead of materialising the model and writing it out again.
+        """
+        start_time = time.time()
+        model_id = self._get_model_id(category, filename)
+
+        if self._is_compressed(model_id):
+            return None
+        path = self._get_cache_path(model_id, CacheLevel.L2_SSD)
+        if not path.exists():
+            l3_path = self._get_cache_path(model_id, CacheLevel.L3_HDD)
+            if not l3_path.exists():
+                self._record_miss(filename)
+                return None
+            if self._is_encoded(model_id, l3_path):
+                return None
+            # Use the L3 file until the L2 copy is in place
+            self._promote(model_id, l3_path, path)
+            if not path.exists():
+                path = l3_path
+        elif self._is_encoded(model_id, path):
             return None
+        self._record_hit(model_id, start_time)
+        logger.info(f"Cache path hit: {filename}")
+        return str(path)
     
     def cache_model(self, category: str, filename: str, model_data: bytes) -> bool:
         """Cache model data"""
         model_id = self._get_model_id(category, filename)
         original_size = len(model_data)
         
-        with self.lock:
-            # Determine compression
-            should_compress = self._should_compress(original_size)
-            if should_compress:
-                compressed_data, ratio = self.compressor.compress_model(model_data)
-            else:
-                compressed_data, ratio = model_data, 1.0
-            
-            # Store in L1 cache if space available
-            if len(self.l1_cache) * 1024 * 1024 < self.config.l1_max_size_mb:
-                self.l1_cache[model_id] = compressed_data
+        # Compress and write outside the lock so lookups are not blocked by the I/O.
+        # Always store in L2: L1 evicts by size, so it cannot hold the only copy
+        l2_path = self._get_cache_path(model_id, CacheLevel.L2_SSD)
+        tmp_path = self._temp_path(l2_path)
+        should_compress, ratio, sampled_ratio, decision, digest = self._write_entry(model_data, original_size, tmp_path)
+        
+        with self._key_locks.hold(model_id), self.lock:
+            os.replace(tmp_path, l2_path)
+            self.tier_index[CacheLevel.L2_SSD].add(l2_path, l2_path.stat().st_size)
+            cache_level = CacheLevel.L2_SSD
+
+            # Keep the uncompressed data in L1 if admitted (L1 hits are returned as is)
+            if self.l1_cache.put(model_id, model_data):
                 cache_level = CacheLevel.L1_MEMORY
-            else:
-                # Store in L2 cache
-                l2_path = self._get_cache_path(model_id, CacheLevel.L2_SSD)
-                with open(l2_path, 'wb') as f:
-                    f.write(compressed_data)
-                cache_level = CacheLevel.L2_SSD
             
             # Update model info
             self.model_info[model_id] = ModelInfo(
@@ -432,36 +803,164 @@ class MultiLevelCache:
                 cache_level=cache_level,
                 compressed=should_compress,
                 compression_ratio=ratio,
+                sampled_ratio=sampled_ratio,
+                compression_decision=decision,
+                compression_level=self.config.compression_level if should_compress else 0,
+                stored_bytes=l2_path.stat().st_size,
+                digest=digest,
+                created_at=time.time(),
                 last_access=time.time()
             )
+            self._save_model_info()
             
-            # Update metrics
-            self.metrics.cache_size_bytes = self._calculate_cache_size()
-            
-            logger.info(f"Cached model: {filename} (level: {cache_level.value}, compressed: {should_compress})")
-            return True
+            logger.info(f"Cached model: {filename} (level: {cache_level.value}, {decision}, ratio: {ratio:.3f})")
+        self._enforce_limits(keep=model_id)
+        return True
+    
+    def _temp_path(self, path: Path) -> Path:
+        return path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+    def _write_entry(self, source, original_size: int, tmp_path: Path,
+                     cancelled: Optional[Callable[[], bool]] = None) -> Tuple[bool, float, Optional[float], str, str]:
+        """Write a payload or file to tmp_path, compressed if admitted.
+
+        Returns (compressed, ratio, sampled_ratio, decision, digest); the sha256 digest
+        is taken from the bytes being written, so the source is read once. ``cancelled()``
+        is polled while a file is copied (PreloadCancelled aborts the write).
+        """
+        def on_progress(_done: int) -> None:
+            if cancelled is not None and cancelled():
+                raise PreloadCancelled(str(tmp_path))
+
+        should_compress, sampled_ratio, decision = self._compression_admission(original_size, source)
+        ratio = 1.0
+        hasher = hashlib.sha256()
+        try:
+            if should_compress:
+                try:
+                    _, stored_size = self.compressor.compress_file(source, str(tmp_path), hasher, on_progress)
+                    ratio = stored_size / original_size if original_size else 1.0
+                    if self.config.compression_chunk_mb <= 0 and isinstance(source, (str, os.PathLike)):
+                        hasher = None  # a single streamed frame never sees the bytes
+                except PreloadCancelled:
+                    raise
+                except Exception as e:
+                    logger.warning(f"Compression failed, storing raw: {e}")
+                    should_compress, decision = False, "raw_failed"
+                    hasher = hashlib.sha256()
+            if not should_compress:
+                if isinstance(source, (str, os.PathLike)):
+                    with open(source, 'rb') as src:
+                        copy_stream(src, str(tmp_path), original_size, CopyOptions(drop_cache=False),
+                                    on_progress, hasher)
+                else:
+                    hasher.update(source)
+                    with open(tmp_path, 'wb') as f:
+                        f.write(source)
+        except Exception:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        digest = hasher.hexdigest() if hasher is not None else ""
+        return should_compress, ratio, sampled_ratio, decision, digest
+
+    def cache_model_file(self, category: str, filename: str, source_path: str,
+                         cancelled: Optional[Callable[[], bool]] = None) -> bool:
+        """Cache a model file by streaming it into L2 (compressed when configured).
+
+        The model is never loaded into memory, and compression (multi-threaded zstd)
+        runs outside the cache lock; only the final rename and metadata update take it.
+        ``cancelled()`` lets the preloader abort the copy (raises PreloadCancelled).
+        """
+        model_id = self._get_model_id(category, filename)
+        original_size = os.path.getsize(source_path)
+        l2_path = self._get_cache_path(model_id, CacheLevel.L2_SSD)
+        tmp_path = self._temp_path(l2_path)
+        
+        should_compress, ratio, sampled_ratio, decision, digest = self._write_entry(
+            source_path, original_size, tmp_path, cancelled
+        )
+        
+        with self._key_locks.hold(model_id), self.lock:
+            os.replace(tmp_path, l2_path)
+            self.tier_index[CacheLevel.L2_SSD].add(l2_path, l2_path.stat().st_size)
+            self.l1_cache.pop(model_id)
+            self.model_info[model_id] = ModelInfo(
+                model_id=model_id,
+                category=category,
+                filename=filename,
+                size_bytes=original_size,
+                cache_level=CacheLevel.L2_SSD,
+                compressed=should_compress,
+                compression_ratio=ratio,
+                sampled_ratio=sampled_ratio,
+                compression_decision=decision,
+                compression_level=self.config.compression_level if should_compress else 0,
+                stored_bytes=l2_path.stat().st_size,
+                digest=digest,
+                created_at=time.time(),
+                last_access=time.time()
+            )
+            self._save_model_info()
+        
+        logger.info(f"Cached model file: {filename} ({decision}, ratio: {ratio:.3f})")
+        self._enforce_limits(keep=model_id)
+        return True
     
+    def _preload_plan(self, model_id: str) -> Optional[int]:
+        """Bytes a preload of this entry would write to L2, or None if there is nothing to do."""
+        if model_id in self.l1_cache or self._get_cache_path(model_id, CacheLevel.L2_SSD).exists():
+            return None
+        l3_path = self._get_cache_path(model_id, CacheLevel.L3_HDD)
+        if l3_path.exists():
+            return l3_path.stat().st_size
+        category, filename = self._preload_names[model_id]
+        source = self.source_resolver(category, filename)
+        if not source or not os.path.isfile(source):
+            return None
+        return os.path.getsize(source)
+
+    def _preload_load(self, model_id: str, cancelled: Callable[[], bool]) -> None:
+        l3_path = self._get_cache_path(model_id, CacheLevel.L3_HDD)
+        l2_path = self._get_cache_path(model_id, CacheLevel.L2_SSD)
+        if l3_path.exists():
+            self._promote_to_l2(model_id, l3_path, l2_path)
+            return
+        category, filename = self._preload_names[model_id]
+        source = self.source_resolver(category, filename)
+        if source:
+            self.cache_model_file(category, filename, source, cancelled)
+            logger.info(f"Preloaded predicted model: {category}/{filename}")
+
     def predict_and_preload(self, current_models: List[str]) -> List[str]:
-        """Predict and preload next models"""
+        """Predict the next workflow's models and warm them into L2 in the background.
+
+        current_models are "category/filename" keys (as returned by analyze_workflow).
+        Predictions at or above preload_confidence replace the previous preload plan;
+        returns the keys queued for preloading.
+        """
         if not self.config.enable_prediction:
             return []
         
-        # Predict next models
-        predicted_models = self.workflow_analyzer.predict_next_models(
-            current_models, self.config.prediction_window
-        )
-        
-        # Preload predicted models (simplified - would need actual model loading)
-        preloaded = []
-        for model in predicted_models:
-            if self.get_model("predicted", model) is None:
-                # Would load and cache the model here
-                preloaded.append(model)
+        ranked = self.workflow_analyzer.predict_ranked(current_models, self.config.prediction_window)
+        current = set(current_models)
+        plan = []
+        with self.lock:
+            for key, confidence in ranked:
+                if confidence < self.config.preload_confidence or key in current or "/" not in key:
+                    continue
+                category, filename = key.split("/", 1)
+                model_id = self._get_model_id(category, filename)
+                self._preload_names[model_id] = (category, filename)
+                plan.append(model_id)
         
-        return preloaded
+        queued = set(self.preloader.submit(plan))
+        with self.lock:
+            return [f"{c}/{f}" for model_id, (c, f) in self._preload_names.items() if model_id in queued]
     
     def get_metrics(self) -> Dict[str, Any]:
         """Get cache performance metrics"""
+        l2 = self.tier_index[CacheLevel.L2_SSD].stats()
+        l3 = self.tier_index[CacheLevel.L3_HDD].stats()
         with self.lock:
             return {
                 "hits": self.metrics.hits,
@@ -472,8 +971,18 @@ class MultiLevelCache:
                 "cache_size_bytes": self.metrics.cache_size_bytes,
                 "avg_load_time_ms": self.metrics.avg_load_time_ms,
                 "l1_size": len(self.l1_cache),
-                "l2_size": len(list(self.l2_dir.glob("*.cache"))),
-                "l3_size": len(list(self.l3_dir.glob("*.cache")))
+                "l1_bytes": self.l1_cache.bytes_used,
+                "l1_max_bytes": self.l1_cache.max_bytes,
+                "l1_rejected": self.l1_cache.rejected,
+                "shared_loads": self._flight.shared,
+                "promotions_pending": len(self._promotions),
+                "preload": self.preloader.stats(),
+                "l2_size": l2["files"],
+                "l2_bytes": l2["bytes"],
+                "l2_max_bytes": self._tier_limit(CacheLevel.L2_SSD),
+                "l3_size": l3["files"],
+                "l3_bytes": l3["bytes"],
+                "l3_max_bytes": self._tier_limit(CacheLevel.L3_HDD),
             }
     
     def clear_cache(self, level: Optional[CacheLevel] = None) -> str:
@@ -485,34 +994,57 @@ class MultiLevelCache:
             if level is None or level == CacheLevel.L2_SSD:
                 for file_path in self.l2_dir.glob("*.cache"):
                     file_path.unlink()
+                self.preloader.reset()
             
             if level is None or level == CacheLevel.L3_HDD:
                 for file_path in self.l3_dir.glob("*.cache"):
                     file_path.unlink()
             
+            for index in self.tier_index.values():
+                index.rebuild()
+            
             # Reset metrics
             self.metrics = CacheMetrics()
             self.model_info.clear()
+            self._save_model_info()
             
             return "Cache cleared successfully"
 
 class ArenaSmartCache:
     """Main smart cache class for ComfyUI integration"""
     
-    def __init__(self, config: CacheConfig = None):
+    def __init__(self, config: CacheConfig = None,
+                 source_resolver: Optional[Callable[[str, str], Optional[str]]] = None):
         self.config = config or CacheConfig()
-        self.cache = MultiLevelCache(self.config)
-        self.workflow_analyzer = WorkflowAnalyzer()
+        self.cache = MultiLevelCache(self.config, source_resolver)
+        # Share the cache's analyzer: what analyze_workflow learns is what predict_and_preload uses
+        self.workflow_analyzer = self.cache.workflow_analyzer
         
         logger.info("Arena Smart Cache initialized")
     
-    def get_model(self, category: str, filename: str) -> Optional[bytes]:
-        """Get model from smart cache"""
+    def get_model(self, category: str, filename: str) -> Optional[Any]:
+        """Get model from smart cache (bytes or a read-only mapped memoryview)"""
         return self.cache.get_model(category, filename)
+
+    def get_model_path(self, category: str, filename: str) -> Optional[str]:
+        """Get the cache file path of an uncompressed model"""
+        return self.cache.get_model_path(category, filename)
     
     def cache_model(self, category: str, filename: str, model_data: bytes) -> bool:
         """Cache model in smart cache"""
         return self.cache.cache_model(category, filename, model_data)
+
+    def cache_model_file(self, category: str, filename: str, source_path: str) -> bool:
+        """Cache a model file in smart cache without loading it into memory"""
+        return self.cache.cache_model_file(category, filename, source_path)
+
+    def get_model_header(self, category: str, filename: str) -> Optional[Dict[str, Any]]:
+        """Get the safetensors header of a cached model without a full decode"""
+        return self.cache.get_model_header(category, filename)
+
+    def read_tensor(self, category: str, filename: str, tensor_name: str) -> Optional[Any]:
+        """Read one tensor of a cached safetensors model"""
+        return self.cache.read_tensor(category, filename, tensor_name)
     
     def analyze_workflow(self, workflow: Dict) -> List[str]:
         """Analyze workflow and predict models"""
@@ -520,7 +1052,7 @@ class ArenaSmartCache:
         
         if self.config.enable_prediction:
             predicted = self.cache.predict_and_preload(models)
-            logger.info(f"Predicted {len(predicted)} models for preloading")
+            logger.info(f"Queued {len(predicted)} predicted models for preloading: {predicted}")
         
         return models
     
@@ -562,10 +1094,8 @@ if __name__ == "__main__":
     
     # Example workflow analysis
     workflow = {
-        "nodes": {
-            "1": {"inputs": {"model": "model1.pt"}},
-            "2": {"inputs": {"model": "model2.pt"}}
-        }
+        "1": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "model1.safetensors"}},
+        "2": {"class_type": "LoraLoader", "inputs": {"lora_name": "model2.safetensors"}}
     }
     
     models = cache.analyze_workflow(workflow)
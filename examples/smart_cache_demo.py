@@ -125,31 +125,22 @@ def demo_workflow_analysis():
     print("DEMO: Workflow Analysis and Prediction")
     print("="*60)
     
-    # Create sample workflows
+    # Create sample workflows (API prompt format: the loader input names give the model category)
     workflows = [
         {
-            "id": "workflow_1",
-            "nodes": {
-                "1": {"inputs": {"model": "checkpoint1.pt"}},
-                "2": {"inputs": {"model": "lora1.pt"}},
-                "3": {"inputs": {"model": "vae1.pt"}}
-            }
+            "1": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "checkpoint1.safetensors"}},
+            "2": {"class_type": "LoraLoader", "inputs": {"lora_name": "lora1.safetensors"}},
+            "3": {"class_type": "VAELoader", "inputs": {"vae_name": "vae1.safetensors"}}
         },
         {
-            "id": "workflow_2", 
-            "nodes": {
-                "1": {"inputs": {"model": "checkpoint1.pt"}},
-                "2": {"inputs": {"model": "lora2.pt"}},
-                "3": {"inputs": {"model": "controlnet1.pt"}}
-            }
+            "1": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "checkpoint1.safetensors"}},
+            "2": {"class_type": "LoraLoader", "inputs": {"lora_name": "lora2.safetensors"}},
+            "3": {"class_type": "ControlNetLoader", "inputs": {"control_net_name": "controlnet1.safetensors"}}
         },
         {
-            "id": "workflow_3",
-            "nodes": {
-                "1": {"inputs": {"model": "checkpoint2.pt"}},
-                "2": {"inputs": {"model": "lora1.pt"}},
-                "3": {"inputs": {"model": "upscale1.pt"}}
-            }
+            "1": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "checkpoint2.safetensors"}},
+            "2": {"class_type": "LoraLoader", "inputs": {"lora_name": "lora1.safetensors"}},
+            "3": {"class_type": "UpscaleModelLoader", "inputs": {"model_name": "upscale1.pth"}}
         }
     ]
     
@@ -164,10 +155,14 @@ def demo_workflow_analysis():
         print(f"   Models: {models}")
     
     print("\n2. Predicting next models...")
-    current_models = ["checkpoint1.pt", "lora1.pt"]
-    predicted = cache.cache.predict_and_preload(current_models)
+    # Keys are "category/filename", as returned by analyze_workflow
+    current_models = ["checkpoints/checkpoint1.safetensors", "loras/lora1.safetensors"]
+    ranked = cache.workflow_analyzer.predict_ranked(current_models, config.prediction_window)
     print(f"   Current models: {current_models}")
-    print(f"   Predicted next: {predicted}")
+    for model, confidence in ranked:
+        print(f"   Predicted next: {model} (confidence {confidence:.2f})")
+    queued = cache.cache.predict_and_preload(current_models)
+    print(f"   Queued for background preloading: {queued}")
 
 def demo_compression_and_quantization():
     """Demonstrate compression and quantization features"""
@@ -254,10 +249,8 @@ def demo_hybrid_cache():
     # Test workflow analysis
     print("\n2. Testing workflow analysis...")
     workflow = {
-        "nodes": {
-            "1": {"inputs": {"model": "large_model.pt"}},
-            "2": {"inputs": {"model": "small_model.pt"}}
-        }
+        "1": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "large_model.safetensors"}},
+        "2": {"class_type": "LoraLoader", "inputs": {"lora_name": "small_model.safetensors"}}
     }
     
     models = hybrid_cache.analyze_workflow(workflow)
@@ -0,0 +1,580 @@
+#!/usr/bin/env python3
+"""
+Arena I/O Benchmark - reproducible benchmark of the AutoCache paths against a synthetic throttled "NAS"
+RU: Воспроизводимый бенчмарк путей AutoCache на синтетической библиотеке моделей и медленном "NAS"
+
+What it does:
+- builds a synthetic model library of sparse files with realistic relative sizes
+  (checkpoints, loras, vae, clip, controlnet, upscale) under <workdir>/nas;
+- serves it through a throttled file layer: latency per open and per
+  folder_paths lookup, shared link bandwidth and per-stream bandwidth for reads
+  (installed as the cache module's ``open``);
+- drives the real arena_auto_cache_simple functions with a synthetic ComfyUI
+  folder_paths module and measures:
+    resolver_miss  - patched get_full_path for models not in the cache
+    resolver_hit   - patched get_full_path for cached models
+    resolve_batch  - /arena/resolve body (_resolve_models) for the whole library
+    copy           - copy workers at 1/2/4/8 workers (throughput, wall time)
+    scan           - arena_path_manager.scan_nas_structure (local metadata, not throttled)
+    prune          - _prune_cache_if_needed evicting about half of the cache
+    load_under_copy - full reads of a cached "hot" model while the largest model
+                     is being copied, per copy mode (buffered, preallocate +
+                     fadvise, O_DIRECT) against a no-copy baseline
+    load_under_resolve - longest asyncio event-loop tick while /arena/resolve
+                     resolves --resolve-models models (the library repeated)
+                     through _run_blocking_fs, against the same resolve run
+                     inline on the loop
+- prints one JSON document (or writes --output) for regression tracking.
+
+Nothing outside <workdir> is touched: settings are built explicitly, the NAS
+catalog file is redirected and the exit-time .env reset is unregistered.
+
+Usage:
+    python scripts/arena_bench.py --output bench.json
+    python scripts/arena_bench.py --scale 0.05 --nas-mbps 110 --nas-latency-ms 8 --workers 1,2,4,8
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import atexit
+import contextlib
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import types
+from pathlib import Path
+from queue import Queue
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+MB = 1024 * 1024
+GB = 1024 * MB
+
+# RU: Типичная библиотека: (категория, шаблон имени, количество, размер в байтах при scale=1)
+LIBRARY_SPEC = [
+    ("checkpoints", "sdxl_checkpoint_{i}.safetensors", 6, int(6.5 * GB)),
+    ("checkpoints", "sd15_checkpoint_{i}.safetensors", 4, int(2.0 * GB)),
+    ("loras", "style_lora_{i}.safetensors", 24, 150 * MB),
+    ("vae", "sdxl_vae_{i}.safetensors", 2, 320 * MB),
+    ("clip", "clip_l_{i}.safetensors", 2, 240 * MB),
+    ("text_encoders", "t5xxl_fp16_{i}.safetensors", 1, int(9.1 * GB)),
+    ("controlnet", "controlnet_union_sdxl_{i}.safetensors", 3, int(2.5 * GB)),
+    ("upscale_models", "upscaler_x4_{i}.pth", 3, 64 * MB),
+]
+
+
+# ---------------------------------------------------------------------------
+# Synthetic library and throttled NAS
+# ---------------------------------------------------------------------------
+
+
+def build_library(nas_root: Path, scale: float, seed: int) -> list[tuple[str, str, int]]:
+    """Create sparse model files; returns [(category, filename, size)]."""
+    rng = random.Random(seed)
+    models = []
+    for category, pattern, count, size in LIBRARY_SPEC:
+        folder = nas_root / category
+        folder.mkdir(parents=True, exist_ok=True)
+        for i in range(count):
+            # RU: +-10% разброс размеров, файлы разреженные (truncate) - место на диске не занимают
+            file_size = max(MB, int(size * scale * rng.uniform(0.9, 1.1)))
+            filename = pattern.format(i=i)
+            with open(folder / filename, "wb") as f:
+                f.truncate(file_size)
+            models.append((category, filename, file_size))
+    return models
+
+
+class ThrottledNAS:
+    """Latency and bandwidth limited view of a local directory."""
+
+    def __init__(self, root: Path, latency_s: float, link_bps: float, stream_bps: float = 0.0) -> None:
+        self.root = os.path.normcase(os.path.abspath(root))
+        self.latency_s = latency_s
+        self.link_bps = link_bps
+        self.stream_bps = stream_bps
+        self._lock = threading.Lock()
+        self._link_free_at = 0.0
+
+    def owns(self, path) -> bool:
+        return os.path.normcase(os.path.abspath(os.fspath(path))).startswith(self.root)
+
+    def lookup(self) -> None:
+        """One metadata round trip."""
+        if self.latency_s:
+            time.sleep(self.latency_s)
+
+    def consume(self, nbytes: int, stream: dict) -> None:
+        """Account ``nbytes`` on the shared link and the stream; sleep until both allow it."""
+        now = time.perf_counter()
+        wait_until = now
+        if self.link_bps:
+            with self._lock:
+                self._link_free_at = max(self._link_free_at, now) + nbytes / self.link_bps
+                wait_until = self._link_free_at
+        if self.stream_bps:
+            stream["free_at"] = max(stream.get("free_at", now), now) + nbytes / self.stream_bps
+            wait_until = max(wait_until, stream["free_at"])
+        delay = wait_until - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    def open(self, path, mode="r", *args, **kwargs):
+        """Drop-in for builtins.open: NAS reads are throttled, everything else is untouched."""
+        f = open(path, mode, *args, **kwargs)
+        if "r" in mode and "+" not in mode and self.owns(path):
+            self.lookup()
+            return _ThrottledReader(f, self)
+        return f
+
+
+class _ThrottledReader:
+    def __init__(self, f, nas: ThrottledNAS) -> None:
+        self._f = f
+        self._nas = nas
+        self._stream: dict = {}
+
+    def read(self, size=-1):
+        data = self._f.read(size)
+        if data:
+            self._nas.consume(len(data), self._stream)
+        return data
+
+    def readinto(self, buffer):
+        n = self._f.readinto(buffer)
+        if n:
+            self._nas.consume(n, self._stream)
+        return n
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._f.close()
+        return False
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+
+def make_folder_paths(nas: ThrottledNAS, nas_root: Path, categories: list[str]) -> types.ModuleType:
+    """Synthetic ComfyUI folder_paths module over the throttled NAS."""
+    module = types.ModuleType("folder_paths")
+    module.folder_names_and_paths = {c: ([str(nas_root / c)], set()) for c in categories}
+
+    def get_folder_paths(folder_name):
+        return list(module.folder_names_and_paths.get(folder_name, ([], set()))[0])
+
+    def get_full_path(folder_name, filename):
+        for folder in get_folder_paths(folder_name):
+            nas.lookup()
+            candidate = os.path.join(folder, filename)
+            if os.path.isfile(candidate):
+                return candidate
+        return None
+
+    def get_filename_list(folder_name):
+        nas.lookup()
+        names = []
+        for folder in get_folder_paths(folder_name):
+            if os.path.isdir(folder):
+                names.extend(sorted(os.listdir(folder)))
+        return names
+
+    module.get_folder_paths = get_folder_paths
+    module.get_full_path = get_full_path
+    module.get_filename_list = get_filename_list
+    return module
+
+
+# ---------------------------------------------------------------------------
+# Measurements
+# ---------------------------------------------------------------------------
+
+
+def _summary(samples: list[float]) -> dict:
+    """Latency summary in milliseconds."""
+    if not samples:
+        return {"n": 0}
+    ordered = sorted(samples)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * 1000.0
+
+    return {
+        "n": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000.0,
+        "p50_ms": pct(50),
+        "p95_ms": pct(95),
+        "p99_ms": pct(99),
+        "max_ms": ordered[-1] * 1000.0,
+    }
+
+
+def _cached_files(cache_root: Path) -> list[Path]:
+    """Finished model files in the cache (no .part, no .arena* coordination files)."""
+    return [
+        p for p in cache_root.rglob("*")
+        if p.is_file() and p.suffix != ".part"
+        and not any(part.startswith(".arena") for part in p.relative_to(cache_root).parts)
+    ]
+
+
+def _reset_cache(simple, cache_root: Path) -> None:
+    shutil.rmtree(cache_root, ignore_errors=True)
+    cache_root.mkdir(parents=True)
+    simple._get_cache_index().rebuild()
+
+
+def bench_resolver(simple, folder_paths, models, cache_root: Path, iterations: int) -> dict:
+    """Latency of the patched get_full_path on misses and hits."""
+    _reset_cache(simple, cache_root)
+    miss = []
+    for _ in range(iterations):
+        for category, filename, _size in models:
+            t0 = time.perf_counter()
+            folder_paths.get_full_path(category, filename)
+            miss.append(time.perf_counter() - t0)
+
+    # RU: Заполняем кеш разреженными копиями по тем же путям, что и резолвер
+    for category, filename, size in models:
+        with open(simple._get_cache_path(category, filename), "wb") as f:
+            f.truncate(size)
+    hit = []
+    for _ in range(iterations):
+        for category, filename, _size in models:
+            t0 = time.perf_counter()
+            folder_paths.get_full_path(category, filename)
+            hit.append(time.perf_counter() - t0)
+    return {"resolver_miss": _summary(miss), "resolver_hit": _summary(hit)}
+
+
+def bench_resolve_batch(simple, models, cache_root: Path, iterations: int) -> dict:
+    """Wall time of the /arena/resolve body for the whole library (half cached)."""
+    _reset_cache(simple, cache_root)
+    for category, filename, size in models[::2]:
+        with open(simple._get_cache_path(category, filename), "wb") as f:
+            f.truncate(size)
+    payload = [{"category": c, "filename": f} for c, f, _ in models]
+    samples = []
+    for _ in range(iterations):
+        simple._source_sizes.clear()
+        simple._get_cache_index().rebuild()
+        t0 = time.perf_counter()
+        simple._resolve_models(payload)
+        samples.append(time.perf_counter() - t0)
+    return {"models": len(payload), **_summary(samples)}
+
+
+def bench_copy(simple, folder_paths, models, cache_root: Path, worker_counts: list[int]) -> list[dict]:
+    """Copy the whole library through the real copy workers at several worker counts."""
+    results = []
+    total_bytes = sum(size for _, _, size in models)
+    for workers in worker_counts:
+        _reset_cache(simple, cache_root)
+        # RU: Новая очередь на каждый прогон; воркеры прошлых прогонов остаются заблокированы на старой
+        simple._copy_queue = Queue()
+        with simple._scheduled_lock:
+            simple._scheduled_tasks.clear()
+        for i in range(workers):
+            threading.Thread(target=simple._copy_worker, daemon=True, name=f"ArenaBenchCopy-{workers}-{i}").start()
+
+        t0 = time.perf_counter()
+        for category, filename, _size in models:
+            source = folder_paths.get_full_path_origin(category, filename)
+            simple._enqueue_copy(category, filename, source, str(simple._get_cache_path(category, filename)))
+        simple._copy_queue.join()
+        elapsed = time.perf_counter() - t0
+        # RU: Даем воркерам снова встать в get() старой очереди до ее подмены
+        time.sleep(0.2)
+
+        copied = sum(p.stat().st_size for p in _cached_files(cache_root))
+        results.append({
+            "workers": workers,
+            "files": len(models),
+            "bytes": copied,
+            "complete": copied == total_bytes,
+            "wall_s": elapsed,
+            "throughput_mbps": copied / MB / elapsed if elapsed > 0 else 0.0,
+        })
+    return results
+
+
+def bench_scan(nas_root: Path, workdir: Path, iterations: int) -> dict:
+    """Full NAS structure scan (catalog file redirected into the workdir)."""
+    from autocache import arena_path_manager
+
+    arena_path_manager._CACHE_FILE = workdir / "arena_nas_cache.json"
+    samples = []
+    folders = 0
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        path_map = arena_path_manager.scan_nas_structure(str(nas_root), use_cache=False, min_size_mb=0.0)
+        samples.append(time.perf_counter() - t0)
+        folders = sum(len(v) for v in path_map.values())
+    return {"folders": folders, "throttled": False, **_summary(samples)}
+
+
+def bench_prune(simple, models, cache_root: Path, iterations: int) -> dict:
+    """Prune a full cache down to a limit of half its size."""
+    total = sum(size for _, _, size in models)
+    samples = []
+    evicted = 0
+    for _ in range(iterations):
+        _reset_cache(simple, cache_root)
+        for category, filename, size in models:
+            with open(simple._get_cache_path(category, filename), "wb") as f:
+                f.truncate(size)
+        simple._settings.max_cache_gb = total / 2 / GB
+        t0 = time.perf_counter()
+        simple._prune_cache_if_needed()
+        samples.append(time.perf_counter() - t0)
+        remaining = len(_cached_files(cache_root))
+        evicted = len(models) - remaining
+        simple._settings.max_cache_gb = 0.0
+    return {"files": len(models), "evicted": evicted, **_summary(samples)}
+
+
+# RU: Режимы записи копии: (имя, ARENA_COPY_PREALLOCATE, ARENA_COPY_DROP_CACHE, ARENA_COPY_DIRECT)
+COPY_MODES = [
+    ("buffered", "0", "0", "0"),
+    ("preallocate_fadvise", "1", "1", "0"),
+    ("direct", "1", "1", "1"),
+]
+_COPY_MODE_KEYS = ("ARENA_COPY_PREALLOCATE", "ARENA_COPY_DROP_CACHE", "ARENA_COPY_DIRECT")
+
+
+def _load_file(path: Path) -> None:
+    """Read a whole file the way a loader does (large sequential reads)."""
+    with open(path, "rb") as f:
+        while f.read(8 * MB):
+            pass
+
+
+def bench_load_under_copy(simple, folder_paths, models, cache_root: Path, iterations: int) -> dict:
+    """Latency of loading a cached model while the largest model is copied, per copy mode."""
+    _reset_cache(simple, cache_root)
+    category, filename, size = max(models, key=lambda m: m[2])
+    source = folder_paths.get_full_path_origin(category, filename)
+    destination = str(simple._get_cache_path(category, filename))
+
+    # RU: "Горячая" модель с реальными данными (не разреженная), уже лежит в кеше
+    hot_size = max(32 * MB, min(size // 2, 512 * MB))
+    hot_path = cache_root / "vae" / "hot_model.safetensors"
+    hot_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(hot_path, "wb") as f:
+        block = os.urandom(MB)
+        for _ in range(hot_size // MB):
+            f.write(block)
+    _load_file(hot_path)
+
+    loads = max(8, iterations * 4)
+    saved_env = {key: os.environ.get(key) for key in _COPY_MODE_KEYS}
+    results = {"copied_model": f"{category}/{filename}", "copy_bytes": size, "hot_bytes": hot_size}
+    try:
+        for mode, preallocate, drop_cache, direct in [("baseline", None, None, None)] + COPY_MODES:
+            stop = threading.Event()
+            copies = []
+
+            def _copy_loop():
+                # RU: Копия крутится по кругу, пока идут замеры загрузки
+                while not stop.is_set():
+                    job_id = simple._copy_jobs.enqueue(category, filename, source, destination, size)
+                    simple._copy_jobs.start(job_id, "bench", size)
+                    t0 = time.perf_counter()
+                    simple._copy_file_with_progress(source, destination + ".part", size, job_id)
+                    copies.append(time.perf_counter() - t0)
+                    simple._copy_jobs.finish(job_id)
+
+            copier = None
+            if mode != "baseline":
+                os.environ.update(zip(_COPY_MODE_KEYS, (preallocate, drop_cache, direct)))
+                copier = threading.Thread(target=_copy_loop, daemon=True, name=f"ArenaBenchCopy-{mode}")
+                copier.start()
+                time.sleep(0.05)
+            samples = []
+            for _ in range(loads):
+                t0 = time.perf_counter()
+                _load_file(hot_path)
+                samples.append(time.perf_counter() - t0)
+            stop.set()
+            if copier is not None:
+                copier.join()
+            entry = {"load": _summary(samples)}
+            if copies:
+                entry["copies"] = len(copies)
+                entry["copy_throughput_mbps"] = size * len(copies) / MB / sum(copies)
+            results[mode] = entry
+    finally:
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+    return results
+
+
+async def _max_loop_tick(work, tick_s: float = 0.001) -> tuple[float, int, float]:
+    """Run ``work()`` (a coroutine factory) while a 1 ms ticker measures the loop; (max tick s, ticks, wall s)."""
+    loop = asyncio.get_running_loop()
+    stop = False
+    gaps = []
+
+    async def _ticker():
+        last = loop.time()
+        while not stop:
+            await asyncio.sleep(tick_s)
+            now = loop.time()
+            gaps.append(now - last)
+            last = now
+
+    ticker = asyncio.create_task(_ticker())
+    await asyncio.sleep(tick_s)
+    t0 = time.perf_counter()
+    await work()
+    wall = time.perf_counter() - t0
+    stop = True
+    await ticker
+    return max(gaps, default=0.0), len(gaps), wall
+
+
+def bench_load_under_resolve(simple, models, cache_root: Path, count: int) -> dict:
+    """Event-loop responsiveness while a large resolve runs in the FS executor vs inline on the loop."""
+    _reset_cache(simple, cache_root)
+    for category, filename, size in models[::2]:
+        with open(simple._get_cache_path(category, filename), "wb") as f:
+            f.truncate(size)
+    payload = [{"category": c, "filename": f} for c, f, _ in (models * (count // len(models) + 1))[:count]]
+
+    async def _offloaded():
+        await simple._run_blocking_fs(simple._resolve_models, payload)
+
+    async def _inline():
+        simple._resolve_models(payload)
+
+    results = {"models": len(payload)}
+    for mode, work in (("executor", _offloaded), ("inline", _inline)):
+        simple._source_sizes.clear()
+        simple._get_cache_index().rebuild()
+        max_tick, ticks, wall = asyncio.run(_max_loop_tick(work))
+        results[mode] = {"max_tick_ms": max_tick * 1000.0, "ticks": ticks, "resolve_ms": wall * 1000.0}
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark Arena AutoCache I/O paths against a throttled synthetic NAS")
+    parser.add_argument("--workdir", help="working directory (default: a temporary directory, removed afterwards)")
+    parser.add_argument("--scale", type=float, default=0.01, help="model size scale (1.0 = real sizes, ~74 GB library)")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--nas-latency-ms", type=float, default=5.0, help="latency per NAS open/lookup")
+    parser.add_argument("--nas-mbps", type=float, default=200.0, help="shared NAS link bandwidth, MB/s (0 = unlimited)")
+    parser.add_argument("--nas-stream-mbps", type=float, default=80.0, help="per-stream NAS bandwidth, MB/s (0 = unlimited)")
+    parser.add_argument("--workers", default="1,2,4,8", help="copy worker counts to measure")
+    parser.add_argument("--iterations", type=int, default=5, help="repetitions for latency measurements")
+    parser.add_argument("--resolve-models", type=int, default=500, help="models per resolve in load_under_resolve")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    workdir = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix="arena_bench_"))
+    nas_root = workdir / "nas"
+    cache_root = workdir / "cache"
+    nas_root.mkdir(parents=True, exist_ok=True)
+    cache_root.mkdir(parents=True, exist_ok=True)
+
+    models = build_library(nas_root, args.scale, args.seed)
+    categories = sorted({c for c, _, _ in models})
+    nas = ThrottledNAS(nas_root, args.nas_latency_ms / 1000.0, args.nas_mbps * MB, args.nas_stream_mbps * MB)
+
+    # RU: Синтетический folder_paths подменяет ComfyUI до импорта модуля кеша
+    folder_paths = make_folder_paths(nas, nas_root, categories)
+    sys.modules["folder_paths"] = folder_paths
+    os.environ["ARENA_AUTO_CACHE_ENABLED"] = "0"
+    os.environ["ARENA_AUTOCACHE_AUTOPATCH"] = "0"
+
+    # RU: Логи модуля уходят в stderr, stdout - только JSON отчет
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run(args, workdir, nas_root, cache_root, models, categories, nas, folder_paths)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if not args.workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+def run(args, workdir, nas_root, cache_root, models, categories, nas, folder_paths) -> dict:
+    """Import the cache module against the synthetic environment and run all measurements."""
+    from autocache import arena_auto_cache_simple as simple
+
+    # RU: Бенчмарк не должен переписывать пользовательский .env при выходе
+    atexit.unregister(simple._reset_env_on_exit)
+    simple.open = nas.open
+    simple._settings = simple.CacheSettings(
+        root=cache_root,
+        min_size_mb=0.0,
+        max_cache_gb=0.0,
+        verbose=False,
+        effective_categories=categories,
+    )
+    simple._auto_cache_enabled = False
+    simple._autopatch_enabled = False
+    simple._apply_folder_paths_patch()
+
+    worker_counts = [int(w) for w in args.workers.split(",") if w.strip()]
+    started = time.time()
+    results = {}
+    results.update(bench_resolver(simple, folder_paths, models, cache_root, args.iterations))
+    results["resolve_batch"] = bench_resolve_batch(simple, models, cache_root, args.iterations)
+    results["copy"] = bench_copy(simple, folder_paths, models, cache_root, worker_counts)
+    results["scan"] = bench_scan(nas_root, workdir, args.iterations)
+    results["prune"] = bench_prune(simple, models, cache_root, args.iterations)
+    results["load_under_copy"] = bench_load_under_copy(simple, folder_paths, models, cache_root, args.iterations)
+    results["load_under_resolve"] = bench_load_under_resolve(simple, models, cache_root, args.resolve_models)
+
+    return {
+        "benchmark": "arena_io",
+        "timestamp": started,
+        "duration_s": time.time() - started,
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "params": {
+            "scale": args.scale,
+            "seed": args.seed,
+            "models": len(models),
+            "library_bytes": sum(size for _, _, size in models),
+            "nas_latency_ms": args.nas_latency_ms,
+            "nas_mbps": args.nas_mbps,
+            "nas_stream_mbps": args.nas_stream_mbps,
+            "iterations": args.iterations,
+            "resolve_models": args.resolve_models,
+        },
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    sys.exit(main())
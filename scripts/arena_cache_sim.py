@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Arena Cache Simulator - replay model load traces against SSD cache sizes and eviction policies
+RU: Симулятор кеша - проигрывает трассы загрузок моделей для разных размеров SSD и политик вытеснения
+
+Traces are JSONL. Supported line shapes:
+- Arena event log (ARENA_EVENT_LOG=1): {"event": "hit"|"miss", "key": "loras/x.safetensors", "size": ...}
+  Other events (copy_*, evict, scan, settings, resolve) are ignored.
+- Plain traces: {"category": "loras", "filename": "x.safetensors", "size": ...} or {"key": ...}
+
+File sizes: the "size" field of the trace when present, otherwise the file is
+looked up in the NAS folder catalog (user/arena_nas_cache.json) and stat'ed,
+otherwise --default-size-mb is used.
+
+Cache model (mirrors Arena AutoCache RED mode):
+- every miss copies the model into the cache (files below --min-size-mb are never cached);
+- when the cache exceeds its size it is pruned down to --low-watermark of the limit;
+- "fifo" is what Arena does today (prune by file mtime = copy time), the other
+  policies are candidates.
+
+Usage:
+    python scripts/arena_cache_sim.py events.jsonl --sizes-gb 50,100,200,400 --policies fifo,lru,lfu,gdsf
+    python scripts/arena_cache_sim.py events.jsonl --catalog user/arena_nas_cache.json --json > curve.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+
+GB = 1024 ** 3
+MB = 1024 ** 2
+
+
+# ---------------------------------------------------------------------------
+# Trace loading
+# ---------------------------------------------------------------------------
+
+
+def _record_key(record: dict) -> str | None:
+    """Model key category/filename of a trace record, or None if it is not a model request."""
+    event = record.get("event")
+    if event is not None and event not in ("hit", "miss"):
+        return None
+    key = record.get("key")
+    if not key and record.get("category") and record.get("filename"):
+        key = f"{record['category']}/{record['filename']}"
+    return str(key).replace("\\", "/") if key else None
+
+
+def load_trace(paths: list[str]) -> tuple[list[str], dict[str, int]]:
+    """Read request keys (in order) and any sizes recorded in the traces."""
+    keys: list[str] = []
+    sizes: dict[str, int] = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                key = _record_key(record)
+                if key is None:
+                    continue
+                keys.append(key)
+                size = record.get("size")
+                if isinstance(size, (int, float)) and size > 0:
+                    sizes[key] = int(size)
+    return keys, sizes
+
+
+def sizes_from_catalog(catalog_path: str, keys: set[str]) -> dict[str, int]:
+    """Stat model files through the NAS folder catalog written by arena_path_manager."""
+    with open(catalog_path, encoding="utf-8") as f:
+        data = json.load(f)
+    path_map: dict[str, list[str]] = data.get("paths", data) if isinstance(data, dict) else {}
+    all_folders = [folder for folders in path_map.values() for folder in folders]
+
+    sizes: dict[str, int] = {}
+    for key in keys:
+        category, _, filename = key.partition("/")
+        # RU: Сначала папки своей категории, затем все остальные
+        for folder in path_map.get(category, []) + all_folders:
+            try:
+                sizes[key] = os.path.getsize(os.path.join(folder, filename))
+                break
+            except OSError:
+                continue
+    return sizes
+
+
+# ---------------------------------------------------------------------------
+# Policies
+# ---------------------------------------------------------------------------
+
+
+class Policy:
+    """Eviction order over cached keys."""
+
+    def __init__(self) -> None:
+        self.entries: OrderedDict[str, int] = OrderedDict()  # key -> size
+
+    def on_hit(self, key: str) -> None:
+        pass
+
+    def on_insert(self, key: str, size: int) -> None:
+        self.entries[key] = size
+
+    def victim(self, exclude: str) -> str | None:
+        """Next key to evict, never ``exclude`` (the model that was just copied)."""
+        return next((k for k in self.entries if k != exclude), None)
+
+    def remove(self, key: str) -> int:
+        return self.entries.pop(key)
+
+
+class FifoPolicy(Policy):
+    """Oldest copy first (current Arena pruning by mtime)."""
+
+
+class LruPolicy(Policy):
+    """Least recently used first."""
+
+    def on_hit(self, key: str) -> None:
+        self.entries.move_to_end(key)
+
+
+class LfuPolicy(Policy):
+    """Least frequently used first; ties broken by recency. Frequencies survive eviction."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.freq: dict[str, int] = {}
+        self.last: dict[str, int] = {}
+        self.clock = 0
+
+    def _touch(self, key: str) -> None:
+        self.clock += 1
+        self.freq[key] = self.freq.get(key, 0) + 1
+        self.last[key] = self.clock
+
+    def on_hit(self, key: str) -> None:
+        self._touch(key)
+
+    def on_insert(self, key: str, size: int) -> None:
+        super().on_insert(key, size)
+        self._touch(key)
+
+    def victim(self, exclude: str) -> str | None:
+        candidates = [k for k in self.entries if k != exclude]
+        return min(candidates, key=lambda k: (self.freq[k], self.last[k]), default=None)
+
+
+class GdsfPolicy(Policy):
+    """GreedyDual-Size-Frequency: prefers keeping small, popular models (hit-ratio oriented)."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.freq: dict[str, int] = {}
+        self.priority: dict[str, float] = {}
+        self.inflation = 0.0
+
+    def _update(self, key: str) -> None:
+        self.freq[key] = self.freq.get(key, 0) + 1
+        self.priority[key] = self.inflation + self.freq[key] * GB / max(1, self.entries[key])
+
+    def on_hit(self, key: str) -> None:
+        self._update(key)
+
+    def on_insert(self, key: str, size: int) -> None:
+        super().on_insert(key, size)
+        self._update(key)
+
+    def victim(self, exclude: str) -> str | None:
+        candidates = [k for k in self.entries if k != exclude]
+        return min(candidates, key=self.priority.__getitem__, default=None)
+
+    def remove(self, key: str) -> int:
+        self.inflation = self.priority.pop(key)
+        return super().remove(key)
+
+
+POLICIES = {"fifo": FifoPolicy, "lru": LruPolicy, "lfu": LfuPolicy, "gdsf": GdsfPolicy}
+
+
+# ---------------------------------------------------------------------------
+# Simulation
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class SimResult:
+    policy: str
+    cache_gb: float
+    requests: int
+    hits: int
+    misses: int
+    uncacheable: int
+    hit_ratio: float
+    byte_hit_ratio: float
+    bytes_copied: int
+    evictions: int
+    bytes_evicted: int
+    load_time_s: float
+    baseline_load_time_s: float
+    saved_s: float
+
+
+def simulate(
+    keys: list[str],
+    sizes: dict[str, int],
+    cache_bytes: int,
+    policy_name: str,
+    *,
+    min_size: int = 0,
+    low_watermark: float = 0.95,
+    nas_bps: float = 100 * MB,
+    ssd_bps: float = 1500 * MB,
+) -> SimResult:
+    """Replay ``keys`` through one cache configuration. ``cache_bytes`` <= 0 means unlimited."""
+    policy = POLICIES[policy_name]()
+    used = 0
+    hits = misses = uncacheable = evictions = 0
+    bytes_hit = bytes_total = bytes_copied = bytes_evicted = 0
+    load_time = baseline = 0.0
+
+    for key in keys:
+        size = sizes[key]
+        bytes_total += size
+        baseline += size / nas_bps
+
+        if key in policy.entries:
+            hits += 1
+            bytes_hit += size
+            load_time += size / ssd_bps
+            policy.on_hit(key)
+            continue
+
+        # RU: Промах - модель грузится с NAS, копия ставится в кеш
+        misses += 1
+        load_time += size / nas_bps
+        if size < min_size or (cache_bytes > 0 and size > cache_bytes):
+            uncacheable += 1
+            continue
+        policy.on_insert(key, size)
+        used += size
+        bytes_copied += size
+        if cache_bytes > 0 and used > cache_bytes:
+            target = cache_bytes * low_watermark
+            while used > target:
+                victim = policy.victim(exclude=key)
+                if victim is None:
+                    break
+                freed = policy.remove(victim)
+                used -= freed
+                evictions += 1
+                bytes_evicted += freed
+
+    requests = len(keys)
+    return SimResult(
+        policy=policy_name,
+        cache_gb=round(cache_bytes / GB, 3) if cache_bytes > 0 else 0.0,
+        requests=requests,
+        hits=hits,
+        misses=misses,
+        uncacheable=uncacheable,
+        hit_ratio=hits / requests if requests else 0.0,
+        byte_hit_ratio=bytes_hit / bytes_total if bytes_total else 0.0,
+        bytes_copied=bytes_copied,
+        evictions=evictions,
+        bytes_evicted=bytes_evicted,
+        load_time_s=load_time,
+        baseline_load_time_s=baseline,
+        saved_s=baseline - load_time,
+    )
+
+
+def sweep(keys, sizes, sizes_gb, policies, **kwargs) -> list[SimResult]:
+    """Simulate every (policy, size) pair; size 0 = unlimited."""
+    return [
+        simulate(keys, sizes, int(size_gb * GB), policy, **kwargs)
+        for policy in policies
+        for size_gb in sizes_gb
+    ]
+
+
+def _print_table(results: list[SimResult], working_set: int, unique: int) -> None:
+    print(f"unique models: {unique}, working set: {working_set / GB:.1f} GB")
+    header = f"{'policy':<6} {'cache_gb':>9} {'hit%':>7} {'byte_hit%':>10} {'copied_gb':>10} {'evict':>6} {'saved_min':>10}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        size = f"{r.cache_gb:.0f}" if r.cache_gb else "inf"
+        print(
+            f"{r.policy:<6} {size:>9} {r.hit_ratio * 100:>6.1f}% {r.byte_hit_ratio * 100:>9.1f}% "
+            f"{r.bytes_copied / GB:>10.1f} {r.evictions:>6} {r.saved_s / 60:>10.1f}"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay Arena model load traces against cache sizes and eviction policies")
+    parser.add_argument("traces", nargs="+", help="JSONL trace files (Arena event log or plain category/filename records)")
+    parser.add_argument("--sizes-gb", default="25,50,100,200,400,0", help="comma-separated cache sizes in GB, 0 = unlimited")
+    parser.add_argument("--policies", default="fifo,lru,lfu,gdsf", help=f"comma-separated policies: {','.join(POLICIES)}")
+    parser.add_argument("--catalog", help="NAS folder catalog (arena_nas_cache.json) to stat real file sizes")
+    parser.add_argument("--default-size-mb", type=float, default=2048.0, help="size for models with unknown size")
+    parser.add_argument("--min-size-mb", type=float, default=10.0, help="models below this are never cached (ARENA_CACHE_MIN_SIZE_MB)")
+    parser.add_argument("--low-watermark", type=float, default=0.95, help="prune target as a fraction of the limit")
+    parser.add_argument("--nas-mbps", type=float, default=100.0, help="NAS read throughput, MB/s")
+    parser.add_argument("--ssd-mbps", type=float, default=1500.0, help="SSD read throughput, MB/s")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    policies = [p.strip() for p in args.policies.split(",") if p.strip()]
+    unknown = [p for p in policies if p not in POLICIES]
+    if unknown:
+        parser.error(f"unknown policies: {', '.join(unknown)}")
+    sizes_gb = [float(s) for s in args.sizes_gb.split(",") if s.strip()]
+
+    keys, sizes = load_trace(args.traces)
+    if not keys:
+        print("No model requests found in traces", file=sys.stderr)
+        return 1
+
+    unique = set(keys)
+    missing = unique - set(sizes)
+    if missing and args.catalog:
+        sizes.update(sizes_from_catalog(args.catalog, missing))
+        missing = unique - set(sizes)
+    for key in missing:
+        sizes[key] = int(args.default_size_mb * MB)
+    working_set = sum(sizes[k] for k in unique)
+
+    results = sweep(
+        keys,
+        sizes,
+        sizes_gb,
+        policies,
+        min_size=int(args.min_size_mb * MB),
+        low_watermark=args.low_watermark,
+        nas_bps=args.nas_mbps * MB,
+        ssd_bps=args.ssd_mbps * MB,
+    )
+
+    if args.json:
+        json.dump(
+            {
+                "requests": len(keys),
+                "unique_models": len(unique),
+                "working_set_bytes": working_set,
+                "unknown_sizes": len(missing),
+                "results": [asdict(r) for r in results],
+            },
+            sys.stdout,
+            indent=2,
+        )
+        print()
+    else:
+        if missing:
+            print(f"warning: {len(missing)} models without size, assumed {args.default_size_mb:.0f} MB", file=sys.stderr)
+        _print_table(results, working_set, len(unique))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
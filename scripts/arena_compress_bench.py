@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Arena Compression Benchmark - throughput and ratio of smart-cache compression per level and thread count
+RU: Бенчмарк сжатия записей smart cache: скорость и степень сжатия по уровням и числу потоков
+
+What it does:
+- takes a real .safetensors file (--input) or builds a synthetic one with
+  fp16 weights drawn from N(0, 0.02) - the typical distribution of trained
+  weights, which is what decides how well they compress;
+- runs autocache.arena_compression.compress_file/decompress_file (the same
+  file-to-file path MultiLevelCache.cache_model_file uses) for every
+  level x threads combination;
+- reports compression and decompression throughput (MB/s of uncompressed
+  data), ratio and saving, as a table or JSON.
+
+zstd needs the optional 'zstandard' package (streaming, multi-threaded) or
+'zstd' (one-shot); --method gzip works with the stdlib only.
+
+Usage:
+    python scripts/arena_compress_bench.py --size-mb 256 --levels 1,3,6,12 --threads 1,4,8
+    python scripts/arena_compress_bench.py --input model.safetensors --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import array
+import importlib.util
+import json
+import os
+import random
+import statistics
+import struct
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+MB = 1024 * 1024
+
+
+def _load_compression():
+    # RU: Грузим модуль по пути: импорт пакета autocache поднимает всю ноду (патчи, сброс .env при выходе)
+    path = Path(__file__).parent.parent / "autocache" / "arena_compression.py"
+    spec = importlib.util.spec_from_file_location("arena_compression", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+arena_compression = _load_compression()
+
+
+def _fp16_gaussian_table(std: float) -> array.array:
+    """65536 fp16 bit patterns at the quantiles of N(0, std); indexing it with uniform 16-bit ints samples the distribution."""
+    dist = statistics.NormalDist(0.0, std)
+    table = array.array("H")
+    for i in range(65536):
+        value = dist.inv_cdf((i + 0.5) / 65536)
+        table.append(struct.unpack("<H", struct.pack("<e", value))[0])
+    return table
+
+
+def build_safetensors(path: Path, size_bytes: int, seed: int, std: float = 0.02) -> None:
+    """Synthetic safetensors file: a JSON header and fp16 tensors of 4096x4096 or smaller."""
+    rng = random.Random(seed)
+    table = _fp16_gaussian_table(std)
+    tensors = []
+    remaining = size_bytes // 2
+    index = 0
+    while remaining > 0:
+        elements = min(remaining, 4096 * 4096)
+        tensors.append((f"model.layers.{index}.weight", elements))
+        remaining -= elements
+        index += 1
+
+    header = {"__metadata__": {"format": "pt"}}
+    offset = 0
+    for name, elements in tensors:
+        header[name] = {"dtype": "F16", "shape": [elements], "data_offsets": [offset, offset + elements * 2]}
+        offset += elements * 2
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    header_bytes += b" " * (-len(header_bytes) % 8)
+
+    with open(path, "wb") as f:
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        for _name, elements in tensors:
+            done = 0
+            while done < elements:
+                n = min(elements - done, 1 << 20)
+                indices = array.array("H", rng.randbytes(n * 2))
+                f.write(array.array("H", map(table.__getitem__, indices)).tobytes())
+                done += n
+
+
+def bench(source: Path, workdir: Path, method: str, levels: list[int], threads: list[int], repeat: int) -> list[dict]:
+    size = source.stat().st_size
+    compressed_path = workdir / "entry.cache"
+    restored_path = workdir / "entry.restored"
+    rows = []
+    for level in levels:
+        for thread_count in threads:
+            comp_times, decomp_times = [], []
+            stored = 0
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                _, stored = arena_compression.compress_file(source, compressed_path, method, level, thread_count)
+                comp_times.append(time.perf_counter() - t0)
+                t0 = time.perf_counter()
+                arena_compression.decompress_file(compressed_path, restored_path, method)
+                decomp_times.append(time.perf_counter() - t0)
+            if restored_path.stat().st_size != size:
+                raise RuntimeError(f"round trip size mismatch at level {level}")
+            comp_s, decomp_s = min(comp_times), min(decomp_times)
+            rows.append({
+                "level": level,
+                "threads": thread_count,
+                "ratio": stored / size if size else 1.0,
+                "saving_pct": (1 - stored / size) * 100 if size else 0.0,
+                "compress_mbps": size / MB / comp_s if comp_s else 0.0,
+                "decompress_mbps": size / MB / decomp_s if decomp_s else 0.0,
+            })
+    compressed_path.unlink(missing_ok=True)
+    restored_path.unlink(missing_ok=True)
+    return rows
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark smart-cache compression per level and thread count")
+    parser.add_argument("--input", help="real .safetensors file to compress (default: synthetic fp16 weights)")
+    parser.add_argument("--size-mb", type=int, default=128, help="size of the synthetic file")
+    parser.add_argument("--method", default="zstd", choices=["zstd", "gzip"])
+    parser.add_argument("--levels", default="1,3,6,12")
+    parser.add_argument("--threads", default=f"1,{os.cpu_count() or 1}", help="thread counts (zstd only; 0 = all cores)")
+    parser.add_argument("--repeat", type=int, default=2, help="runs per combination (best is reported)")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    if not arena_compression.available(args.method):
+        parser.error(f"{args.method} is not available (install 'zstandard')")
+    levels = [int(v) for v in args.levels.split(",") if v.strip()]
+    threads = [int(v) for v in args.threads.split(",") if v.strip()] if args.method == "zstd" else [1]
+
+    with tempfile.TemporaryDirectory(prefix="arena_compress_bench_") as tmp:
+        workdir = Path(tmp)
+        if args.input:
+            source = Path(args.input)
+        else:
+            source = workdir / "synthetic_fp16.safetensors"
+            build_safetensors(source, args.size_mb * MB, args.seed)
+        rows = bench(source, workdir, args.method, levels, threads, args.repeat)
+
+    report = {
+        "method": args.method,
+        "backend": arena_compression.zstd_backend() if args.method == "zstd" else "gzip",
+        "input": args.input or f"synthetic fp16 N(0, 0.02), {args.size_mb} MB",
+        "results": rows,
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+    print(f"{report['input']} - {report['method']} ({report['backend']})")
+    print(f"{'level':>5} {'threads':>7} {'ratio':>7} {'saving':>7} {'comp MB/s':>10} {'decomp MB/s':>12}")
+    for row in rows:
+        print(
+            f"{row['level']:>5} {row['threads']:>7} {row['ratio']:>7.3f} {row['saving_pct']:>6.1f}%"
+            f" {row['compress_mbps']:>10.1f} {row['decompress_mbps']:>12.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Arena Predict Eval - offline precision@k of the smart-cache model predictor on recorded workflow histories
+RU: Офлайн-оценка предсказателя моделей smart cache (precision@k) на записанных историях воркфлоу
+
+Histories are JSONL. Supported line shapes:
+- One workflow run per line: {"models": ["checkpoints/a.safetensors", "loras/b.safetensors"], "ts": ...}
+- Arena event log (ARENA_EVENT_LOG=1): "hit"/"miss" events are grouped into
+  runs - a new run starts after --gap-s seconds without model loads. Other
+  events are ignored.
+
+Replay: runs are fed to autocache.arena_predictor.ModelPredictor in order;
+before observing run i it predicts from run i-1, and the top k is scored
+against the models of run i:
+- precision@k = |top k & run i| / k, recall@k = |top k & run i| / |run i|;
+- "all" scores against every model of run i, "new" only against models that
+  were not in run i-1 (what preloading can actually win), with current
+  models excluded from the prediction.
+Baselines: "last" predicts run i-1 again, "popular" the most used models so far.
+
+Usage:
+    python scripts/arena_predict_eval.py runs.jsonl --ks 1,3,5,10
+    python scripts/arena_predict_eval.py user/arena_events.jsonl --gap-s 120 --json
+    python scripts/arena_predict_eval.py --synthetic 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import random
+import sys
+from collections import Counter
+from pathlib import Path
+
+
+def _load_predictor():
+    # RU: Грузим модуль по пути: импорт пакета autocache поднимает всю ноду (патчи, сброс .env при выходе)
+    path = Path(__file__).parent.parent / "autocache" / "arena_predictor.py"
+    spec = importlib.util.spec_from_file_location("arena_predictor", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+arena_predictor = _load_predictor()
+
+
+# ---------------------------------------------------------------------------
+# Histories
+# ---------------------------------------------------------------------------
+
+
+def load_runs(paths: list[str], gap_s: float) -> list[list[str]]:
+    """Model sets of workflow runs, in order."""
+    runs: list[list[str]] = []
+    current: list[str] = []
+    last_ts = None
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record.get("models"), list):
+                    if current:
+                        runs.append(current)
+                        current = []
+                    runs.append([str(m) for m in record["models"] if m])
+                    continue
+                if record.get("event") not in ("hit", "miss") or not record.get("key"):
+                    continue
+                ts = float(record.get("ts", 0.0))
+                if current and last_ts is not None and ts - last_ts > gap_s:
+                    runs.append(current)
+                    current = []
+                key = str(record["key"]).replace("\\", "/")
+                if key not in current:
+                    current.append(key)
+                last_ts = ts
+    if current:
+        runs.append(current)
+    return [run for run in runs if run]
+
+
+def synthetic_runs(count: int, seed: int) -> list[list[str]]:
+    """Runs of a user who switches between a few projects (checkpoint + VAE + LoRAs) with sticky habits."""
+    rng = random.Random(seed)
+    projects = []
+    for p in range(6):
+        projects.append({
+            "base": [f"checkpoints/base_{p % 3}.safetensors", f"vae/vae_{p % 2}.safetensors"],
+            "loras": [f"loras/p{p}_lora_{i}.safetensors" for i in range(4)],
+        })
+    # RU: Матрица переходов между проектами: чаще остаемся, иногда переходим к "соседу"
+    project = 0
+    runs = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll > 0.75:
+            project = (project + 1) % len(projects) if roll < 0.93 else rng.randrange(len(projects))
+        spec = projects[project]
+        run = list(spec["base"]) + rng.sample(spec["loras"], rng.randint(1, 3))
+        if rng.random() < 0.1:
+            run.append(f"upscale_models/upscaler_{rng.randrange(3)}.pth")
+        runs.append(run)
+    return runs
+
+
+# ---------------------------------------------------------------------------
+# Evaluation
+# ---------------------------------------------------------------------------
+
+
+def _score(predicted: list[str], actual: set[str], k: int) -> tuple[float, float, float]:
+    top = predicted[:k]
+    hits = len(set(top) & actual)
+    return hits / k, hits / len(actual) if actual else 0.0, 1.0 if hits else 0.0
+
+
+def evaluate(runs: list[list[str]], ks: list[int], decay: float, warmup: int) -> dict:
+    predictor = arena_predictor.ModelPredictor(decay)
+    popularity: Counter = Counter()
+    kmax = max(ks)
+    sums = {
+        (method, target, k): [0.0, 0.0, 0.0]
+        for method in ("predictor", "last", "popular")
+        for target in ("all", "new")
+        for k in ks
+    }
+    steps = {"all": 0, "new": 0}
+
+    for i, run in enumerate(runs):
+        if i > 0 and i >= warmup:
+            previous = runs[i - 1]
+            actual = set(run)
+            new = actual - set(previous)
+            ranked_popular = [m for m, _ in popularity.most_common(kmax + len(previous))]
+            candidates = {
+                ("predictor", "all"): [m for m, _ in predictor.predict(previous, kmax)],
+                ("predictor", "new"): [m for m, _ in predictor.predict(previous, kmax, exclude_current=True)],
+                ("last", "all"): list(previous),
+                ("last", "new"): [],
+                ("popular", "all"): ranked_popular[:kmax],
+                ("popular", "new"): [m for m in ranked_popular if m not in previous][:kmax],
+            }
+            for target, truth in (("all", actual), ("new", new)):
+                if not truth:
+                    continue
+                steps[target] += 1
+                for method in ("predictor", "last", "popular"):
+                    for k in ks:
+                        p, r, h = _score(candidates[(method, target)], truth, k)
+                        bucket = sums[(method, target, k)]
+                        bucket[0] += p
+                        bucket[1] += r
+                        bucket[2] += h
+        predictor.observe(run)
+        popularity.update(set(run))
+
+    rows = []
+    for (method, target, k), (p, r, h) in sums.items():
+        n = steps[target] or 1
+        rows.append({
+            "method": method,
+            "target": target,
+            "k": k,
+            "precision": p / n,
+            "recall": r / n,
+            "hit_rate": h / n,
+        })
+    return {"runs": len(runs), "steps": steps, "results": rows}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline precision@k of the smart-cache model predictor")
+    parser.add_argument("histories", nargs="*", help="JSONL run histories or Arena event logs")
+    parser.add_argument("--synthetic", type=int, default=0, help="evaluate on N synthetic runs instead")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--gap-s", type=float, default=60.0, help="idle gap that ends a run (event logs)")
+    parser.add_argument("--ks", default="1,3,5,10")
+    parser.add_argument("--decay", type=float, default=0.98)
+    parser.add_argument("--warmup", type=int, default=20, help="runs observed before scoring starts")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    if args.synthetic:
+        runs = synthetic_runs(args.synthetic, args.seed)
+    elif args.histories:
+        runs = load_runs(args.histories, args.gap_s)
+    else:
+        parser.error("give history files or --synthetic N")
+    ks = [int(v) for v in args.ks.split(",") if v.strip()]
+    report = evaluate(runs, ks, args.decay, args.warmup)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+    print(f"{report['runs']} runs, scored steps: all={report['steps']['all']} new={report['steps']['new']}")
+    print(f"{'target':>6} {'method':>10} {'k':>3} {'precision':>10} {'recall':>8} {'hit rate':>9}")
+    for row in sorted(report["results"], key=lambda r: (r["target"], r["k"], r["method"])):
+        print(
+            f"{row['target']:>6} {row['method']:>10} {row['k']:>3} {row['precision']:>10.3f}"
+            f" {row['recall']:>8.3f} {row['hit_rate']:>9.3f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+Tests for autocache/arena_memory_tier.py (smart cache L1 byte accounting).
+
+The module is loaded by path: importing the autocache package starts the
+node (folder_paths patch, .env handling), and the tier needs no torch.
+
+Run: python -m unittest discover -s tests  (or pytest tests)
+"""
+
+import gc
+import importlib.util
+import random
+import sys
+import tracemalloc
+import unittest
+from pathlib import Path
+
+
+def _load_memory_tier():
+    path = Path(__file__).resolve().parent.parent / "autocache" / "arena_memory_tier.py"
+    spec = importlib.util.spec_from_file_location("arena_memory_tier", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+arena_memory_tier = _load_memory_tier()
+MemoryTier = arena_memory_tier.MemoryTier
+
+KB = 1024
+MB = 1024 * KB
+
+
+class MemoryTierBudgetTest(unittest.TestCase):
+    def test_random_puts_stay_within_budget(self):
+        rng = random.Random(1234)
+        tier = MemoryTier(4 * MB)
+        for i in range(2000):
+            key = f"model_{rng.randrange(200)}"
+            payload = bytes(rng.randrange(1, 512 * KB))
+            tier.put(key, payload)
+            self.assertLessEqual(tier.bytes_used, tier.max_bytes)
+            if i % 100 == 0:
+                # The counter is the sum of the stored payloads, not an estimate
+                stored = sum(len(tier.get(k)) for k in list(tier._entries))
+                self.assertEqual(stored, tier.bytes_used)
+        self.assertGreater(tier.evictions, 0)
+
+    def test_replacing_a_key_does_not_leak_bytes(self):
+        tier = MemoryTier(MB)
+        for size in (100 * KB, 300 * KB, 50 * KB):
+            tier.put("same", bytes(size))
+        self.assertEqual(tier.bytes_used, 50 * KB)
+        self.assertEqual(len(tier), 1)
+
+    def test_payload_size_uses_buffer_length(self):
+        self.assertEqual(arena_memory_tier.payload_size(b"x" * 1000), 1000)
+        self.assertEqual(arena_memory_tier.payload_size(bytearray(2048)), 2048)
+        self.assertEqual(arena_memory_tier.payload_size(memoryview(bytes(4096))[1024:]), 3072)
+
+
+class MemoryTierAdmissionTest(unittest.TestCase):
+    def test_rejects_items_above_item_fraction(self):
+        # As MultiLevelCache builds it: max_item_bytes = budget * l1_max_item_fraction
+        budget, fraction = 4 * MB, 0.25
+        tier = MemoryTier(budget, int(budget * fraction))
+        self.assertTrue(tier.put("small", bytes(MB)))
+        self.assertFalse(tier.put("large", bytes(MB + 1)))
+        self.assertNotIn("large", tier)
+        self.assertIn("small", tier)
+        self.assertEqual(tier.rejected, 1)
+        self.assertEqual(tier.bytes_used, MB)
+
+    def test_rejected_replacement_drops_the_old_payload(self):
+        tier = MemoryTier(4 * MB, MB)
+        tier.put("model", bytes(MB))
+        self.assertFalse(tier.put("model", bytes(2 * MB)))
+        self.assertNotIn("model", tier)
+        self.assertEqual(tier.bytes_used, 0)
+
+    def test_default_item_limit_is_half_the_budget(self):
+        tier = MemoryTier(2 * MB)
+        self.assertEqual(tier.max_item_bytes, MB)
+        self.assertFalse(tier.put("big", bytes(MB + 1)))
+
+
+class MemoryTierLruTest(unittest.TestCase):
+    def test_hit_moves_entry_to_most_recent(self):
+        tier = MemoryTier(3 * MB, 3 * MB)
+        for key in ("a", "b", "c"):
+            tier.put(key, bytes(MB))
+        self.assertIsNotNone(tier.get("a"))  # a is now most recent; b is the LRU
+        tier.put("d", bytes(MB))
+        self.assertIn("a", tier)
+        self.assertNotIn("b", tier)
+        self.assertEqual(list(tier._entries), ["c", "a", "d"])
+
+    def test_evict_lru_returns_least_recent_key(self):
+        tier = MemoryTier(3 * MB, 3 * MB)
+        for key in ("a", "b", "c"):
+            tier.put(key, bytes(MB))
+        tier.get("a")
+        self.assertEqual(tier.evict_lru(), "b")
+        self.assertEqual(tier.bytes_used, 2 * MB)
+
+
+class MemoryTierTracemallocTest(unittest.TestCase):
+    def test_accounted_bytes_match_traced_allocations(self):
+        rng = random.Random(42)
+        budget = 16 * MB
+        gc.collect()
+        tracemalloc.start()
+        try:
+            tier = MemoryTier(budget)
+            baseline = tracemalloc.get_traced_memory()[0]
+            for i in range(300):
+                # The tier holds the only reference, so evicted payloads are freed
+                tier.put(f"model_{i}", bytes(rng.randrange(64 * KB, 2 * MB)))
+            gc.collect()
+            traced = tracemalloc.get_traced_memory()[0] - baseline
+        finally:
+            tracemalloc.stop()
+        self.assertLessEqual(tier.bytes_used, budget)
+        # Payload bytes dominate; the rest is object headers and the OrderedDict
+        overhead = traced - tier.bytes_used
+        self.assertGreaterEqual(overhead, 0)
+        self.assertLess(overhead, 64 * KB + 0.01 * tier.bytes_used)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
 // Arena Simple Header Extension - Based on ComfyUI-Crystools approach
 // Simple button in ComfyUI header for Arena AutoCache
 import { app } from "../../scripts/app.js";
+import { api } from "../../scripts/api.js";
 
 
 // RU: Cache modes for Arena button
@@ -918,7 +919,7 @@ app.registerExtension({
                 // RU: Initialize cache mode state
                 let currentCacheMode = CACHE_MODES.GRAY;
                 let uncachedModelsCount = 0;
-                let progressPollingInterval = null;
+                let copyEventsSubscribed = false;
                 
                 // RU: Functions for progress bar management
         function updateProgressBar(copyStatus) {
@@ -956,6 +957,8 @@ app.registerExtension({
             }
         }
                 
+                // RU: Одноразовая синхронизация снимка (при загрузке/смене режима);
+                // RU: дальше прогресс приходит push-событиями "arena_copy" через websocket
                 async function checkCopyStatus() {
                     try {
                         const response = await fetch('/arena/copy_status');
@@ -963,19 +966,6 @@ app.registerExtension({
                             const data = await response.json();
                             if (data.status === 'success' && data.copy_status) {
                                 updateProgressBar(data.copy_status);
-                                
-                                // RU: Если копирование активно - продолжаем polling
-                                if (data.copy_status.is_copying) {
-                                    if (!progressPollingInterval) {
-                                        progressPollingInterval = setInterval(checkCopyStatus, 500); // 500ms
-                                    }
-                                } else {
-                                    // RU: Если копирование завершено - останавливаем polling
-                                    if (progressPollingInterval) {
-                                        clearInterval(progressPollingInterval);
-                                        progressPollingInterval = null;
-                                    }
-                                }
                             }
                         }
                     } catch (error) {
@@ -983,16 +973,28 @@ app.registerExtension({
                     }
                 }
                 
-                function startProgressPolling() {
-                    if (!progressPollingInterval) {
-                        progressPollingInterval = setInterval(checkCopyStatus, 1000); // 1s
+                function onCopyEvent(event) {
+                    const detail = event.detail || {};
+                    if (detail.copy_status) {
+                        updateProgressBar(detail.copy_status);
+                    }
+                    if (detail.event === 'fail' && detail.job) {
+                        console.warn(`[Arena Simple Header] Copy failed: ${detail.job.filename}`, detail.job.error);
+                    }
+                }
+                
+                function startProgressTracking() {
+                    if (!copyEventsSubscribed) {
+                        api.addEventListener('arena_copy', onCopyEvent);
+                        copyEventsSubscribed = true;
                     }
+                    checkCopyStatus();
                 }
                 
-                function stopProgressPolling() {
-                    if (progressPollingInterval) {
-                        clearInterval(progressPollingInterval);
-                        progressPollingInterval = null;
+                function stopProgressTracking() {
+                    if (copyEventsSubscribed) {
+                        api.removeEventListener('arena_copy', onCopyEvent);
+                        copyEventsSubscribed = false;
                     }
                 }
                 
@@ -1152,11 +1154,11 @@ app.registerExtension({
                             updateButtonAppearance();
                         }
                         
-                        // RU: Start progress polling for RED mode
+                        // RU: Start progress tracking for RED mode
                         if (mode === CACHE_MODES.RED) {
-                            startProgressPolling();
+                            startProgressTracking();
                         } else {
-                            stopProgressPolling();
+                            stopProgressTracking();
                         }
                         
                         // RU: Start autopatch if needed (for both RED and GREEN modes)
@@ -1283,9 +1285,9 @@ app.registerExtension({
                             updateButtonAppearance();
                         }
                         
-                        // RU: Start progress polling if in RED mode
+                        // RU: Start progress tracking if in RED mode
                         if (currentCacheMode === CACHE_MODES.RED) {
-                            startProgressPolling();
+                            startProgressTracking();
                         }
                         
                     } catch (error) {
@@ -1316,9 +1318,9 @@ app.registerExtension({
                 window.addEventListener('beforeunload', resetEnv);
                 window.addEventListener('pagehide', resetEnv);
                 
-                // RU: Очищаем polling при закрытии страницы
-                window.addEventListener('beforeunload', stopProgressPolling);
-                window.addEventListener('pagehide', stopProgressPolling);
+                // RU: Отписываемся от событий копирования при закрытии страницы
+                window.addEventListener('beforeunload', stopProgressTracking);
+                window.addEventListener('pagehide', stopProgressTracking);
 
             }, 2000); // Wait 2 seconds for DOM
         }